@@ -24,11 +24,22 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+from AutoCrawler.crawl_metrics import CrawlMetrics
 
 
 class CollectLinks:
-    def __init__(self, no_gui=False, proxy=None, filter_stock=False):
+    # 검색 페이지 주소. 벤치마크에서는 search_urls 로 로컬 모의 사이트 주소를 넘깁니다.
+    SEARCH_URLS = {
+        'google': "https://www.google.com/search?q={keyword}&source=lnms&tbm=isch{add_url}",
+        'google_full': "https://www.google.com/search?q={keyword}&tbm=isch{add_url}",
+        'naver': "https://search.naver.com/search.naver?where=image&sm=tab_jum&query={keyword}{add_url}",
+        'artstation': "https://www.artstation.com/search?sort_by=relevance&query={keyword}",
+    }
+
+    def __init__(self, no_gui=False, proxy=None, filter_stock=False, metrics=None, search_urls=None):
         self.filter_stock = filter_stock  # 필터링 옵션 추가
+        self.metrics = metrics if metrics is not None else CrawlMetrics()
+        self.search_urls = dict(self.SEARCH_URLS, **(search_urls or {}))
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')  # To maintain user cookies
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -61,6 +72,9 @@ class CollectLinks:
                 'Download correct version at "http://chromedriver.chromium.org/downloads" and place in "./chromedriver"')
         print('_________________________________')
 
+    def search_url(self, site, keyword, add_url=""):
+        return self.search_urls[site].format(keyword=keyword, add_url=add_url)
+
     def get_scroll(self):
         pos = self.browser.execute_script("return window.pageYOffset;")
         return pos
@@ -121,10 +135,25 @@ class CollectLinks:
             
         return filtered_links
 
+    def finish_links(self, site, keyword, links, label=None):
+        # 중복/스톡 필터로 걸러진 링크 수를 기록하고 브라우저를 닫습니다.
+        self.metrics.add(site, 'links_found', len(links))
+        unique_links = self.remove_duplicates(links)
+        self.metrics.add(site, 'links_duplicate', len(links) - len(unique_links))
+        filtered_links = self.remove_stock_images(unique_links)
+        self.metrics.add(site, 'links_filtered', len(unique_links) - len(filtered_links))
+
+        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format(label or site, keyword, len(filtered_links)))
+        self.browser.close()
+
+        return filtered_links
+
     def google(self, keyword, add_url=""):
-        self.browser.get("https://www.google.com/search?q={}&source=lnms&tbm=isch{}".format(keyword, add_url))
+        clock = self.metrics.clock('google')
+        self.browser.get(self.search_url('google', keyword, add_url))
 
         time.sleep(1)
+        clock.lap('page_load')
 
         print('Scrolling down')
 
@@ -147,6 +176,7 @@ class CollectLinks:
 
             if scroll_patience >= NUM_MAX_SCROLL_PATIENCE:
                 break
+        clock.lap('scroll')
 
         print('Scraping links')
 
@@ -160,20 +190,16 @@ class CollectLinks:
 
             except Exception as e:
                 print('[Exception occurred while collecting links from google] {}'.format(e))
+        clock.lap('extract')
 
-        links = self.remove_duplicates(links)
-        links = self.remove_stock_images(links)
-
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google', keyword, len(links)))
-        self.browser.close()
-
-        return links
+        return self.finish_links('google', keyword, links)
 
     def naver(self, keyword, add_url=""):
-        self.browser.get(
-            "https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}".format(keyword, add_url))
+        clock = self.metrics.clock('naver')
+        self.browser.get(self.search_url('naver', keyword, add_url))
 
         time.sleep(1)
+        clock.lap('page_load')
 
         print('Scrolling down')
 
@@ -182,6 +208,7 @@ class CollectLinks:
         for i in range(60):
             elem.send_keys(Keys.PAGE_DOWN)
             time.sleep(0.2)
+        clock.lap('scroll')
 
         imgs = self.browser.find_elements(By.XPATH, '//div[@class="tile_item _fe_image_tab_content_tile"]//img[@class="_fe_image_tab_content_thumbnail_image"]')
 
@@ -196,24 +223,21 @@ class CollectLinks:
                     links.append(src)
             except Exception as e:
                 print('[Exception occurred while collecting links from naver] {}'.format(e))
+        clock.lap('extract')
 
-        links = self.remove_duplicates(links)
-        links = self.remove_stock_images(links)
-
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('naver', keyword, len(links)))
-        self.browser.close()
-
-        return links
+        return self.finish_links('naver', keyword, links)
 
     def google_full(self, keyword, add_url="", limit=100):
         print('[Full Resolution Mode]')
+        clock = self.metrics.clock('google')
 
-        self.browser.get("https://www.google.com/search?q={}&tbm=isch{}".format(keyword, add_url))
+        self.browser.get(self.search_url('google_full', keyword, add_url))
         time.sleep(1)
 
         # Click the first image to get full resolution images
         self.wait_and_click('//div[@jsname="dTDiAc"]')
         time.sleep(1)
+        clock.lap('page_load')
 
         body = self.browser.find_element(By.TAG_NAME, "body")
 
@@ -270,20 +294,16 @@ class CollectLinks:
                 break
 
             body.send_keys(Keys.RIGHT)
+        # 뷰어에서 다음 이미지로 넘기며 수집하므로 스크롤과 추출을 구분하지 않습니다.
+        clock.lap('extract')
 
-        links = self.remove_duplicates(links)
-        links = self.remove_stock_images(links)
-
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(links)))
-        self.browser.close()
-
-        return links
+        return self.finish_links('google', keyword, links, label='google_full')
 
     def naver_full(self, keyword, add_url=""):
         print('[Full Resolution Mode]')
+        clock = self.metrics.clock('naver')
 
-        self.browser.get(
-            "https://search.naver.com/search.naver?where=image&sm=tab_jum&query={}{}".format(keyword, add_url))
+        self.browser.get(self.search_url('naver', keyword, add_url))
         time.sleep(1)
 
         elem = self.browser.find_element(By.TAG_NAME, "body")
@@ -293,6 +313,7 @@ class CollectLinks:
         # Click the first image
         self.wait_and_click('//div[@class="tile_item _fe_image_tab_content_tile"]//img[@class="_fe_image_tab_content_thumbnail_image"]')
         time.sleep(1)
+        clock.lap('page_load')
 
         links = []
         count = 1
@@ -331,18 +352,15 @@ class CollectLinks:
                 break
 
             elem.send_keys(Keys.RIGHT)
+        clock.lap('extract')
 
-        links = self.remove_duplicates(links)
-        links = self.remove_stock_images(links)
-
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('naver_full', keyword, len(links)))
-        self.browser.close()
-
-        return links
+        return self.finish_links('naver', keyword, links, label='naver_full')
 
     def artstation(self, keyword, add_url="", limit=0):
-        self.browser.get(f"https://www.artstation.com/search?sort_by=relevance&query={keyword}")
+        clock = self.metrics.clock('artstation')
+        self.browser.get(self.search_url('artstation', keyword, add_url))
         time.sleep(2)
+        clock.lap('page_load')
 
         print('Scrolling down')
         elem = self.browser.find_element(By.TAG_NAME, "body")
@@ -384,6 +402,7 @@ class CollectLinks:
             if scroll_patience >= NUM_MAX_SCROLL_PATIENCE:
                 print(f'Scrolling stopped - Patience: {scroll_patience}')
                 break
+        clock.lap('scroll')
 
         print('Scraping links')
         
@@ -401,14 +420,9 @@ class CollectLinks:
                     break
             except Exception as e:
                 print('[Exception occurred while collecting links from artstation] {}'.format(e))
+        clock.lap('extract')
 
-        links = self.remove_duplicates(links)
-        links = self.remove_stock_images(links)
-        
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('artstation', keyword, len(links)))
-        self.browser.close()
-
-        return links
+        return self.finish_links('artstation', keyword, links)
 
 
 if __name__ == '__main__':
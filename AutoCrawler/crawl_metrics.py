@@ -0,0 +1,253 @@
+# crawl_metrics.py
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+
+def _percentile(sorted_values, q):
+    """
+    정렬된 값 목록에서 nearest-rank 방식의 백분위수를 구합니다.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class PhaseClock:
+    """
+    마지막 lap() 이후 경과 시간을 지정한 단계에 누적하는 스톱워치입니다.
+    """
+    def __init__(self, metrics, site):
+        self._metrics = metrics
+        self._site = site
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self._metrics.add_time(self._site, name, now - self._last)
+        self._last = now
+
+
+class CrawlMetrics:
+    """
+    크롤링 단계별 소요 시간, 링크/다운로드 카운터, 호스트별 응답 지연 시간을 수집합니다.
+
+    Pool 워커에서는 작업(키워드, 사이트)마다 새 인스턴스에 기록한 뒤 to_dict() 결과를 반환하고,
+    부모 프로세스의 인스턴스가 merge() 로 합산합니다. GUI 는 snapshot() 을 주기적으로 읽습니다.
+
+    워커 인스턴스에 live 큐를 주면 카운터/단계 시간 증가분을 바로 큐에도 보냅니다. 부모는 apply_live() 로
+    작업별 임시 합계에 반영해 작업이 끝나기 전에도 snapshot() 이 움직이게 하고, 작업의 최종 결과를
+    merge() 할 때 그 작업의 임시 합계를 버리므로 두 번 세지 않습니다.
+    """
+    PHASES = ('chrome_startup', 'page_load', 'scroll', 'extract', 'download')
+    COUNTERS = ('links_found', 'links_duplicate', 'links_filtered',
+                'downloaded', 'failed', 'unreadable', 'bytes')
+
+    def __init__(self, live=None, task=None):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._sites = {}
+        self._hosts = {}
+        self._tasks_total = 0
+        self._tasks_done = 0
+        # 워커: 증가분을 보낼 큐와 이 인스턴스가 기록하는 작업 이름
+        self._live_queue = live
+        self._task = task
+        # 부모: 아직 merge() 되지 않은 작업별 실시간 합계 (작업 이름 -> 사이트별 단계/카운터)
+        self._live = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_live_queue'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _site(self, site, sites=None):
+        sites = self._sites if sites is None else sites
+        if site not in sites:
+            sites[site] = {
+                'phases': {phase: 0.0 for phase in self.PHASES},
+                'counters': {counter: 0 for counter in self.COUNTERS},
+            }
+        return sites[site]
+
+    def _send(self, kind, site, name, value):
+        if self._live_queue is not None:
+            try:
+                self._live_queue.put((self._task, kind, site, name, value))
+            except Exception:
+                # 실시간 표시용이므로 전달에 실패해도 최종 통계(to_dict)에는 영향이 없습니다.
+                self._live_queue = None
+
+    def add_time(self, site, name, seconds):
+        with self._lock:
+            phases = self._site(site)['phases']
+            phases[name] = phases.get(name, 0.0) + seconds
+        self._send('phases', site, name, seconds)
+
+    @contextmanager
+    def phase(self, site, name):
+        """
+        with 블록의 소요 시간을 사이트의 단계 시간에 더합니다.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(site, name, time.perf_counter() - start)
+
+    def clock(self, site):
+        """
+        연속된 단계를 lap(name) 호출로 구분해 기록하는 스톱워치를 반환합니다.
+        """
+        return PhaseClock(self, site)
+
+    def add(self, site, counter, value=1):
+        with self._lock:
+            counters = self._site(site)['counters']
+            counters[counter] = counters.get(counter, 0) + value
+        self._send('counters', site, counter, value)
+
+    def observe_latency(self, link, seconds):
+        """
+        링크의 호스트별 응답 지연 시간(초)을 기록합니다. base64 링크는 'data' 호스트로 묶습니다.
+        """
+        link = str(link)
+        host = 'data' if link.startswith('data:') else (urlparse(link).hostname or 'unknown')
+        with self._lock:
+            self._hosts.setdefault(host, []).append(seconds)
+
+    def set_tasks_total(self, total):
+        with self._lock:
+            self._tasks_total = total
+
+    def to_dict(self):
+        """
+        merge() 에 넘길 수 있는 원시 데이터를 반환합니다.
+        """
+        with self._lock:
+            return {
+                'task': self._task,
+                'sites': {site: {'phases': dict(data['phases']), 'counters': dict(data['counters'])}
+                          for site, data in self._sites.items()},
+                'hosts': {host: list(values) for host, values in self._hosts.items()},
+            }
+
+    def apply_live(self, event):
+        """
+        워커가 live 큐로 보낸 증가분 하나를 해당 작업의 실시간 합계에 더합니다.
+        """
+        task, kind, site, name, value = event
+        with self._lock:
+            values = self._site(site, self._live.setdefault(task, {}))[kind]
+            values[name] = values.get(name, 0) + value
+
+    def merge(self, data):
+        """
+        다른 인스턴스의 to_dict() 결과를 합산하고 완료된 작업 수를 1 증가시킵니다.
+        그 작업의 실시간 합계는 최종 결과로 대체되므로 버립니다.
+        """
+        if not data:
+            return
+        with self._lock:
+            self._live.pop(data.get('task'), None)
+            for site, site_data in data.get('sites', {}).items():
+                target = self._site(site)
+                for name, value in site_data.get('phases', {}).items():
+                    target['phases'][name] = target['phases'].get(name, 0.0) + value
+                for name, value in site_data.get('counters', {}).items():
+                    target['counters'][name] = target['counters'].get(name, 0) + value
+            for host, values in data.get('hosts', {}).items():
+                self._hosts.setdefault(host, []).extend(values)
+            self._tasks_done += 1
+
+    @staticmethod
+    def _derived(phases, counters):
+        rejected = (counters.get('links_duplicate', 0) + counters.get('links_filtered', 0)
+                    + counters.get('failed', 0) + counters.get('unreadable', 0))
+        download_time = phases.get('download', 0.0)
+        found = counters.get('links_found', 0)
+        return {
+            'rejected': rejected,
+            'yield': counters.get('downloaded', 0) / found if found else 0.0,
+            'bytes_per_sec': counters.get('bytes', 0) / download_time if download_time > 0 else 0.0,
+        }
+
+    def snapshot(self):
+        """
+        GUI 폴링용 실시간 합계를 반환합니다.
+
+        Returns:
+            dict: 완료/전체 작업 수, 경과 시간, 전체 카운터 합계, 다운로드 속도
+        """
+        with self._lock:
+            totals = {counter: 0 for counter in self.COUNTERS}
+            phases = {phase: 0.0 for phase in self.PHASES}
+            in_progress = [data for sites in self._live.values() for data in sites.values()]
+            for data in list(self._sites.values()) + in_progress:
+                for name, value in data['counters'].items():
+                    totals[name] = totals.get(name, 0) + value
+                for name, value in data['phases'].items():
+                    phases[name] = phases.get(name, 0.0) + value
+            snapshot = {
+                'tasks_done': self._tasks_done,
+                'tasks_total': self._tasks_total,
+                'elapsed': time.time() - self._started,
+            }
+        snapshot.update(totals)
+        snapshot.update(self._derived(phases, totals))
+        return snapshot
+
+    def summary(self):
+        """
+        사이트별 단계 시간/카운터/수율과 호스트별 지연 시간 백분위수를 포함한 요약을 반환합니다.
+        """
+        with self._lock:
+            sites = {}
+            for site, data in self._sites.items():
+                sites[site] = {
+                    'phases': dict(data['phases']),
+                    'counters': dict(data['counters']),
+                }
+                sites[site].update(self._derived(data['phases'], data['counters']))
+
+            hosts = {}
+            for host, values in self._hosts.items():
+                ordered = sorted(values)
+                hosts[host] = {
+                    'count': len(ordered),
+                    'p50': _percentile(ordered, 50),
+                    'p90': _percentile(ordered, 90),
+                    'p99': _percentile(ordered, 99),
+                    'max': ordered[-1] if ordered else 0.0,
+                }
+            tasks_done, tasks_total = self._tasks_done, self._tasks_total
+
+        return {
+            'elapsed': time.time() - self._started,
+            'tasks_done': tasks_done,
+            'tasks_total': tasks_total,
+            'totals': {key: value for key, value in self.snapshot().items()
+                       if key not in ('tasks_done', 'tasks_total', 'elapsed')},
+            'sites': sites,
+            'hosts': hosts,
+        }
+
+    def save_json(self, file_path):
+        """
+        summary() 결과를 JSON 파일로 저장합니다.
+        """
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
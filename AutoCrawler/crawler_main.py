@@ -17,14 +17,17 @@ Copyright 2018 YoongiKim
 import os
 import requests
 import shutil
-from multiprocessing import Pool
+from multiprocessing import Manager, Pool, TimeoutError
+import queue
 import signal
 import argparse
 from AutoCrawler.collect_links import CollectLinks
+from AutoCrawler.crawl_metrics import CrawlMetrics
 import imghdr
 import base64
 from pathlib import Path
 import random
+import time
 
 
 class Sites:
@@ -58,7 +61,8 @@ class Sites:
 
 class AutoCrawler:
     def __init__(self, skip_already_exist=True, n_threads=4, do_google=True, do_naver=True, do_artstation=False, download_path='download',
-                 full_resolution=False, face=False, no_gui=False, limit=0, proxy_list=None, filter_stock=False):
+                 full_resolution=False, face=False, no_gui=False, limit=0, proxy_list=None, filter_stock=False,
+                 search_urls=None, profile_dir=None):
         """
         :param skip_already_exist: Skips keyword already downloaded before. This is needed when re-downloading.
         :param n_threads: Number of threads to download.
@@ -72,6 +76,8 @@ class AutoCrawler:
         :param limit: Maximum count of images to download. (0: infinite)
         :param proxy_list: The proxy list. Every thread will randomly choose one from the list.
         :param filter_stock: Filter out stock photo websites (boolean)
+        :param search_urls: Override CollectLinks.SEARCH_URLS (e.g. local mock site for benchmarks)
+        :param profile_dir: Profile every pool task with cProfile and dump the stats here (merged by RunProfiler)
         """
 
         self.skip = skip_already_exist
@@ -86,6 +92,12 @@ class AutoCrawler:
         self.limit = limit
         self.proxy_list = proxy_list if proxy_list and len(proxy_list) > 0 else None
         self.filter_stock = filter_stock
+        self.search_urls = search_urls
+        self.profile_dir = profile_dir
+        # 부모 프로세스에서 합산되는 통계. GUI 는 metrics.snapshot() 을 폴링합니다.
+        self.metrics = CrawlMetrics()
+        # 크롤링 중 워커가 카운터 증가분을 보내는 큐 (do_crawling 동안만 설정)
+        self.live_queue = None
 
         os.makedirs(self.download_path, exist_ok=True)
 
@@ -170,7 +182,10 @@ class AutoCrawler:
         data = base64.decodebytes(bytes(encoded, encoding='utf-8'))
         return data
 
-    def download_images(self, keyword, links, site_name, max_count=0):
+    def download_images(self, keyword, links, site_name, max_count=0, metrics=None):
+        metrics = metrics if metrics is not None else CrawlMetrics()
+        # 링크마다 다운로드 시간을 나눠 기록해 진행 중에도 속도(bytes/s)가 보이게 합니다.
+        clock = metrics.clock(site_name)
         dir_path = Path(self.download_path) / keyword.replace('"', '')
         self.make_dir(str(dir_path))
         total = len(links)
@@ -195,7 +210,9 @@ class AutoCrawler:
                     ext = 'png'
                     is_base64 = True
                 else:
+                    request_start = time.perf_counter()
                     response = requests.get(link, stream=True, timeout=10)
+                    metrics.observe_latency(link, time.perf_counter() - request_start)
                     ext = self.get_extension_from_link(link)
                     is_base64 = False
 
@@ -212,7 +229,10 @@ class AutoCrawler:
                     print('Unreadable file - {}'.format(link))
                     os.remove(path)
                     success_count -= 1
+                    metrics.add(site_name, 'unreadable')
                 else:
+                    metrics.add(site_name, 'downloaded')
+                    metrics.add(site_name, 'bytes', os.path.getsize(path))
                     if ext != ext2:
                         path2 = no_ext_path + '.' + ext2
                         os.rename(path, path2)
@@ -223,20 +243,32 @@ class AutoCrawler:
                         
             except Exception as e:
                 print('Download failed - ', e)
+                metrics.add(site_name, 'failed')
                 continue
 
+            finally:
+                clock.lap('download')
+
+        clock.lap('download')
+
     def download_from_site(self, keyword, site_code):
+        """
+        :return: 이 작업에서 수집한 CrawlMetrics.to_dict() 결과 (부모 프로세스에서 합산)
+        """
         site_name = Sites.get_text(site_code)
         add_url = Sites.get_face_url(site_code) if self.face else ""
+        metrics = CrawlMetrics(live=self.live_queue, task='{}|{}'.format(keyword, site_name))
 
         try:
             proxy = None
             if self.proxy_list:
                 proxy = random.choice(self.proxy_list)
-            collect = CollectLinks(no_gui=self.no_gui, proxy=proxy, filter_stock=self.filter_stock)
+            with metrics.phase(site_name, 'chrome_startup'):
+                collect = CollectLinks(no_gui=self.no_gui, proxy=proxy, filter_stock=self.filter_stock,
+                                       metrics=metrics, search_urls=self.search_urls)
         except Exception as e:
             print('Error occurred while initializing chromedriver - {}'.format(e))
-            return
+            return metrics.to_dict()
 
         try:
             print('Collecting links... {} from {}'.format(keyword, site_name))
@@ -256,17 +288,21 @@ class AutoCrawler:
                 links = []
 
             print('Downloading images from collected links... {} from {}'.format(keyword, site_name))
-            self.download_images(keyword, links, site_name, max_count=self.limit)
+            self.download_images(keyword, links, site_name, max_count=self.limit, metrics=metrics)
             Path('{}/{}/{}_done'.format(self.download_path, keyword.replace('"', ''), site_name)).touch()
 
             print('Done {} : {}'.format(site_name, keyword))
 
         except Exception as e:
             print('Exception {}:{} - {}'.format(site_name, keyword, e))
-            return
+
+        return metrics.to_dict()
 
     def download(self, args):
-        self.download_from_site(keyword=args[0], site_code=args[1])
+        if self.profile_dir:
+            from run_profiler import profile_in_process
+            return profile_in_process(self.download_from_site, self.profile_dir, keyword=args[0], site_code=args[1])
+        return self.download_from_site(keyword=args[0], site_code=args[1])
 
     def init_worker(self):
         signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -301,21 +337,66 @@ class AutoCrawler:
             if self.do_artstation and not artstation_done:
                 tasks.append([keyword, Sites.ARTSTATION])
 
+        self.metrics.set_tasks_total(len(tasks))
+
+        # 워커가 작업 도중의 카운터 증가분을 보내는 큐. 작업 결과를 기다리는 사이사이 비워서 실시간 카운터에 반영합니다.
+        manager = Manager()
+        self.live_queue = manager.Queue()
         try:
             pool = Pool(self.n_threads, initializer=self.init_worker)
-            pool.map(self.download, tasks)
+            results = pool.imap_unordered(self.download, tasks)
+            while True:
+                try:
+                    task_metrics = results.next(timeout=0.5)
+                except TimeoutError:
+                    self.drain_live_metrics()
+                    continue
+                except StopIteration:
+                    break
+                # 작업이 보낸 증가분을 모두 반영한 뒤 최종 결과로 대체 (JSON 요약은 merge 결과 기준)
+                self.drain_live_metrics()
+                self.metrics.merge(task_metrics)
         except KeyboardInterrupt:
             pool.terminate()
             pool.join()
         else:
             pool.terminate()
             pool.join()
+        finally:
+            self.live_queue = None
+            manager.shutdown()
         print('Task ended. Pool join.')
 
+        self.print_metrics()
+
         self.imbalance_check()
 
         print('End Program')
 
+    def drain_live_metrics(self):
+        while True:
+            try:
+                self.metrics.apply_live(self.live_queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def print_metrics(self):
+        stats_path = self.metrics.save_json(Path(self.download_path) / 'crawl_stats.json')
+        summary = self.metrics.summary()
+
+        print('Crawl statistics ({:.1f}s, {}/{} tasks)'.format(summary['elapsed'], summary['tasks_done'],
+                                                             summary['tasks_total']))
+        for site, data in summary['sites'].items():
+            counters, phases = data['counters'], data['phases']
+            print('site: {}, found: {}, downloaded: {}, rejected: {}, yield: {:.1%}, {:.1f} KB/s'.format(
+                site, counters['links_found'], counters['downloaded'], data['rejected'], data['yield'],
+                data['bytes_per_sec'] / 1024))
+            print('    ' + ', '.join('{}: {:.1f}s'.format(name, seconds) for name, seconds in phases.items()))
+        for host, latency in sorted(summary['hosts'].items(), key=lambda item: -item[1]['p90']):
+            print('host: {}, n: {}, p50: {:.3f}s, p90: {:.3f}s, p99: {:.3f}s'.format(
+                host, latency['count'], latency['p50'], latency['p90'], latency['p99']))
+        print('Statistics saved - {}'.format(stats_path))
+
     def imbalance_check(self):
         print('Data imbalance checking...')
 
@@ -0,0 +1,169 @@
+# archive_source.py
+
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, Iterable, List, NamedTuple, Optional
+import io
+import tarfile
+import threading
+import time
+import zipfile
+
+# 입력 경로로 받을 수 있는 아카이브 확장자 (압축된 tar 는 임의 위치 읽기가 안 되므로 제외)
+ARCHIVE_EXTENSIONS = ('.zip', '.tar')
+
+
+class MemberStat(NamedTuple):
+    st_size: int
+    st_mtime: float
+
+
+class ArchiveMember:
+    """
+    아카이브 안의 파일 하나입니다. 처리 코드가 쓰는 Path 의 일부(name, stem, suffix, open('rb'),
+    read_bytes(), stat())만 흉내 내므로 디스크에 풀지 않고 그대로 입력으로 쓸 수 있습니다.
+    """
+
+    def __init__(self, archive: 'ArchiveSource', member_name: str, size: int, mtime: float):
+        self.archive = archive
+        self.member_name = member_name
+        self._path = PurePosixPath(member_name)
+        self._size = size
+        self._mtime = mtime
+
+    @property
+    def name(self) -> str:
+        return self._path.name
+
+    @property
+    def stem(self) -> str:
+        return self._path.stem
+
+    @property
+    def suffix(self) -> str:
+        return self._path.suffix
+
+    def open(self, mode: str = 'rb') -> BinaryIO:
+        if mode != 'rb':
+            raise ValueError(f"아카이브 멤버는 'rb' 로만 열 수 있습니다: {mode}")
+        return self.archive.open_member(self.member_name)
+
+    def read_bytes(self) -> bytes:
+        with self.open('rb') as f:
+            return f.read()
+
+    def stat(self) -> MemberStat:
+        return MemberStat(self._size, self._mtime)
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, ArchiveMember) and other.archive is self.archive
+                and other.member_name == self.member_name)
+
+    def __hash__(self) -> int:
+        return hash((id(self.archive), self.member_name))
+
+    def __lt__(self, other: 'ArchiveMember') -> bool:
+        return self.member_name < other.member_name
+
+    def __str__(self) -> str:
+        return f"{self.archive.path}!/{self.member_name}"
+
+    def __repr__(self) -> str:
+        return f"ArchiveMember({str(self)!r})"
+
+
+class ArchiveSource:
+    """
+    zip/tar 아카이브를 풀지 않고 입력으로 사용합니다.
+
+    - 멤버 목록은 zip 의 중앙 디렉토리(또는 tar 헤더)에서 한 번만 읽습니다.
+    - zip 멤버는 스레드마다 따로 연 ZipFile 핸들로 읽으므로, 여러 작업자가 하나의 파일 위치를 두고
+      잠금을 기다리지 않고 병렬로 압축을 풀 수 있습니다.
+    - tar 멤버는 헤더의 데이터 오프셋으로 바로 읽습니다. (스레드마다 따로 연 파일 핸들 사용)
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.kind = archive_kind(path)
+        if self.kind is None:
+            raise ValueError(f"지원하지 않는 아카이브 형식입니다: {path}")
+        self._local = threading.local()
+        self._handles: List = []
+        self._lock = threading.Lock()
+        # tar 멤버 이름 -> (데이터 오프셋, 크기)
+        self._offsets: Dict[str, tuple] = {}
+        self._members: List[ArchiveMember] = []
+
+        if self.kind == 'zip':
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir():
+                        mtime = _zip_mtime(info)
+                        self._members.append(ArchiveMember(self, info.filename, info.file_size, mtime))
+        else:
+            with tarfile.open(path, 'r:') as tf:
+                for info in tf:
+                    if info.isfile():
+                        self._offsets[info.name] = (info.offset_data, info.size)
+                        self._members.append(ArchiveMember(self, info.name, info.size, info.mtime))
+
+    def members(self) -> List[ArchiveMember]:
+        return list(self._members)
+
+    def find_images(self, extensions: Iterable[str]) -> List[ArchiveMember]:
+        """
+        확장자가 맞는 멤버를 아카이브 안의 경로순으로 반환합니다. (대소문자 구분 없음)
+        """
+        extensions = {ext.lower() for ext in extensions}
+        return sorted(member for member in self._members if member.suffix.lower() in extensions)
+
+    def _handle(self):
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = zipfile.ZipFile(self.path) if self.kind == 'zip' else open(self.path, 'rb')
+            self._local.handle = handle
+            with self._lock:
+                self._handles.append(handle)
+        return handle
+
+    def open_member(self, member_name: str) -> BinaryIO:
+        """
+        멤버를 읽기 전용 스트림으로 엽니다. 디스크에 임시 파일을 만들지 않습니다.
+        """
+        handle = self._handle()
+        if self.kind == 'zip':
+            return handle.open(member_name)
+        offset, size = self._offsets[member_name]
+        handle.seek(offset)
+        return io.BytesIO(handle.read(size))
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
+        self._local = threading.local()
+
+
+def archive_kind(path: Path) -> Optional[str]:
+    """
+    입력 경로가 지원하는 아카이브 파일이면 'zip' 또는 'tar' 를, 아니면 None 을 반환합니다.
+    """
+    suffix = path.suffix.lower()
+    if suffix not in ARCHIVE_EXTENSIONS or not path.is_file():
+        return None
+    if suffix == '.zip' and zipfile.is_zipfile(path):
+        return 'zip'
+    if suffix == '.tar' and tarfile.is_tarfile(path):
+        return 'tar'
+    return None
+
+
+def is_archive(path: Path) -> bool:
+    return archive_kind(path) is not None
+
+
+def _zip_mtime(info: zipfile.ZipInfo) -> float:
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
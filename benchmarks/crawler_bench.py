@@ -0,0 +1,161 @@
+# crawler_bench.py
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from AutoCrawler.crawl_metrics import CrawlMetrics
+from AutoCrawler.crawler_main import AutoCrawler
+from benchmarks.crawler_mock_site import MockSearchSite
+
+SITES = ('google', 'naver', 'artstation')
+
+
+class _BenchCrawler(AutoCrawler):
+    # imbalance_check 는 사용자 입력을 기다릴 수 있으므로 측정에서 제외합니다.
+    def imbalance_check(self):
+        pass
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def bench_download(mock_site: MockSearchSite, work_dir: Path, count: int, kind: str) -> Dict:
+    """
+    브라우저 없이 AutoCrawler.download_images 의 처리량을 측정합니다.
+    """
+    crawler = AutoCrawler(download_path=str(work_dir), n_threads=1)
+    metrics = CrawlMetrics()
+    links = mock_site.image_links(count, kind=kind)
+
+    start = time.perf_counter()
+    crawler.download_images('bench', links, 'mock', metrics=metrics)
+    elapsed = time.perf_counter() - start
+
+    stats = metrics.summary()
+    total_bytes = _dir_bytes(work_dir / 'bench')
+    return {
+        'kind': kind,
+        'links': len(links),
+        'seconds': elapsed,
+        'images_per_sec': stats['totals']['downloaded'] / elapsed if elapsed > 0 else 0.0,
+        'mb_per_sec': total_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0.0,
+        'metrics': stats,
+    }
+
+
+def bench_collect(mock_site: MockSearchSite, site: str, full_resolution: bool, limit: int) -> Dict:
+    """
+    크롬으로 모의 검색 페이지에서 링크를 수집하는 시간을 측정합니다.
+    """
+    from AutoCrawler.collect_links import CollectLinks
+
+    metrics = CrawlMetrics()
+    start = time.perf_counter()
+    with metrics.phase(site, 'chrome_startup'):
+        collect = CollectLinks(no_gui=True, metrics=metrics, search_urls=mock_site.search_urls())
+
+    if site == 'google':
+        links = collect.google_full('bench', limit=limit) if full_resolution else collect.google('bench')
+    elif site == 'naver':
+        links = collect.naver_full('bench') if full_resolution else collect.naver('bench')
+    else:
+        links = collect.artstation('bench', limit=limit)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'site': site,
+        'full_resolution': full_resolution,
+        'links': len(links),
+        'seconds': elapsed,
+        'links_per_sec': len(links) / elapsed if elapsed > 0 else 0.0,
+        'metrics': metrics.summary(),
+    }
+
+
+def bench_end_to_end(mock_site: MockSearchSite, work_dir: Path, sites: List[str], threads: int,
+                     full_resolution: bool, limit: int) -> Dict:
+    """
+    AutoCrawler.do_crawling 으로 키워드 하나를 끝까지 처리하는 시간을 측정합니다.
+    """
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        with open('keywords.txt', 'w', encoding='utf-8') as f:
+            f.write('bench\n')
+        crawler = _BenchCrawler(skip_already_exist=False, n_threads=threads, do_google='google' in sites,
+                                do_naver='naver' in sites, do_artstation='artstation' in sites,
+                                download_path=str(work_dir / 'download'), full_resolution=full_resolution,
+                                no_gui=True, limit=limit, search_urls=mock_site.search_urls())
+        start = time.perf_counter()
+        crawler.do_crawling()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+    return {
+        'sites': sites,
+        'threads': threads,
+        'full_resolution': full_resolution,
+        'seconds': elapsed,
+        'metrics': crawler.metrics.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='모의 검색 사이트를 이용한 오프라인 크롤러 벤치마크')
+    parser.add_argument('--images', type=int, default=200, help='검색 결과 이미지 수 (기본값: 200)')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='이미지 응답 지연 시간 (기본값: 50ms)')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='지연 시간 편차 (기본값: 20ms)')
+    parser.add_argument('--full-size', type=int, default=1024, help='원본 이미지 한 변 크기 (기본값: 1024)')
+    parser.add_argument('--sites', type=str, default='google,naver,artstation', help='측정할 사이트 목록')
+    parser.add_argument('--threads', type=int, default=4, help='end-to-end 측정 시 작업자 수')
+    parser.add_argument('--limit', type=int, default=0, help='사이트별 최대 다운로드 수 (0: 무제한)')
+    parser.add_argument('--full', action='store_true', help='고해상도(뷰어) 모드로 측정')
+    parser.add_argument('--skip-browser', action='store_true',
+                        help='크롬이 필요한 링크 수집/end-to-end 측정을 건너뜀')
+    parser.add_argument('--output', type=str, default='crawler_bench.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    sites = [site for site in args.sites.split(',') if site in SITES]
+    results = {'config': vars(args), 'download': [], 'collect': [], 'end_to_end': None}
+
+    with MockSearchSite(n_images=args.images, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        full_size=args.full_size) as mock_site:
+        work_root = Path(tempfile.mkdtemp(prefix='crawler_bench_'))
+        try:
+            for kind in ('thumb', 'full'):
+                work_dir = work_root / f'download_{kind}'
+                result = bench_download(mock_site, work_dir, args.images, kind)
+                results['download'].append(result)
+                print(f"다운로드 [{kind}]: {result['links']}개 {result['seconds']:.2f}s "
+                      f"({result['images_per_sec']:.1f} img/s, {result['mb_per_sec']:.2f} MB/s)")
+
+            if not args.skip_browser:
+                for site in sites:
+                    result = bench_collect(mock_site, site, args.full, args.limit or args.images)
+                    results['collect'].append(result)
+                    print(f"링크 수집 [{site}]: {result['links']}개 {result['seconds']:.2f}s "
+                          f"({result['links_per_sec']:.1f} links/s)")
+
+                e2e_dir = work_root / 'end_to_end'
+                e2e_dir.mkdir()
+                result = bench_end_to_end(mock_site, e2e_dir, sites, args.threads, args.full, args.limit)
+                results['end_to_end'] = result
+                print(f"키워드 완료 (end-to-end): {result['seconds']:.2f}s")
+        finally:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
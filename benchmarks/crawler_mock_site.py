@@ -0,0 +1,298 @@
+# crawler_mock_site.py
+
+import base64
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+# 사이트별 DOM 구조. CollectLinks 의 XPath 와 같은 속성을 사용합니다.
+_SITE_LAYOUTS = {
+    'google': {
+        'tile': '<div jsname="dTDiAc" data-index="{index}"><div jsname="qQjpJ"><img src="{src}"></div></div>',
+        'viewer': '<div jsname="figiqf"><img src="{src}"></div>',
+        'thumb_path': '/gstatic.com/thumb/{index}.jpg',
+    },
+    'naver': {
+        'tile': ('<div class="tile_item _fe_image_tab_content_tile" data-index="{index}">'
+                 '<img class="_fe_image_tab_content_thumbnail_image" src="{src}"></div>'),
+        'viewer': '<img class="_fe_image_viewer_image_fallback_target" src="{src}">',
+        'thumb_path': '/img/thumb/{index}.jpg',
+    },
+    'artstation': {
+        'tile': '<div data-index="{index}"><img class="image" src="{src}"></div>',
+        'viewer': '',
+        'thumb_path': '/artstation/smaller_square/{index}.jpg',
+    },
+}
+
+_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{site} mock - {keyword}</title>
+<style>
+body {{ margin: 0; }}
+#grid > div {{ display: inline-block; width: 180px; height: 180px; margin: 4px; cursor: pointer; }}
+#grid img {{ width: 100%; height: 100%; object-fit: cover; }}
+#viewer {{ position: fixed; right: 0; top: 0; width: 40%; height: 100%; background: #222; display: none; }}
+#viewer img {{ max-width: 100%; }}
+</style></head>
+<body>
+<div id="grid"></div>
+<div id="viewer"></div>
+<script>
+const TILES = {tiles};
+const VIEWER = {viewer};
+const FULL = {full};
+const PAGE_SIZE = {page_size};
+const LOAD_DELAY = {load_delay};
+const VIEWER_DELAY = {viewer_delay};
+const grid = document.getElementById('grid');
+const viewer = document.getElementById('viewer');
+let shown = 0;
+let loading = false;
+let current = -1;
+
+function appendPage() {{
+    const end = Math.min(shown + PAGE_SIZE, TILES.length);
+    for (; shown < end; shown++) {{
+        grid.insertAdjacentHTML('beforeend', TILES[shown]);
+        const index = shown;
+        grid.lastElementChild.addEventListener('click', () => openViewer(index));
+    }}
+    loading = false;
+}}
+
+function openViewer(index) {{
+    if (!VIEWER || index >= FULL.length) return;
+    current = index;
+    viewer.style.display = 'block';
+    viewer.innerHTML = VIEWER.replace('{{src}}', FULL[index].thumb);
+    setTimeout(() => {{
+        if (current === index) viewer.innerHTML = VIEWER.replace('{{src}}', FULL[index].full);
+    }}, VIEWER_DELAY);
+    const tile = grid.children[index];
+    if (tile) tile.scrollIntoView();
+    if (index >= shown - 2 && shown < TILES.length) appendPage();
+}}
+
+window.addEventListener('scroll', () => {{
+    if (loading || shown >= TILES.length) return;
+    if (window.innerHeight + window.pageYOffset >= document.body.offsetHeight - 200) {{
+        loading = true;
+        setTimeout(appendPage, LOAD_DELAY);
+    }}
+}});
+
+document.addEventListener('keydown', (event) => {{
+    if (event.key === 'ArrowRight' && current >= 0) openViewer(current + 1);
+}});
+
+appendPage();
+</script>
+</body></html>
+"""
+
+
+class MockSearchSite:
+    """
+    CollectLinks 와 AutoCrawler 를 네트워크 없이 측정하기 위한 로컬 모의 검색 사이트입니다.
+
+    Google/Naver/ArtStation 과 같은 XPath 구조의 검색 결과 페이지(스크롤 시 지연 로딩되는 썸네일,
+    뷰어 페이지, base64 썸네일)와 지연 시간을 설정할 수 있는 이미지 엔드포인트를 제공합니다.
+    """
+
+    def __init__(self, n_images: int = 200, latency_ms: float = 50.0, jitter_ms: float = 20.0,
+                 base64_ratio: float = 0.2, broken_ratio: float = 0.02, page_size: int = 40,
+                 load_delay_ms: int = 100, viewer_delay_ms: int = 50, full_size: int = 1024,
+                 thumb_size: int = 128, seed: int = 0, host: str = '127.0.0.1', port: int = 0):
+        self.n_images = n_images
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.base64_ratio = base64_ratio
+        self.broken_ratio = broken_ratio
+        self.page_size = page_size
+        self.load_delay_ms = load_delay_ms
+        self.viewer_delay_ms = viewer_delay_ms
+        self.full_size = full_size
+        self.thumb_size = thumb_size
+        self.seed = seed
+        self._host = host
+        self._port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._image_cache: Dict[tuple, bytes] = {}
+        self._cache_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests_served = 0
+
+    # --- 서버 수명 주기 ---
+
+    def start(self) -> 'MockSearchSite':
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                site._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self._host, self._port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search_urls(self) -> Dict[str, str]:
+        """
+        CollectLinks(search_urls=...) 에 넘길 검색 주소 템플릿을 반환합니다.
+        """
+        return {
+            'google': self.base_url + '/google/search?q={keyword}{add_url}',
+            'google_full': self.base_url + '/google/search?q={keyword}{add_url}',
+            'naver': self.base_url + '/naver/search?query={keyword}{add_url}',
+            'artstation': self.base_url + '/artstation/search?query={keyword}',
+        }
+
+    def image_links(self, count: Optional[int] = None, kind: str = 'full') -> List[str]:
+        """
+        브라우저 없이 다운로드 처리량을 측정할 때 사용할 이미지 링크 목록을 반환합니다.
+        """
+        count = self.n_images if count is None else count
+        links = []
+        for index in range(count):
+            if kind == 'thumb' and self._is_base64(index):
+                links.append(self._data_uri(index))
+            else:
+                links.append(f"{self.base_url}/img/{kind}/{index}.{self._ext(index)}")
+        return links
+
+    # --- 콘텐츠 생성 ---
+
+    def _is_base64(self, index: int) -> bool:
+        return index < int(self.n_images * self.base64_ratio)
+
+    def _is_broken(self, index: int) -> bool:
+        return self.broken_ratio > 0 and index % max(1, int(1 / self.broken_ratio)) == 1
+
+    @staticmethod
+    def _ext(index: int) -> str:
+        return 'png' if index % 5 == 0 else 'jpg'
+
+    def _image_bytes(self, index: int, size: int, ext: str) -> bytes:
+        # 색상 변형 16종을 캐시해 서버 CPU 가 측정을 왜곡하지 않도록 합니다.
+        key = (index % 16, size, ext)
+        with self._cache_lock:
+            if key not in self._image_cache:
+                hue = (index % 16) * 16
+                img = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+                img = Image.merge('RGB', (img.getchannel(0), img.getchannel(1).point(lambda v: (v + hue) % 256),
+                                          Image.new('L', (size, size), hue)))
+                buffer = io.BytesIO()
+                img.save(buffer, 'PNG' if ext == 'png' else 'JPEG', quality=85)
+                self._image_cache[key] = buffer.getvalue()
+            return self._image_cache[key]
+
+    def _data_uri(self, index: int) -> str:
+        data = base64.b64encode(self._image_bytes(index, self.thumb_size, 'jpg')).decode('ascii')
+        return 'data:image/jpeg;base64,' + data
+
+    def _page(self, site: str, keyword: str) -> str:
+        layout = _SITE_LAYOUTS[site]
+        tiles, full = [], []
+        for index in range(self.n_images):
+            if site != 'artstation' and self._is_base64(index):
+                thumb = self._data_uri(index)
+            else:
+                thumb = self.base_url + layout['thumb_path'].format(index=index)
+            tiles.append(layout['tile'].format(index=index, src=thumb))
+            full.append({
+                'thumb': self.base_url + layout['thumb_path'].format(index=index),
+                'full': f"{self.base_url}/img/full/{index}.{self._ext(index)}",
+            })
+        return _PAGE_TEMPLATE.format(
+            site=site, keyword=keyword, tiles=json.dumps(tiles), viewer=json.dumps(layout['viewer']),
+            full=json.dumps(full), page_size=self.page_size, load_delay=self.load_delay_ms,
+            viewer_delay=self.viewer_delay_ms)
+
+    # --- 요청 처리 ---
+
+    def _delay(self, query: Dict[str, List[str]]) -> None:
+        if 'delay' in query:
+            delay_ms = float(query['delay'][0])
+        else:
+            with self._rng_lock:
+                delay_ms = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        self.requests_served += 1
+        url = urlparse(handler.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+
+        if len(parts) == 2 and parts[1] == 'search' and parts[0] in _SITE_LAYOUTS:
+            keyword = (query.get('q') or query.get('query') or [''])[0]
+            self._send(handler, 200, 'text/html; charset=utf-8', self._page(parts[0], keyword).encode('utf-8'))
+            return
+
+        if len(parts) == 3 and parts[0] in ('img', 'gstatic.com', 'artstation'):
+            kind, name = parts[1], parts[2]
+            index = int(name.split('.')[0])
+            ext = name.split('.')[-1]
+            self._delay(query)
+            if kind in ('full', 'large') and self._is_broken(index):
+                self._send(handler, 200, 'text/html', b'<html>not an image</html>')
+                return
+            size = self.full_size if kind in ('full', 'large') else self.thumb_size
+            content_type = 'image/png' if ext == 'png' else 'image/jpeg'
+            self._send(handler, 200, content_type, self._image_bytes(index, size, ext))
+            return
+
+        self._send(handler, 404, 'text/plain', b'not found')
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, content_type: str, body: bytes) -> None:
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+if __name__ == '__main__':
+    with MockSearchSite() as mock_site:
+        print(f"모의 검색 사이트 실행 중: {mock_site.base_url} (Ctrl+C 로 종료)")
+        for name, url in mock_site.search_urls().items():
+            print(f"  {name}: {url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
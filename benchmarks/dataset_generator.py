@@ -0,0 +1,138 @@
+# dataset_generator.py
+
+import argparse
+import json
+import math
+import random
+import shutil
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+
+# (형식, 모드, 확장자, 가중치)
+IMAGE_KINDS = [
+    ('JPEG', 'RGB', '.jpg', 5),
+    ('JPEG', 'RGB', '.jpeg', 1),
+    ('PNG', 'RGB', '.png', 2),
+    ('PNG', 'RGBA', '.png', 3),
+    ('PNG', 'P', '.png', 1),
+    ('GIF', 'P', '.gif', 1),
+]
+
+MANIFEST_NAME = 'dataset.json'
+
+
+def _pick_side(rng: random.Random, min_side: int, max_side: int, large_ratio: float) -> int:
+    # 대부분은 작은 이미지, large_ratio 비율만 큰 이미지(한 변 4096 이상)로 만듭니다.
+    if max_side > 4096 and rng.random() < large_ratio:
+        return rng.randint(4096, max_side)
+    upper = min(max_side, 4096)
+    return int(math.exp(rng.uniform(math.log(min_side), math.log(upper))))
+
+
+def _make_image(rng: random.Random, mode: str, width: int, height: int) -> Image.Image:
+    # 작은 노이즈를 확대해 실제 사진처럼 압축이 적당히 되는 내용을 빠르게 만듭니다.
+    seed_w, seed_h = max(1, width // 32), max(1, height // 32)
+    channels = [Image.effect_noise((seed_w, seed_h), rng.uniform(32, 96)) for _ in range(3)]
+    base = Image.merge('RGB', channels).resize((width, height), Image.Resampling.BILINEAR)
+
+    if mode == 'RGBA':
+        # 가운데가 불투명하고 가장자리가 투명한 알파 (잘라낸 캐릭터/오브젝트 형태)
+        alpha = Image.radial_gradient('L').resize((width, height)).point(lambda v: 255 - v)
+        base.putalpha(alpha)
+        return base
+    if mode == 'P':
+        return base.quantize(colors=rng.choice([16, 64, 256]))
+    return base
+
+
+def generate_dataset(root: Path, count: int, seed: int = 0, min_side: int = 256, max_side: int = 12000,
+                     large_ratio: float = 0.02, duplicate_ratio: float = 0.05, max_depth: int = 3) -> List[Dict]:
+    """
+    재현 가능한 합성 이미지 데이터셋을 만듭니다. 같은 인자로 이미 생성된 데이터셋은 재사용합니다.
+
+    Args:
+        root (Path): 데이터셋 폴더
+        count (int): 이미지 수
+        seed (int): 난수 시드
+        min_side (int): 최소 한 변 크기
+        max_side (int): 최대 한 변 크기
+        large_ratio (float): 한 변이 4096 이상인 큰 이미지 비율
+        duplicate_ratio (float): 앞서 만든 파일과 내용이 같은 파일 비율 (중복 검사 측정용)
+        max_depth (int): 하위 폴더 최대 깊이
+
+    Returns:
+        List[Dict]: 생성된 파일 목록 (경로, 형식, 모드, 크기, 바이트)
+    """
+    config = {'count': count, 'seed': seed, 'min_side': min_side, 'max_side': max_side,
+              'large_ratio': large_ratio, 'duplicate_ratio': duplicate_ratio, 'max_depth': max_depth}
+    manifest_path = root / MANIFEST_NAME
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('config') == config and all((root / item['path']).exists() for item in manifest['files']):
+            return manifest['files']
+
+    rng = random.Random(seed)
+    weights = [kind[3] for kind in IMAGE_KINDS]
+    folders = ['']
+    files = []
+
+    for index in range(count):
+        # 일정 확률로 새 하위 폴더를 만들어 중첩 구조를 만듭니다.
+        if rng.random() < 0.1:
+            parent = rng.choice(folders)
+            if parent.count('/') < max_depth - 1:
+                folders.append(f"{parent}/set_{len(folders):03d}".lstrip('/'))
+        folder = rng.choice(folders)
+
+        if files and rng.random() < duplicate_ratio:
+            original = rng.choice(files)
+            relative = f"{folder}/dup_{index:05d}{Path(original['path']).suffix}".lstrip('/')
+            (root / relative).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(root / original['path'], root / relative)
+            files.append(dict(original, path=relative))
+            continue
+
+        format, mode, ext, _ = rng.choices(IMAGE_KINDS, weights=weights)[0]
+        side = _pick_side(rng, min_side, max_side, large_ratio)
+        aspect = rng.choice([1.0, 1.0, 4 / 3, 3 / 4, 16 / 9, 9 / 16, 2.0, 0.5])
+        width = max(min_side, int(side * min(1.0, aspect)))
+        height = max(min_side, int(side * min(1.0, 1 / aspect)))
+
+        relative = f"{folder}/img_{index:05d}{ext}".lstrip('/')
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        img = _make_image(rng, mode, width, height)
+        params = {'quality': rng.randint(80, 95)} if format == 'JPEG' else {}
+        img.save(path, format, **params)
+
+        files.append({'path': relative, 'format': format, 'mode': mode, 'width': width, 'height': height,
+                      'bytes': path.stat().st_size})
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'files': files}, f, ensure_ascii=False, indent=2)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='벤치마크용 합성 이미지 데이터셋 생성')
+    parser.add_argument('output_path', type=str, help='데이터셋 폴더 경로')
+    parser.add_argument('--count', type=int, default=100, help='이미지 수 (기본값: 100)')
+    parser.add_argument('--seed', type=int, default=0, help='난수 시드 (기본값: 0)')
+    parser.add_argument('--min-side', type=int, default=256, help='최소 한 변 크기 (기본값: 256)')
+    parser.add_argument('--max-side', type=int, default=12000, help='최대 한 변 크기 (기본값: 12000)')
+    parser.add_argument('--large-ratio', type=float, default=0.02, help='큰 이미지 비율 (기본값: 0.02)')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.05, help='중복 파일 비율 (기본값: 0.05)')
+    args = parser.parse_args()
+
+    files = generate_dataset(Path(args.output_path), args.count, args.seed, args.min_side,
+                             args.max_side, args.large_ratio, args.duplicate_ratio)
+    total_mb = sum(item['bytes'] for item in files) / 1024 / 1024
+    print(f"{len(files)}개 이미지 생성 완료 ({total_mb:.1f} MB): {args.output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# e2e_bench.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import PIL
+
+from benchmarks.dataset_generator import generate_dataset
+from process_manager import ProcessManager, ProcessingMode
+
+MODES = ('copy_only', 'copy_and_text', 'text_only', 'rename_only', 'check_duplicates')
+
+# 입력 폴더 대신 이미 복사된 출력 폴더에서 동작하는 모드
+OUTPUT_MODES = ('text_only', 'rename_only', 'check_duplicates')
+
+
+def _run_once(mode: str, input_path: Path, output_path: Path, workers: int, resize: Optional[int],
+              padding_color: str, save_as_png: bool) -> float:
+    manager = ProcessManager(
+        input_path=input_path,
+        output_path=output_path,
+        mode=ProcessingMode(mode),
+        max_workers=workers,
+        resize_size=resize,
+        padding_color=padding_color,
+        save_as_png=save_as_png,
+    )
+    # 파일마다 출력되는 진행 메시지가 측정값에 섞이지 않도록 버립니다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        manager.process_files()
+        return time.perf_counter() - start
+
+
+def bench_mode(mode: str, dataset: Path, images: int, prepared: Path, work_dir: Path, workers: int, repeat: int,
+               resize: Optional[int], padding_color: str, save_as_png: bool) -> Dict:
+    """
+    한 모드를 repeat 번 실행해 가장 빠른 시간과 처리량을 반환합니다.
+    출력 폴더에서 동작하는 모드는 매번 미리 복사해 둔 폴더(prepared)의 사본에서 실행합니다.
+    """
+    timings = []
+    for _ in range(repeat):
+        output_path = work_dir / f'{mode}_{workers}'
+        shutil.rmtree(output_path, ignore_errors=True)
+        if mode in OUTPUT_MODES:
+            shutil.copytree(prepared, output_path)
+        timings.append(_run_once(mode, dataset, output_path, workers, resize, padding_color, save_as_png))
+        shutil.rmtree(output_path, ignore_errors=True)
+
+    best = min(timings)
+    return {
+        'mode': mode,
+        'images': images,
+        'workers': workers,
+        'seconds': best,
+        'runs': timings,
+        'images_per_sec': images / best if best > 0 else 0.0,
+    }
+
+
+def _result_key(result: Dict) -> str:
+    return f"{result['mode']}/{result['images']}/{result['workers']}"
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    기준 결과와 비교해 threshold 비율 이상 느려진 항목을 반환합니다.
+    """
+    baseline_results = {_result_key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        reference = baseline_results.get(_result_key(result))
+        if reference is None or reference['seconds'] <= 0:
+            continue
+        change = result['seconds'] / reference['seconds'] - 1.0
+        result['baseline_seconds'] = reference['seconds']
+        result['change'] = change
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def _environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터셋을 이용한 전처리 end-to-end 벤치마크')
+    parser.add_argument('--dataset-dir', type=str, default='',
+                        help='데이터셋 캐시 폴더 (기본값: 임시 폴더, 실행 후 삭제)')
+    parser.add_argument('--sizes', type=str, default='50,200', help='데이터셋 이미지 수 목록 (기본값: 50,200)')
+    parser.add_argument('--workers', type=str, default='1,4,8', help='작업자 수 목록 (기본값: 1,4,8)')
+    parser.add_argument('--modes', type=str, default=','.join(MODES), help='측정할 모드 목록')
+    parser.add_argument('--max-side', type=int, default=12000, help='최대 한 변 크기 (기본값: 12000)')
+    parser.add_argument('--resize', type=int, default=None, help='리사이즈 크기 (기본값: 리사이즈 안 함)')
+    parser.add_argument('--padding-color', type=str, choices=['white', 'black', 'transparent'],
+                        default='black', help='패딩 색상 (기본값: black)')
+    parser.add_argument('--save-as-png', action='store_true', help='리사이즈된 이미지를 PNG로 저장')
+    parser.add_argument('--repeat', type=int, default=3, help='항목별 반복 횟수, 최솟값을 사용 (기본값: 3)')
+    parser.add_argument('--baseline', type=str, default='', help='비교할 기준 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='회귀로 판단할 느려짐 비율 (기본값: 0.10)')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과를 --baseline 경로에 저장')
+    parser.add_argument('--output', type=str, default='e2e_bench.json', help='결과 JSON 경로')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    worker_counts = [int(workers) for workers in args.workers.split(',') if workers]
+    modes = [mode for mode in args.modes.split(',') if mode in MODES]
+
+    temp_root = Path(tempfile.mkdtemp(prefix='e2e_bench_'))
+    dataset_root = Path(args.dataset_dir) if args.dataset_dir else temp_root / 'datasets'
+    results = []
+
+    try:
+        for size in sizes:
+            dataset = dataset_root / f'dataset_{size}'
+            print(f"데이터셋 준비: {size}개 ({dataset})")
+            files = generate_dataset(dataset, size, max_side=args.max_side)
+
+            prepared = temp_root / f'prepared_{size}'
+            if any(mode in OUTPUT_MODES for mode in modes):
+                _run_once('copy_only', dataset, prepared, max(worker_counts), args.resize,
+                          args.padding_color, args.save_as_png)
+
+            for mode in modes:
+                for workers in worker_counts:
+                    result = bench_mode(mode, dataset, len(files), prepared, temp_root, workers, args.repeat,
+                                        args.resize, args.padding_color, args.save_as_png)
+                    results.append(result)
+                    print(f"{mode:<18} 이미지 {result['images']:>6}개  작업자 {workers:>2}  "
+                          f"{result['seconds']:>8.2f}s  ({result['images_per_sec']:.1f} img/s)")
+            shutil.rmtree(prepared, ignore_errors=True)
+    finally:
+        shutil.rmtree(temp_root, ignore_errors=True)
+
+    report = {'config': vars(args), 'environment': _environment(), 'results': results}
+
+    regressions = []
+    if args.baseline and not args.save_baseline and Path(args.baseline).exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        report['regressions'] = [_result_key(result) for result in regressions]
+        print(f"\n기준 결과 비교 ({args.baseline}):")
+        for result in results:
+            if 'change' in result:
+                marker = '  <- 회귀' if result in regressions else ''
+                print(f"  {_result_key(result):<32} {result['baseline_seconds']:>8.2f}s -> "
+                      f"{result['seconds']:>8.2f}s ({result['change'] * 100:+.1f}%){marker}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"기준 결과 저장: {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)}개 항목이 기준보다 {args.threshold * 100:.0f}% 이상 느려졌습니다.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
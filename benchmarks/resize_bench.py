@@ -0,0 +1,237 @@
+# resize_bench.py
+
+import argparse
+import importlib.util
+import itertools
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 측정 대상 구현: 메인 전처리기와 ComfyUI 노드용 사본
+IMPLEMENTATIONS = {
+    'main': ROOT / 'image_processor.py',
+    'node': ROOT / 'nodes' / 'utils' / 'image_processor.py',
+}
+
+# (형식, 모드, 확장자)
+SOURCE_KINDS = [
+    ('JPEG', 'RGB', '.jpg'),
+    ('PNG', 'RGB', '.png'),
+    ('PNG', 'RGBA', '.png'),
+    ('PNG', 'LA', '.png'),
+    ('PNG', 'P', '.png'),
+    ('GIF', 'P', '.gif'),
+]
+
+ASPECTS = {'square': 1.0, 'landscape': 16 / 9, 'portrait': 9 / 16}
+
+
+def _load_processor_class(implementation: str):
+    # nodes 패키지는 ComfyUI 모듈(folder_paths)을 import 하므로 파일을 직접 불러옵니다.
+    path = IMPLEMENTATIONS[implementation]
+    if implementation == 'main':
+        sys.path.insert(0, str(ROOT))
+    spec = importlib.util.spec_from_file_location(f'bench_image_processor_{implementation}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ImageProcessor
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 바이트 단위입니다.
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def make_source(source_dir: Path, format: str, mode: str, ext: str, aspect: str, long_side: int) -> Path:
+    """
+    측정용 원본 이미지를 만듭니다. 같은 조건의 파일이 있으면 재사용합니다.
+    """
+    ratio = ASPECTS[aspect]
+    width = long_side if ratio >= 1 else int(long_side * ratio)
+    height = int(long_side / ratio) if ratio >= 1 else long_side
+    path = source_dir / f"{format.lower()}_{mode}_{aspect}_{long_side}{ext}"
+    if path.exists():
+        return path
+
+    channels = [Image.effect_noise((max(1, width // 32), max(1, height // 32)), 64) for _ in range(3)]
+    img = Image.merge('RGB', channels).resize((width, height), Image.Resampling.BILINEAR)
+    if mode in ('RGBA', 'LA'):
+        alpha = Image.radial_gradient('L').resize((width, height)).point(lambda v: 255 - v)
+        img = img.convert('L') if mode == 'LA' else img
+        img.putalpha(alpha)
+    elif mode == 'P':
+        img = img.quantize(colors=64)
+    img.save(path, format, **({'quality': 90} if format == 'JPEG' else {}))
+    return path
+
+
+def run_case(case: Dict) -> Dict:
+    """
+    현재 프로세스에서 측정 항목 하나를 실행합니다. 최대 RSS 가 항목별로 분리되도록 하위 프로세스에서 호출됩니다.
+    """
+    processor_class = _load_processor_class(case['implementation'])
+    rss_before = _peak_rss_mb()
+    processor = processor_class(case['target'] or None, case['padding_color'], case['save_as_png'])
+
+    source = Path(case['source'])
+    output_dir = Path(case['output_dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 첫 실행은 코덱 초기화 등이 섞이므로 버립니다.
+    processor.process_image(source, output_dir / f"warmup{source.suffix}")
+    timings = []
+    for index in range(case['iterations']):
+        start = time.perf_counter()
+        processor.process_image(source, output_dir / f"out_{index}{source.suffix}")
+        timings.append(time.perf_counter() - start)
+
+    outputs = sorted(output_dir.glob('out_*'))
+    return {
+        'ms_per_image': sum(timings) / len(timings) * 1000,
+        'ms_min': min(timings) * 1000,
+        'peak_rss_mb': _peak_rss_mb(),
+        'baseline_rss_mb': rss_before,
+        'output_bytes': outputs[0].stat().st_size if outputs else 0,
+    }
+
+
+def check_reduced_decode(source_dir: Path, target: int = 256) -> List[str]:
+    """
+    축소 디코드 기준을 넘는 가로/세로로 긴 원본이 실제로 긴 변 기준으로 줄여져 디코드되는지 확인합니다.
+
+    Returns:
+        List[str]: 실패한 항목 설명 (비어 있으면 통과)
+    """
+    sys.path.insert(0, str(ROOT))
+    import image_processor as module
+    from stage_timer import StageTimer
+
+    failures = []
+    floor = target * module.REDUCING_GAP
+    for format, ext in (('JPEG', '.jpg'), ('PNG', '.png')):
+        for width, height in ((24000, 400), (400, 24000)):
+            path = source_dir / f"panorama_{width}x{height}{ext}"
+            Image.new('RGB', (width, height), (90, 120, 150)).save(path, format)
+            with Image.open(path) as img:
+                reduced = module.decode_reduced(img, target)
+                if not floor <= max(reduced.size) < max(width, height):
+                    failures.append(f"{path.name}: decode_reduced -> {reduced.size}")
+
+            # 기준(max_pixels)을 넘으면 process_image 가 축소 디코드 경로를 타야 합니다.
+            stats = StageTimer(enabled=True)
+            processor = module.ImageProcessor(target, stats=stats, max_pixels=width * height - 1)
+            processor.process_image(path, source_dir / f"out_{path.name}")
+            if not stats.report()['counters'].get('reduced'):
+                failures.append(f"{path.name}: 축소 디코드 경로를 사용하지 않음")
+    return failures
+
+
+def _run_in_subprocess(case: Dict) -> Dict:
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.resize_bench', '--run-case', json.dumps(case)],
+        cwd=str(ROOT), capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _split(value: str) -> List[str]:
+    return [item for item in value.split(',') if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ImageProcessor 리사이즈/인코딩 경로 마이크로 벤치마크')
+    parser.add_argument('--implementations', type=str, default='main,node', help='측정할 구현 (main,node)')
+    parser.add_argument('--kinds', type=str, default='',
+                        help='원본 형식/모드 목록 (예: JPEG/RGB,PNG/RGBA, 기본값: 전체)')
+    parser.add_argument('--aspects', type=str, default='square,landscape,portrait', help='원본 비율 목록')
+    parser.add_argument('--targets', type=str, default='512,1024',
+                        help='리사이즈 크기 목록 (0: 리사이즈 없이 복사/PNG 변환)')
+    parser.add_argument('--paddings', type=str, default='black,white,transparent', help='패딩 색상 목록')
+    parser.add_argument('--png', type=str, default='false,true', help='save_as_png 값 목록')
+    parser.add_argument('--source-side', type=int, default=3000, help='원본 긴 변 크기 (기본값: 3000)')
+    parser.add_argument('--iterations', type=int, default=5, help='항목별 반복 횟수 (기본값: 5)')
+    parser.add_argument('--output', type=str, default='resize_bench.json', help='결과 JSON 경로')
+    parser.add_argument('--check-reduced', action='store_true',
+                        help='측정 대신 긴 원본의 축소 디코드가 긴 변 기준으로 동작하는지만 확인')
+    parser.add_argument('--run-case', type=str, default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check_reduced:
+        with tempfile.TemporaryDirectory(prefix='resize_bench_') as work_dir:
+            failures = check_reduced_decode(Path(work_dir))
+        for failure in failures:
+            print(f"실패: {failure}")
+        print("축소 디코드 확인: " + ("실패" if failures else "통과"))
+        sys.exit(1 if failures else 0)
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return
+
+    kinds = [kind for kind in SOURCE_KINDS
+             if not args.kinds or f"{kind[0]}/{kind[1]}" in _split(args.kinds)]
+    png_values = [value.lower() == 'true' for value in _split(args.png)]
+
+    work_root = Path(tempfile.mkdtemp(prefix='resize_bench_'))
+    source_dir = work_root / 'sources'
+    source_dir.mkdir()
+    results = []
+
+    try:
+        matrix = itertools.product(_split(args.implementations), kinds, _split(args.aspects),
+                                   [int(target) for target in _split(args.targets)],
+                                   _split(args.paddings), png_values)
+        for implementation, (format, mode, ext), aspect, target, padding, save_as_png in matrix:
+            case = {
+                'implementation': implementation,
+                'format': format,
+                'mode': mode,
+                'aspect': aspect,
+                'target': target,
+                'padding_color': padding,
+                'save_as_png': save_as_png,
+                'iterations': args.iterations,
+                'source': str(make_source(source_dir, format, mode, ext, aspect, args.source_side)),
+                'output_dir': str(work_root / 'out'),
+            }
+            result = dict(case, **_run_in_subprocess(case))
+            del result['source'], result['output_dir']
+            results.append(result)
+            shutil.rmtree(work_root / 'out', ignore_errors=True)
+
+            label = f"{implementation:<5}{format:<5}{mode:<5}{aspect:<10}{target:>5} {padding:<12}{'png' if save_as_png else '-':<4}"
+            if 'error' in result:
+                print(f"{label} 오류: {result['error']}")
+            else:
+                rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "-"
+                print(f"{label} {result['ms_per_image']:>9.1f} ms/img  최대 RSS {rss:>8}")
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    report = {'config': {k: v for k, v in vars(args).items() if k != 'run_case'}, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# caption_manifest.py
+
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import json
+import os
+
+# 데이터셋 폴더에 두는 캡션 매니페스트 파일 이름 (한 줄에 {"image": 이름, "caption": 캡션})
+MANIFEST_NAME = 'captions.jsonl'
+
+
+class CaptionManifest:
+    """
+    데이터셋 폴더의 캡션을 한 파일에 모아 둔 매니페스트입니다. 이미지 이름(폴더 기준 상대 경로)을 키로 씁니다.
+    수십만 개의 작은 .txt 파일 대신 이 파일 하나를 원본으로 두고, 학습기가 필요할 때만 .txt 로 내보냅니다.
+
+    변경은 메모리에서 모았다가 save() 할 때 임시 파일에 쓴 뒤 교체하므로, 중간에 중단돼도 이전 내용이 남습니다.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.path = directory / MANIFEST_NAME
+        self.captions: Dict[str, str] = {}
+        self._dirty = False
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (directory / MANIFEST_NAME).is_file()
+
+    @classmethod
+    def load(cls, directory: Path) -> 'CaptionManifest':
+        """
+        폴더의 매니페스트를 읽습니다. 없으면 빈 매니페스트를 반환합니다.
+        """
+        manifest = cls(directory)
+        if manifest.path.is_file():
+            with open(manifest.path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        manifest.captions[record['image']] = record.get('caption', '')
+        return manifest
+
+    def key(self, image_path: Path) -> str:
+        return image_path.relative_to(self.directory).as_posix()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.captions
+
+    def __len__(self) -> int:
+        return len(self.captions)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.captions)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.captions.get(name, default)
+
+    def set(self, name: str, caption: str) -> None:
+        if self.captions.get(name) != caption:
+            self.captions[name] = caption
+            self._dirty = True
+
+    def add(self, name: str) -> bool:
+        """
+        캡션이 없는 이미지에 빈 캡션을 추가합니다.
+
+        Returns:
+            bool: 새로 추가했는지 여부
+        """
+        if name in self.captions:
+            return False
+        self.captions[name] = ''
+        self._dirty = True
+        return True
+
+    def remove(self, name: str) -> None:
+        if self.captions.pop(name, None) is not None:
+            self._dirty = True
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        if old_name in self.captions:
+            self.captions[new_name] = self.captions.pop(old_name)
+            self._dirty = True
+
+    def save(self) -> bool:
+        """
+        바뀐 내용이 있으면 매니페스트 파일을 다시 씁니다.
+
+        Returns:
+            bool: 파일을 썼는지 여부
+        """
+        if not self._dirty:
+            return False
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for name in sorted(self.captions):
+                f.write(json.dumps({'image': name, 'caption': self.captions[name]}, ensure_ascii=False) + '\n')
+        os.replace(temp_path, self.path)
+        self._dirty = False
+        return True
@@ -0,0 +1,127 @@
+# copy_strategy.py
+
+from pathlib import Path
+from typing import Optional, Set
+import errno
+import logging
+import os
+import shutil
+
+from stage_timer import StageTimer
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# linux/fs.h 의 FICLONE ioctl 번호 (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# 이 오류는 "이 파일시스템/플랫폼에서는 안 됨"을 뜻하므로 해당 방식을 더 시도하지 않고 다음 방식으로 넘어갑니다.
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY, errno.ENOSYS,
+    errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+}
+
+# 사용할 수 있는 복사 방식
+# - auto: reflink -> kernel -> copy 순으로 시도 (원본과 데이터를 공유하지 않는 방식만 사용)
+# - reflink: copy-on-write 복제 (btrfs, XFS, bcachefs 등). 즉시 끝나고 추가 공간을 쓰지 않음
+# - hardlink: 같은 inode 를 가리키는 링크. 공간을 쓰지 않지만 원본과 같은 파일임
+# - symlink: 원본을 가리키는 심볼릭 링크
+# - kernel: copy_file_range/sendfile 로 커널 안에서 복사 (사용자 공간 버퍼를 거치지 않음)
+# - copy: shutil.copy2
+COPY_STRATEGIES = ('auto', 'reflink', 'hardlink', 'symlink', 'kernel', 'copy')
+
+_CHAINS = {
+    'auto': ('reflink', 'kernel', 'copy'),
+    'reflink': ('reflink', 'kernel', 'copy'),
+    'hardlink': ('hardlink', 'copy'),
+    'symlink': ('symlink', 'copy'),
+    'kernel': ('kernel', 'copy'),
+    'copy': ('copy',),
+}
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflink 을 지원하지 않는 플랫폼")
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dest)
+
+
+def _kernel_copy(src: Path, dest: Path) -> None:
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        copy = getattr(os, 'copy_file_range', None)
+        if copy is None:
+            if not hasattr(os, 'sendfile'):
+                raise OSError(errno.ENOSYS, "copy_file_range/sendfile 을 지원하지 않는 플랫폼")
+            copy = lambda src_fd, dst_fd, count: os.sendfile(dst_fd, src_fd, None, count)
+        while remaining > 0:
+            copied = copy(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src, dest)
+
+
+def _hardlink(src: Path, dest: Path) -> None:
+    dest.unlink(missing_ok=True)
+    os.link(src, dest)
+
+
+def _symlink(src: Path, dest: Path) -> None:
+    dest.unlink(missing_ok=True)
+    os.symlink(src.resolve(), dest)
+
+
+def _copy(src: Path, dest: Path) -> None:
+    shutil.copy2(src, dest)
+
+
+_METHODS = {
+    'reflink': _reflink,
+    'hardlink': _hardlink,
+    'symlink': _symlink,
+    'kernel': _kernel_copy,
+    'copy': _copy,
+}
+
+
+class FileCopier:
+    """
+    선택한 방식으로 파일을 복사하고, 그 방식을 쓸 수 없으면 다음 방식으로 넘어갑니다.
+    한 번 지원되지 않는다고 확인된 방식은 이후 파일에서 다시 시도하지 않습니다.
+    """
+
+    def __init__(self, strategy: str = 'auto', stats: Optional[StageTimer] = None):
+        if strategy not in _CHAINS:
+            raise ValueError(f"알 수 없는 복사 방식: {strategy}")
+        self.strategy = strategy
+        self.stats = stats if stats is not None else StageTimer()
+        self.logger = logging.getLogger(__name__)
+        self._unsupported: Set[str] = set()
+
+    def copy(self, src: Path, dest: Path) -> str:
+        """
+        src 를 dest 로 복사합니다.
+
+        Returns:
+            str: 실제로 사용한 방식
+        """
+        chain = _CHAINS[self.strategy]
+        for method in chain:
+            if method in self._unsupported and method != chain[-1]:
+                continue
+            try:
+                _METHODS[method](src, dest)
+            except OSError as e:
+                if method == chain[-1] or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                if method not in self._unsupported:
+                    self._unsupported.add(method)
+                    self.logger.info(f"{method} 복사를 사용할 수 없어 다음 방식으로 전환합니다: {e}")
+                continue
+            self.stats.add(f'copy[{method}]')
+            return method
@@ -1,11 +1,105 @@
 # file_renamer.py
 
 from pathlib import Path
-from typing import List, Set
-import shutil
+from typing import Iterable, List, Optional, Set
+import os
 import time
 import logging
 
+
+class NumberIndex:
+    """
+    디렉토리에서 사용 중인 번호(파일 stem 이 숫자인 파일)의 메모리 색인입니다.
+    디렉토리를 한 번만 나열해 만들고, 이후 번호를 쓰거나 비울 때 함께 갱신합니다.
+
+    - BITMAP_LIMIT 미만의 번호는 바이트 배열(번호당 1바이트)로, 그 이상은 집합으로 관리합니다.
+    - 가장 작은 빈 번호를 커서로 들고 있어서 1부터 채워 나가는 할당은 파일 수와 무관하게 빠릅니다.
+    """
+
+    # 날짜처럼 큰 숫자 이름(20240101.png)이 배열을 키우지 않도록 하는 경계
+    BITMAP_LIMIT = 1 << 24
+
+    def __init__(self, used: Iterable[int] = ()):
+        # 0번은 쓰지 않으므로 사용 중으로 표시해 둡니다.
+        self._bits = bytearray(b'\x01')
+        self._large: Set[int] = set()
+        self._first_free = 1
+        for number in used:
+            self.add(number)
+
+    @classmethod
+    def from_directories(cls, directories: Iterable[Path], exclude: Iterable[Path] = ()) -> 'NumberIndex':
+        """
+        여러 디렉토리(크기/형식별 출력 폴더 등)에서 사용 중인 번호를 합친 색인을 만듭니다.
+        exclude 의 파일(이번 실행에서 이름을 바꿀 출력 등)은 번호를 차지하지 않는 것으로 봅니다.
+        """
+        index = cls()
+        exclude = set(exclude)
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    stem = os.path.splitext(entry.name)[0]
+                    if stem.isdigit() and entry.is_file() and directory / entry.name not in exclude:
+                        index.add(int(stem))
+        return index
+
+    @classmethod
+    def from_directory(cls, directory: Path) -> 'NumberIndex':
+        return cls.from_directories([directory])
+
+    def __contains__(self, number: int) -> bool:
+        if number < self.BITMAP_LIMIT:
+            return number < len(self._bits) and self._bits[number] == 1
+        return number in self._large
+
+    def __len__(self) -> int:
+        return self._bits.count(1) - 1 + len(self._large)
+
+    def add(self, number: int) -> None:
+        if number < self.BITMAP_LIMIT:
+            if number >= len(self._bits):
+                self._bits.extend(bytes(max(number + 1 - len(self._bits), len(self._bits))))
+            self._bits[number] = 1
+            if number == self._first_free:
+                self._first_free = self.next_free(number + 1)
+        else:
+            self._large.add(number)
+
+    def discard(self, number: int) -> None:
+        if number < self.BITMAP_LIMIT:
+            if number < len(self._bits) and number > 0:
+                self._bits[number] = 0
+                self._first_free = min(self._first_free, number)
+        else:
+            self._large.discard(number)
+
+    def next_free(self, start: int = 1) -> int:
+        """
+        start 이상에서 사용되지 않은 가장 작은 번호를 반환합니다. (색인은 바꾸지 않음)
+        """
+        number = max(start, self._first_free)
+        if number < len(self._bits):
+            found = self._bits.find(0, number)
+            number = found if found != -1 else len(self._bits)
+        while number in self._large:
+            number += 1
+        return number
+
+    def allocate(self, start: int = 1) -> int:
+        """
+        start 이상에서 사용되지 않은 가장 작은 번호를 사용 중으로 표시하고 반환합니다.
+        """
+        number = self.next_free(start)
+        self.add(number)
+        return number
+
+    @property
+    def max(self) -> int:
+        if self._large:
+            return max(self._large)
+        return len(self._bits.rstrip(b'\x00')) - 1
+
+
 class FileRenamer:
     @staticmethod
     def get_used_numbers(directory: Path) -> Set[int]:
@@ -25,24 +119,43 @@ class FileRenamer:
         return used_numbers
 
     @staticmethod
-    def get_next_available_number(directory: Path, start_number: int) -> int:
+    def get_next_available_number(directory: Path, start_number: int,
+                                  numbers: Optional[NumberIndex] = None) -> int:
         """
         사용 가능한 다음 번호를 찾습니다.
         
         Args:
             directory (Path): 검사할 디렉토리
             start_number (int): 시작 번호
+            numbers (Optional[NumberIndex]): 이미 만들어 둔 색인 (여러 번 호출할 때는 넘겨서 재사용)
             
         Returns:
             int: 사용 가능한 다음 번호
         """
-        used_numbers = FileRenamer.get_used_numbers(directory)
-        while start_number in used_numbers:
-            start_number += 1
-        return start_number
+        if numbers is None:
+            numbers = NumberIndex.from_directory(directory)
+        return numbers.next_free(start_number)
+
+    @staticmethod
+    def rename_to_next_number(file_path: Path, numbers: NumberIndex, prefix: str = "", suffix: str = "") -> Path:
+        """
+        색인에서 비어 있는 가장 작은 번호를 받아 파일 이름을 바꾸고 색인을 갱신합니다.
+        
+        Args:
+            file_path (Path): 변경할 파일 경로
+            numbers (NumberIndex): 대상 디렉토리의 번호 색인 (이번 실행 전부터 있던 파일의 번호)
+            prefix (str): 파일 이름 앞에 추가할 텍스트
+            suffix (str): 파일 이름 뒤에 추가할 텍스트
+            
+        Returns:
+            Path: 새로운 파일 경로
+        """
+        # 파일 자신의 번호 이름은 색인에 없으므로, 비어 있는 가장 작은 번호가 자기 번호면 이름이 그대로 유지됩니다.
+        return FileRenamer.rename_file(file_path, numbers.allocate(), prefix, suffix)
 
     @staticmethod
-    def rename_file(file_path: Path, new_number: int, prefix: str = "", suffix: str = "", max_retries: int = 3) -> Path:
+    def rename_file(file_path: Path, new_number: int, prefix: str = "", suffix: str = "", max_retries: int = 3,
+                    retry_delay: float = 0.1) -> Path:
         """
         파일의 이름을 새로운 번호로 변경합니다.
         
@@ -52,36 +165,35 @@ class FileRenamer:
             prefix (str): 파일 이름 앞에 추가할 텍스트
             suffix (str): 파일 이름 뒤에 추가할 텍스트
             max_retries (int): 최대 재시도 횟수
+            retry_delay (float): 첫 재시도 전 대기 시간(초). 재시도마다 두 배로 늘어남
             
         Returns:
             Path: 새로운 파일 경로
         """
         logger = logging.getLogger(__name__)
         
-        # 새 파일 이름 생성
+        # 새 파일 이름 생성 (항상 같은 폴더 안이므로 다른 장치로 옮기는 경우는 없음)
         new_name = f"{prefix}{new_number}{suffix}{file_path.suffix}"
         new_path = file_path.parent / new_name
 
         for attempt in range(max_retries):
             try:
-                shutil.copy2(file_path, new_path)
-                try:
-                    file_path.unlink()  # 원본 파일 삭제
-                except Exception as e:
-                    logger.warning(f"원본 파일 삭제 실패: {e}")
+                # 메타데이터만 바뀌는 원자적 rename 으로 처리합니다.
+                os.replace(file_path, new_path)
                 return new_path
             except FileNotFoundError:
                 logger.error(f"파일을 찾을 수 없음: {file_path}")
                 raise
             except PermissionError:
+                # 백신/인덱서가 잠깐 파일을 잡고 있는 경우라 잠시 기다렸다가 다시 시도합니다.
                 if attempt < max_retries - 1:
                     logger.warning(f"파일 접근 권한 오류, {attempt + 1}번째 재시도 중...")
-                    time.sleep(1)
+                    time.sleep(retry_delay * (2 ** attempt))
                     continue
                 else:
                     logger.error(f"파일 접근 권한 오류가 지속됨: {file_path}")
                     raise
-            except Exception as e:
+            except OSError as e:
                 logger.error(f"파일 이름 변경 중 예상치 못한 오류: {e}")
                 raise
 
@@ -2,8 +2,12 @@
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
+
+from caption_manifest import CaptionManifest
+from file_renamer import NumberIndex
 
 def get_next_number(files):
     # 현재 존재하는 숫자 파일들 중 가장 큰 숫자 찾기
@@ -23,59 +27,201 @@ def rename_images():
     # 모든 이미지 파일 찾기
     image_files = [f for f in current_dir.glob('*.*') if f.suffix.lower() in image_extensions]
     
-    # 다음 사용할 번호 찾기
+    # 다음 사용할 번호 찾기 (이미 쓰인 번호는 폴더를 한 번 나열해 만든 색인으로 건너뜀)
     next_number = get_next_number(image_files)
+    numbers = NumberIndex.from_directory(current_dir)
     
     # 숫자가 아닌 이름을 가진 이미지 파일 처리
     for img_file in image_files:
         if not img_file.stem.isdigit():
-            new_name = f"{next_number}{img_file.suffix}"
-            new_path = img_file.parent / new_name
-            
-            # 이미 존재하는 파일명이면 다음 번호 사용
-            while new_path.exists():
-                next_number += 1
-                new_name = f"{next_number}{img_file.suffix}"
-                new_path = img_file.parent / new_name
-            
-            img_file.rename(new_path)
+            next_number = numbers.allocate(next_number)
+            img_file.rename(img_file.parent / f"{next_number}{img_file.suffix}")
             next_number += 1
 
 def create_matching_text_files():
     current_dir = Path.cwd()
     
-    # PNG 파일 찾기
-    png_files = list(current_dir.glob('*.png'))
+    # 숫자 이름의 PNG 파일 찾기
+    png_files = [current_dir / name for name in _list_names(current_dir)
+                 if name.lower().endswith('.png') and name[:-4].isdigit()]
     
-    # 각 PNG 파일에 대해 대응하는 텍스트 파일 생성
-    for png_file in png_files:
-        if png_file.stem.isdigit():
-            txt_file = png_file.with_suffix('.txt')
-            
-            # 텍스트 파일이 존재하지 않을 경우에만 생성
-            if not txt_file.exists():
-                txt_file.touch()
+    # 각 PNG 파일에 대해 대응하는 텍스트 파일 생성 (이미 있는 파일은 건너뜀)
+    TextFileGenerator.create_text_files(png_files)
+
+def _list_names(directory: Path) -> Set[str]:
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries}
 
 class TextFileGenerator:
+    # 텍스트 파일을 만드는 스레드 수 (네트워크 드라이브의 왕복 지연을 겹치기 위한 작은 풀)
+    MAX_WORKERS = 8
+
+    # 한 작업이 만드는 파일 수이자 진행 상황을 알리는 단위
+    BATCH_SIZE = 256
+
     @staticmethod
-    def create_text_files(image_paths: List[Union[str, Path]]) -> None:
+    def _run_batches(func: Callable[[list], object], items: list, progress_tracker=None,
+                     status: str = "텍스트 파일 처리") -> list:
+        """
+        items 를 BATCH_SIZE 개씩 묶어 스레드 풀에서 func 로 처리하고, 묶음이 끝날 때마다 진행 상황을 알립니다.
+
+        Returns:
+            list: 묶음별 func 결과 (items 순서)
+        """
+        size = TextFileGenerator.BATCH_SIZE
+        batches = [items[i:i + size] for i in range(0, len(items), size)]
+        executor = ThreadPoolExecutor(max_workers=TextFileGenerator.MAX_WORKERS) if len(batches) > 1 else None
+        results = []
+        done = 0
+        try:
+            for batch, result in zip(batches, executor.map(func, batches) if executor else map(func, batches)):
+                results.append(result)
+                done += len(batch)
+                if progress_tracker:
+                    progress_tracker.update(len(batch), f"{status} {done}/{len(items)}")
+        finally:
+            if executor:
+                executor.shutdown()
+        return results
+
+    @staticmethod
+    def _touch_batch(txt_paths: List[Path]) -> None:
+        for txt_path in txt_paths:
+            # 스냅샷 이후 다른 곳에서 만든 캡션을 덮어쓰지 않도록 추가 모드로 엽니다.
+            open(txt_path, 'a').close()
+
+    @staticmethod
+    def _write_batch(items: List[Tuple[Path, str]]) -> None:
+        for txt_path, caption in items:
+            with open(txt_path, 'w', encoding='utf-8') as f:
+                f.write(caption)
+
+    @staticmethod
+    def _read_batch(items: List[Tuple[str, Path]]) -> List[Tuple[str, str]]:
+        results = []
+        for name, txt_path in items:
+            with open(txt_path, encoding='utf-8') as f:
+                results.append((name, f.read()))
+        return results
+
+    @staticmethod
+    def _snapshot(image_paths: Iterable[Union[str, Path]]) -> Dict[Path, Tuple[List[Path], Set[str]]]:
+        """
+        이미지들을 폴더별로 묶고, 폴더마다 한 번만 나열한 파일 이름 집합을 함께 반환합니다.
+        """
+        by_folder: Dict[Path, List[Path]] = {}
+        for img_path in image_paths:
+            img_path = Path(img_path)
+            by_folder.setdefault(img_path.parent, []).append(img_path)
+        snapshot = {}
+        for folder, images in by_folder.items():
+            try:
+                snapshot[folder] = (images, _list_names(folder))
+            except FileNotFoundError:
+                snapshot[folder] = (images, set())
+        return snapshot
+
+    @staticmethod
+    def create_text_files(image_paths: Iterable[Union[str, Path]], progress_tracker=None) -> int:
         """
         이미지 파일들에 대응하는 빈 텍스트 파일들을 생성합니다.
+        폴더마다 한 번만 나열해 이미 있는 텍스트 파일을 확인하고, 없는 파일만 묶어서 스레드 풀로 만듭니다.
         
         Args:
-            image_paths (List[Union[str, Path]]): 이미지 파일 경로 리스트
+            image_paths (Iterable[Union[str, Path]]): 이미지 파일 경로 리스트
+            progress_tracker (Optional[ProgressTracker]): 진행 상황 추적기 (BATCH_SIZE 단위로 갱신)
+
+        Returns:
+            int: 새로 만든 텍스트 파일 수
         """
-        for img_path in image_paths:
-            img_path = Path(img_path) if isinstance(img_path, str) else img_path
-            txt_path = img_path.with_suffix('.txt')
-            
-            if not txt_path.exists():
-                txt_path.touch()
+        missing: List[Path] = []
+        existing = 0
+        for folder, (images, names) in TextFileGenerator._snapshot(image_paths).items():
+            for img_path in images:
+                txt_path = img_path.with_suffix('.txt')
+                if txt_path.name in names:
+                    existing += 1
+                else:
+                    missing.append(txt_path)
+        if progress_tracker and existing:
+            progress_tracker.update(existing, f"이미 있는 텍스트 파일 {existing}개 건너뜀")
+
+        TextFileGenerator._run_batches(TextFileGenerator._touch_batch, missing, progress_tracker,
+                                       "텍스트 파일 생성 완료")
+        return len(missing)
+
+    @staticmethod
+    def add_to_manifest(image_paths: Iterable[Union[str, Path]], directory: Path, progress_tracker=None) -> int:
+        """
+        .txt 파일 대신 폴더의 캡션 매니페스트에 빈 캡션 항목을 추가합니다. (이미 있는 항목은 유지)
+
+        Returns:
+            int: 새로 추가한 항목 수
+        """
+        manifest = CaptionManifest.load(directory)
+        image_paths = [Path(img_path) for img_path in image_paths]
+        added = sum(manifest.add(manifest.key(img_path)) for img_path in image_paths)
+        manifest.save()
+        if progress_tracker:
+            progress_tracker.update(len(image_paths), f"매니페스트에 {added}개 캡션 추가")
+        return added
+
+    @staticmethod
+    def import_captions(directory: Path, progress_tracker=None) -> int:
+        """
+        폴더(하위 폴더 포함)의 이미지별 .txt 캡션을 읽어 캡션 매니페스트에 모읍니다.
+        .txt 가 없는 이미지는 빈 캡션으로 추가하고, .txt 파일은 지우지 않습니다.
+
+        Returns:
+            int: .txt 에서 읽은 캡션 수
+        """
+        manifest = CaptionManifest.load(directory)
+        image_paths = TextFileGenerator.find_images(directory, recursive=True)
+        to_read: List[Tuple[str, Path]] = []
+        for folder, (images, names) in TextFileGenerator._snapshot(image_paths).items():
+            for img_path in images:
+                txt_path = img_path.with_suffix('.txt')
+                if txt_path.name in names:
+                    to_read.append((manifest.key(img_path), txt_path))
+                else:
+                    manifest.add(manifest.key(img_path))
+        if progress_tracker and len(image_paths) > len(to_read):
+            progress_tracker.update(len(image_paths) - len(to_read), "텍스트 파일 없는 이미지 건너뜀")
+
+        for batch in TextFileGenerator._run_batches(TextFileGenerator._read_batch, to_read, progress_tracker,
+                                                    "캡션 가져오기"):
+            for name, caption in batch:
+                manifest.set(name, caption)
+        manifest.save()
+        return len(to_read)
+
+    @staticmethod
+    def export_captions(directory: Path, progress_tracker=None) -> int:
+        """
+        캡션 매니페스트의 내용을 이미지별 .txt 파일로 내보냅니다. 매니페스트가 원본이므로 기존 .txt 는 덮어씁니다.
+        폴더에 없는 이미지의 항목은 건너뜁니다.
+
+        Returns:
+            int: 쓴 .txt 파일 수
+        """
+        manifest = CaptionManifest.load(directory)
+        image_paths = [directory / name for name in manifest]
+        to_write: List[Tuple[Path, str]] = []
+        for folder, (images, names) in TextFileGenerator._snapshot(image_paths).items():
+            for img_path in images:
+                if img_path.name in names:
+                    to_write.append((img_path.with_suffix('.txt'), manifest.get(manifest.key(img_path), '')))
+        if progress_tracker and len(image_paths) > len(to_write):
+            progress_tracker.update(len(image_paths) - len(to_write), "폴더에 없는 이미지 건너뜀")
+
+        TextFileGenerator._run_batches(TextFileGenerator._write_batch, to_write, progress_tracker, "캡션 내보내기")
+        return len(to_write)
 
     @staticmethod
     def create_text_file(image_path: Union[str, Path]) -> None:
         """
         단일 이미지 파일에 대응하는 빈 텍스트 파일을 생성합니다.
+        여러 파일을 만들 때는 create_text_files 를 사용하세요.
         
         Args:
             image_path (Union[str, Path]): 이미지 파일 경로
@@ -87,23 +233,38 @@ class TextFileGenerator:
             txt_path.touch()
 
     @staticmethod
-    def create_text_files_from_output(output_path: Path, progress_tracker=None) -> None:
+    def create_text_files_from_output(output_path: Path, progress_tracker=None) -> int:
         """
         출력 폴더의 이미지 파일들에 대응하는 텍스트 파일을 생성합니다.
         
         Args:
             output_path (Path): 출력 폴더 경로
             progress_tracker (Optional[ProgressTracker]): 진행 상황 추적기
+
+        Returns:
+            int: 새로 만든 텍스트 파일 수
         """
-        image_files = [f for f in output_path.glob("*") 
-                      if f.suffix.lower() in {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}]
-        
-        for img_path in image_files:
-            txt_path = img_path.with_suffix('.txt')
-            if not txt_path.exists():
-                txt_path.touch()
-            if progress_tracker:
-                progress_tracker.update(1, f"텍스트 파일 생성 완료: {txt_path.name}")
+        image_files = TextFileGenerator.find_images(output_path)
+        return TextFileGenerator.create_text_files(image_files, progress_tracker)
+
+    @staticmethod
+    def find_images(output_path: Path, recursive: bool = False) -> List[Path]:
+        """
+        출력 폴더의 이미지 파일 목록을 폴더당 한 번의 나열로 반환합니다.
+
+        Args:
+            output_path (Path): 출력 폴더 경로
+            recursive (bool): 하위 폴더(크기/형식별 폴더)까지 포함할지 여부
+        """
+        extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
+        images = []
+        with os.scandir(output_path) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if recursive and entry.is_dir():
+                    images.extend(TextFileGenerator.find_images(Path(entry.path), recursive))
+                elif os.path.splitext(entry.name)[1].lower() in extensions:
+                    images.append(Path(entry.path))
+        return images
 
 def main():
     rename_images()
@@ -6,7 +6,9 @@ import subprocess
 from pathlib import Path
 from image_duplicate_checker import ImageDuplicateChecker
 from main import ProcessManager, ProcessingMode
-from progress_tracker import ProgressTracker
+from progress_tracker import ProgressTracker, ProgressInfo, format_progress, print_progress
+from run_profiler import RunProfiler
+from copy_strategy import COPY_STRATEGIES
 import threading
 import os
 import json
@@ -31,6 +33,9 @@ class LoraPreprocessorGUI:
         self.resize_size = tk.StringVar(value="512")
         self.padding_color = tk.StringVar(value="white")
         self.save_as_png = tk.BooleanVar(value=True)
+        self.save_as_webp = tk.BooleanVar(value=False)
+        self.encoder_profile = tk.StringVar(value="balanced")
+        self.copy_strategy = tk.StringVar(value="auto")
         
         # 저장된 설정 불러오기
         self.load_config()
@@ -81,6 +86,8 @@ class LoraPreprocessorGUI:
             ("텍스트만 생성", "text_only"),
             ("중복 이미지 검사", "check_duplicates"),
             ("이름 변경만", "rename_only"),
+            ("캡션 .txt → 매니페스트", "import_captions"),
+            ("매니페스트 → 캡션 .txt", "export_captions"),
             ("이미지 크롤링", "crawl_images")
         ]
         
@@ -101,7 +108,7 @@ class LoraPreprocessorGUI:
         
         ttk.Label(resize_frame, text="크기:").grid(row=1, column=0, sticky="w")
         ttk.Combobox(resize_frame, textvariable=self.resize_size, 
-                     values=["512", "1024"], width=8).grid(row=1, column=1, sticky="w")
+                     values=["512", "768", "1024", "1024,512"], width=10).grid(row=1, column=1, sticky="w")
         
         ttk.Label(resize_frame, text="패딩:").grid(row=2, column=0, sticky="w")
         ttk.Combobox(resize_frame, textvariable=self.padding_color,
@@ -110,6 +117,13 @@ class LoraPreprocessorGUI:
         
         ttk.Checkbutton(resize_frame, text="PNG로 저장", 
                         variable=self.save_as_png).grid(row=3, column=0, columnspan=2, sticky="w")
+        ttk.Checkbutton(resize_frame, text="무손실 WebP로 저장",
+                        variable=self.save_as_webp).grid(row=4, column=0, columnspan=2, sticky="w")
+
+        ttk.Label(resize_frame, text="인코딩:").grid(row=5, column=0, sticky="w")
+        ttk.Combobox(resize_frame, textvariable=self.encoder_profile,
+                     values=["fast", "balanced", "smallest"], state="readonly",
+                     width=8).grid(row=5, column=1, sticky="w")
 
         # === 고급 설정 탭 내용 ===
         # 이름 변경 옵션
@@ -211,6 +225,19 @@ class LoraPreprocessorGUI:
         ttk.Entry(options_frame, textvariable=self.workers, width=5).grid(row=0, column=1, padx=5)
         ttk.Checkbutton(options_frame, text="디버그 모드", 
                         variable=self.debug_mode).grid(row=1, column=0, sticky="w")
+        self.collect_stats = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="단계별 처리 통계 저장", 
+                        variable=self.collect_stats).grid(row=2, column=0, columnspan=2, sticky="w")
+        self.profile_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="프로파일링 (출력 폴더/profile)", 
+                        variable=self.profile_enabled).grid(row=3, column=0, columnspan=2, sticky="w")
+        self.largest_first = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="큰 이미지 먼저 처리",
+                        variable=self.largest_first).grid(row=4, column=0, columnspan=2, sticky="w")
+        ttk.Label(options_frame, text="복사 방식:").grid(row=5, column=0, sticky="w")
+        ttk.Combobox(options_frame, textvariable=self.copy_strategy,
+                     values=list(COPY_STRATEGIES), state="readonly",
+                     width=8).grid(row=5, column=1, sticky="w")
 
         # === 크롤링 설정 탭 내용 ===
         # 검색 엔진 선택
@@ -268,6 +295,13 @@ class LoraPreprocessorGUI:
         # 실행 버튼
         self.run_button = ttk.Button(self.root, text="실행", command=self.run_processor)
         self.run_button.grid(row=1, column=0, pady=10)
+
+        # 진행 상태 표시
+        self.progress_value = tk.DoubleVar(value=0.0)
+        ttk.Progressbar(self.root, variable=self.progress_value, maximum=100).grid(
+            row=2, column=0, padx=10, sticky="ew")
+        self.status_text = tk.StringVar(value="")
+        ttk.Label(self.root, textvariable=self.status_text).grid(row=3, column=0, padx=10, pady=(0, 10), sticky="w")
         
         # 그리드 설정
         self.root.grid_columnconfigure(0, weight=1)
@@ -356,6 +390,8 @@ class LoraPreprocessorGUI:
                     print(f"리사이즈 크기: {self.resize_size.get()}px")
                 print(f"패딩 색상: {self.padding_color.get()}")
                 print(f"PNG로 저장: {'예' if self.save_as_png.get() else '아니오'}")
+                print(f"WebP로 저장: {'예' if self.save_as_webp.get() else '아니오'}")
+                print(f"인코딩 프로필: {self.encoder_profile.get()}")
             print("==================\n")
 
             # 기존 처리 로직
@@ -371,12 +407,16 @@ class LoraPreprocessorGUI:
                     suffix=self.suffix.get(),
                     use_replace=self.use_replace.get(),
                     replace_from=self.replace_from.get(),
-                    replace_to=self.replace_to.get()
+                    replace_to=self.replace_to.get(),
+                    profiler=self._create_profiler()
                 )
+                processor.progress_tracker.subscribe(self._on_progress)
                 processor.process_files()
             elif self.mode.get() == "check_duplicates":
                 checker = ImageDuplicateChecker()
-                self.progress_tracker = ProgressTracker(100)
+                self.progress_tracker = ProgressTracker()
+                self.progress_tracker.subscribe(print_progress)
+                self.progress_tracker.subscribe(self._on_progress)
                 removed_count, removed_files = checker.remove_duplicates(
                     Path(self.output_path.get()), 
                     self.progress_tracker
@@ -390,9 +430,11 @@ class LoraPreprocessorGUI:
                     output_path=Path(self.output_path.get()),
                     mode=ProcessingMode(self.mode.get()),
                     max_workers=int(self.workers.get()),
-                    resize_size=int(self.resize_size.get()) if self.resize_enabled.get() else None,
+                    resize_size=self._parse_resize_sizes() if self.resize_enabled.get() else None,
                     padding_color=self.padding_color.get(),
                     save_as_png=self.save_as_png.get(),
+                    save_as_webp=self.save_as_webp.get(),
+                    encoder_profile=self.encoder_profile.get(),
                     use_numbering=self.use_numbering.get(),
                     use_prefix=self.use_prefix.get(),
                     use_suffix=self.use_suffix.get(),
@@ -400,8 +442,13 @@ class LoraPreprocessorGUI:
                     suffix=self.suffix.get(),
                     use_replace=self.use_replace.get(),
                     replace_from=self.replace_from.get(),
-                    replace_to=self.replace_to.get()
+                    replace_to=self.replace_to.get(),
+                    collect_stats=self.collect_stats.get(),
+                    profiler=self._create_profiler(),
+                    schedule='largest' if self.largest_first.get() else 'path',
+                    copy_strategy=self.copy_strategy.get()
                 )
+                processor.progress_tracker.subscribe(self._on_progress)
                 processor.process_files()
                 
         except Exception as e:
@@ -410,6 +457,27 @@ class LoraPreprocessorGUI:
         # 작업 완료 후 GUI 업데이트
         self.root.after(0, self._process_complete)
 
+    def _parse_resize_sizes(self):
+        """쉼표로 구분된 리사이즈 크기 목록을 정수 리스트로 변환합니다. 잘못된 값이면 ValueError."""
+        sizes = [int(size) for size in self.resize_size.get().replace(' ', '').split(',') if size]
+        if any(size < 1 for size in sizes):
+            raise ValueError
+        return sizes
+
+    def _create_profiler(self):
+        """프로파일링 옵션이 켜져 있으면 출력 폴더 아래 profile/ 에 저장하는 프로파일러를 만듭니다."""
+        if not self.profile_enabled.get():
+            return None
+        return RunProfiler(Path(self.output_path.get()) / 'profile')
+
+    def _on_progress(self, info: ProgressInfo):
+        """작업자 스레드에서 호출되는 진행 상황 구독자. GUI 갱신은 메인 스레드로 넘깁니다."""
+        self.root.after(0, self._show_progress, info)
+
+    def _show_progress(self, info: ProgressInfo):
+        self.progress_value.set(info.percentage)
+        self.status_text.set(format_progress(info))
+
     def _process_complete(self):
         # 실행 버튼 다시 활성화
         self.run_button.configure(state="normal")
@@ -436,7 +504,8 @@ class LoraPreprocessorGUI:
             bool: 검증 성공 여부
         """
         # 중복 이미지 검사 모드나 텍스트만 생성 모드일 때는 출력 경로만 확인
-        if self.mode.get() in ["check_duplicates", "text_only", "rename_only", "crawl_images"]:
+        if self.mode.get() in ["check_duplicates", "text_only", "rename_only", "crawl_images",
+                               "import_captions", "export_captions"]:
             if not self.output_path.get().strip():
                 messagebox.showerror("오류", "출력 폴더 경로를 지정해주세요.")
                 return False
@@ -468,11 +537,10 @@ class LoraPreprocessorGUI:
         
         if self.resize_enabled.get():
             try:
-                resize = int(self.resize_size.get())
-                if resize not in [512, 1024]:
+                if not self._parse_resize_sizes():
                     raise ValueError
             except ValueError:
-                messagebox.showerror("오류", "리사이즈 크기는 512 또는 1024여야 합니다.")
+                messagebox.showerror("오류", "리사이즈 크기는 1 이상의 정수여야 합니다. 여러 크기는 쉼표로 구분합니다. (예: 1024,512)")
                 return False
             
         return True
@@ -509,15 +577,41 @@ class LoraPreprocessorGUI:
                 filter_stock=self.filter_stock.get()
             )
             
-            crawler.do_crawling()
+            self.crawler = crawler
+            self.root.after(0, self._poll_crawl_metrics)
+            profiler = self._create_profiler()
+            if profiler:
+                # 크롤링 작업은 프로세스 풀에서 실행되므로 워커별 결과를 모아 합칩니다.
+                crawler.profile_dir = str(profiler.output_dir)
+                profiler.start()
+                try:
+                    profiler.wrap(crawler.do_crawling)()
+                finally:
+                    profiler.stop()
+            else:
+                crawler.do_crawling()
             
         except Exception as e:
             self.process_error = str(e)
             print(f"Error: {e}")  # 에러 메시지 출력
         
         # 작업 완료 후 GUI 업데이트
+        self.crawler = None
         self.root.after(0, self._process_complete)
 
+    def _poll_crawl_metrics(self):
+        """크롤링 중 실시간 통계를 상태 표시줄에 갱신합니다."""
+        crawler = getattr(self, 'crawler', None)
+        if crawler is None:
+            return
+        stats = crawler.metrics.snapshot()
+        self.status_text.set(
+            f"크롤링: 작업 {stats['tasks_done']}/{stats['tasks_total']} | "
+            f"링크 {stats['links_found']} | 다운로드 {stats['downloaded']} | 제외 {stats['rejected']} | "
+            f"{stats['bytes_per_sec'] / 1024:.1f} KB/s"
+        )
+        self.root.after(500, self._poll_crawl_metrics)
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = LoraPreprocessorGUI(root)
@@ -5,17 +5,28 @@ from typing import Dict, List, Set, Tuple, Optional
 import hashlib
 from PIL import Image
 import logging
-import io
 from progress_tracker import ProgressTracker
+from image_processor import ImageProcessor, decode_reduced
+from memory_governor import use_explicit_pixel_checks
+from caption_manifest import CaptionManifest
 
 class ImageDuplicateChecker:
-    def __init__(self):
+    # 큰 이미지는 이 크기 이상으로만 축소 디코드해서 해시를 계산합니다.
+    REDUCED_HASH_SIZE = 1024
+
+    # 해시에 한 번에 넘길 행 수 (전체 픽셀 복사본을 만들지 않기 위함)
+    HASH_ROWS = 256
+
+    def __init__(self, max_pixels: Optional[int] = None):
         self.logger = logging.getLogger(__name__)
-        Image.MAX_IMAGE_PIXELS = None  # PIL의 기본 제한 해제
+        # 이 픽셀 수를 넘는 이미지는 축소 디코드한 픽셀로 해시를 계산합니다.
+        self.max_pixels = max_pixels if max_pixels is not None else ImageProcessor.REDUCED_DECODE_PIXELS
+        use_explicit_pixel_checks()
 
     def calculate_image_hash(self, image_path: Path) -> str:
         """
-        이미지의 MD5 해시값을 계산합니다. 큰 이미지의 경우 축소하여 처리합니다.
+        디코드된 픽셀의 MD5 해시값을 계산합니다. 큰 이미지의 경우 축소 디코드하여 처리합니다.
+        다시 인코딩하지 않고 픽셀 행을 조금씩 해시에 넘깁니다.
         
         Args:
             image_path (Path): 이미지 파일 경로
@@ -25,21 +36,21 @@ class ImageDuplicateChecker:
         """
         try:
             with Image.open(image_path) as img:
-                # 큰 이미지 처리를 위한 예외 처리
-                try:
-                    # 이미지를 메모리에 로드하여 해시 계산
-                    img_byte_arr = io.BytesIO()
-                    img.save(img_byte_arr, format=img.format)
-                    img_byte_arr = img_byte_arr.getvalue()
-                except Image.DecompressionBombError:
-                    # 이미지가 너무 큰 경우 축소하여 처리
+                hasher = hashlib.md5()
+                # 같은 픽셀이라도 크기와 모드가 다르면 다른 이미지로 봅니다.
+                hasher.update(f"{img.mode}:{img.width}x{img.height}:".encode())
+                if self.max_pixels and img.width * img.height > self.max_pixels:
                     self.logger.warning(f"큰 이미지 감지됨, 축소하여 처리: {image_path}")
-                    img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-                    img_byte_arr = io.BytesIO()
-                    img.save(img_byte_arr, format='JPEG', quality=50)
-                    img_byte_arr = img_byte_arr.getvalue()
-                
-                return hashlib.md5(img_byte_arr).hexdigest()
+                    img = decode_reduced(img, self.REDUCED_HASH_SIZE)
+                else:
+                    img.load()
+                # 팔레트 이미지의 픽셀 값은 색 번호일 뿐이므로 팔레트와 투명색도 함께 넣어야 색이 다른 이미지가 구분됩니다.
+                if img.mode in ('P', 'PA'):
+                    hasher.update(bytes(img.getpalette() or ()))
+                hasher.update(f":{img.info.get('transparency')!r}:".encode())
+                for top in range(0, img.height, self.HASH_ROWS):
+                    hasher.update(img.crop((0, top, img.width, min(top + self.HASH_ROWS, img.height))).tobytes())
+                return hasher.hexdigest()
                 
         except Exception as e:
             self.logger.error(f"이미지 해시 계산 중 오류 발생 ({image_path}): {e}")
@@ -57,7 +68,7 @@ class ImageDuplicateChecker:
             Dict[str, List[Path]]: 해시값을 키로, 중복된 파일 경로 리스트를 값으로 하는 딕셔너리
         """
         hash_dict: Dict[str, List[Path]] = {}
-        image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
+        image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'}
         
         # 전체 이미지 파일 목록 수집
         all_images = []
@@ -66,15 +77,15 @@ class ImageDuplicateChecker:
             
         total_images = len(all_images)
         if progress_tracker:
-            progress_tracker.total = total_images * 2  # 해시 계산과 중복 제거 두 단계를 위해 2배
+            progress_tracker.start_stage('hash', total_images)
             print(f"\n총 {total_images}개 이미지 검사 시작...")
 
         # 출력 폴더의 모든 이미지 파일 검사
         for idx, image_path in enumerate(all_images, 1):
-            if progress_tracker:
-                progress_tracker.update(1, f"해시 계산 중: {image_path.name} ({idx}/{total_images})")
-            
             image_hash = self.calculate_image_hash(image_path)
+            if progress_tracker:
+                progress_tracker.update(1, f"해시 계산 완료: {image_path.name}",
+                                        bytes_done=image_path.stat().st_size)
             if image_hash:
                 if image_hash in hash_dict:
                     hash_dict[image_hash].append(image_path)
@@ -116,29 +127,36 @@ class ImageDuplicateChecker:
         
         if not duplicates:
             if progress_tracker:
-                progress_tracker.update(progress_tracker.total - progress_tracker.current, "검사 완료")
+                progress_tracker.finish_stage()
             return 0, removed_files
 
+        # 캡션 매니페스트가 있으면 제거한 이미지의 항목도 함께 지우고 한 번에 저장합니다.
+        manifest = CaptionManifest.load(output_path) if CaptionManifest.exists(output_path) else None
         total_duplicates = sum(len(files) - 1 for files in duplicates.values())
         print(f"\n중복 파일 {total_duplicates}개 발견, 제거 시작...")
+        if progress_tracker:
+            progress_tracker.start_stage('remove', total_duplicates)
         
         for hash_value, file_list in duplicates.items():
             # 첫 번째 파일은 유지하고 나머지는 제거
             for file_path in file_list[1:]:
                 try:
-                    if progress_tracker:
-                        progress_tracker.update(1, f"중복 파일 제거 중: {file_path.name}")
-                    
                     file_path.unlink()  # 파일 삭제
-                    txt_path = file_path.with_suffix('.txt')
-                    if txt_path.exists():  # 관련된 텍스트 파일도 삭제
-                        txt_path.unlink()
+                    file_path.with_suffix('.txt').unlink(missing_ok=True)  # 관련된 텍스트 파일도 삭제
+                    if manifest is not None:
+                        manifest.remove(manifest.key(file_path))
                     removed_files.append(file_path)
+                    if progress_tracker:
+                        progress_tracker.update(1, f"중복 파일 제거: {file_path.name}")
                 except Exception as e:
                     self.logger.error(f"파일 삭제 중 오류 발생 ({file_path}): {e}")
+                    if progress_tracker:
+                        progress_tracker.fail(1, f"삭제 실패: {file_path.name}")
         
+        if manifest is not None:
+            manifest.save()
         if progress_tracker:
-            progress_tracker.update(progress_tracker.total - progress_tracker.current, "작업 완료")
+            progress_tracker.finish_stage()
         
         return len(removed_files), removed_files
 
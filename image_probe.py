@@ -0,0 +1,80 @@
+# image_probe.py
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import logging
+
+from PIL import Image
+
+
+@dataclass
+class ImageProbe:
+    path: Path
+    format: Optional[str] = None
+    mode: Optional[str] = None
+    width: int = 0
+    height: int = 0
+    file_size: int = 0
+    has_transparency: bool = False
+    animated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def probe_image(path: Path) -> ImageProbe:
+    """
+    이미지 헤더만 읽어 형식, 모드, 크기를 확인합니다. 픽셀 데이터는 디코드하지 않습니다.
+
+    Args:
+        path (Path): 이미지 경로 (아카이브 멤버처럼 open('rb') 와 stat() 이 있는 객체도 가능)
+
+    Returns:
+        ImageProbe: 헤더 정보. 읽을 수 없는 파일은 error 가 채워진 결과를 반환합니다.
+    """
+    probe = ImageProbe(path=path)
+    try:
+        probe.file_size = path.stat().st_size
+        # Image.open 은 헤더만 읽고 load() 전까지 디코드하지 않습니다.
+        with path.open('rb') as f, Image.open(f) as img:
+            probe.format = img.format
+            probe.mode = img.mode
+            probe.width, probe.height = img.size
+            probe.has_transparency = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+            # n_frames 는 GIF 전체를 훑으므로 두 번째 프레임까지만 확인하는 is_animated 를 사용합니다.
+            probe.animated = getattr(img, 'is_animated', False)
+    except Exception as e:
+        probe.error = str(e)
+        logging.getLogger(__name__).debug(f"이미지 헤더 확인 실패: {path} - {e}")
+    return probe
+
+
+def estimate_cost(probe: ImageProbe) -> int:
+    """
+    처리 비용 추정치를 반환합니다. 헤더를 읽었으면 픽셀 수, 아니면 파일 크기를 사용합니다.
+    """
+    return probe.pixels if probe.ok and probe.pixels else probe.file_size
+
+
+def probe_images(paths: Iterable[Path], max_workers: int = 8) -> Dict[Path, ImageProbe]:
+    """
+    여러 이미지의 헤더를 병렬로 확인합니다. 헤더 읽기는 작은 I/O 라 스레드로 겹쳐 실행합니다.
+
+    Args:
+        paths (Iterable[Path]): 이미지 경로 목록
+        max_workers (int): 동시에 헤더를 읽을 스레드 수
+
+    Returns:
+        Dict[Path, ImageProbe]: 경로별 헤더 정보 (입력 순서 유지)
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(probe_image, paths)))
@@ -1,111 +1,431 @@
 # image_processor.py
 
+from contextlib import contextmanager
 from pathlib import Path
-from shutil import copy2
-from typing import List, Set, Optional
+from typing import Dict, List, Sequence, Set, Optional, Tuple, Union
 from PIL import Image
+import io
 import logging
-Image.MAX_IMAGE_PIXELS = None  # DecompressionBombError 방지
+import shutil
+import threading
+from archive_source import ArchiveSource, is_archive
+from stage_timer import StageTimer
+from image_probe import ImageProbe, probe_image
+from memory_governor import use_explicit_pixel_checks
+from copy_strategy import FileCopier
+
+# 축소 디코드 결과를 목표 크기의 몇 배 이상으로 남길지 (Image.thumbnail 의 reducing_gap 과 같은 의미)
+REDUCING_GAP = 2
+
+
+def decode_reduced(img: Image.Image, size: int) -> Image.Image:
+    """
+    전체 해상도 래스터를 유지하지 않고, 긴 변이 size * REDUCING_GAP 이상 남도록 줄여서 디코드합니다.
+
+    - JPEG: draft() 로 DCT 단계에서 1/2, 1/4, 1/8 크기로 바로 디코드합니다. (전체 해상도 버퍼를 만들지 않음)
+    - 그 밖의 형식: 디코드 직후 reduce() 로 정수 배 축소하고 원본 버퍼는 바로 놓아 줍니다.
+
+    Args:
+        img (Image.Image): Image.open 으로 연 (아직 load 하지 않은) 이미지
+        size (int): 최종 목표 크기
+
+    Returns:
+        Image.Image: 디코드된 축소 이미지
+    """
+    floor = size * REDUCING_GAP
+    if img.format == 'JPEG':
+        # draft() 는 요청 상자의 두 변을 모두 넘는 가장 작은 배율을 고르므로, 긴 변 기준이 되도록 비율을 맞춘 상자를 줍니다.
+        longest = max(img.size)
+        img.draft(None, (max(1, floor * img.width // longest), max(1, floor * img.height // longest)))
+    img.load()
+    factor = max(img.width, img.height) // floor
+    # reduce() 는 팔레트/1비트 이미지를 지원하지 않습니다.
+    if factor > 1 and img.mode not in ('P', '1'):
+        img = img.reduce(factor)
+    return img
+
 
 class ImageProcessor:
     # 지원하는 이미지 확장자
-    SUPPORTED_EXTENSIONS: Set[str] = {'.png', '.jpg', '.jpeg', '.gif'}
+    SUPPORTED_EXTENSIONS: Set[str] = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+    # 인코더 프로필별 저장 옵션
+    # - fast: 압축보다 속도 우선 (PNG zlib 레벨 1, WebP method 0)
+    # - balanced: 기본값. JPEG 허프만 최적화 패스를 생략하고 PNG 는 zlib 기본 레벨
+    # - smallest: 파일 크기 우선 (PNG 최대 압축, JPEG optimize/progressive, WebP method 6)
+    # JPEG 는 quality 95, 4:2:0 서브샘플링을 공통으로 사용합니다.
+    ENCODER_PROFILES: Dict[str, Dict[str, Dict]] = {
+        'fast': {
+            'PNG': {'compress_level': 1},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0'},
+            'WEBP': {'lossless': True, 'method': 0, 'quality': 0},
+        },
+        'balanced': {
+            'PNG': {'compress_level': 6},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0'},
+            'WEBP': {'lossless': True, 'method': 4, 'quality': 50},
+        },
+        'smallest': {
+            'PNG': {'compress_level': 9, 'optimize': True},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0', 'optimize': True, 'progressive': True},
+            'WEBP': {'lossless': True, 'method': 6, 'quality': 100},
+        },
+    }
+
+    # 이 픽셀 수를 넘는 원본은 축소 디코드 경로로 처리합니다. (Pillow 기본 MAX_IMAGE_PIXELS 와 같은 값)
+    REDUCED_DECODE_PIXELS = 89_478_485
+
+    # 출력 형식별 기본 확장자
+    FORMAT_EXTENSIONS: Dict[str, str] = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
 
-    def __init__(self, resize_size: Optional[int] = None, 
+    def __init__(self, resize_size: Optional[Union[int, Sequence[int]]] = None, 
                  padding_color: str = 'black',
-                 save_as_png: bool = False):
-        self.resize_size = resize_size
+                 save_as_png: bool = False,
+                 stats: Optional[StageTimer] = None,
+                 encoder_profile: str = 'balanced',
+                 save_as_webp: bool = False,
+                 output_formats: Optional[Sequence[str]] = None,
+                 max_pixels: Optional[int] = None,
+                 copy_strategy: str = 'auto'):
+        if encoder_profile not in self.ENCODER_PROFILES:
+            raise ValueError(f"알 수 없는 인코더 프로필: {encoder_profile}")
+        sizes = [resize_size] if isinstance(resize_size, int) else list(resize_size or [])
+        # 여러 크기를 요청하면 큰 크기부터 차례로 줄여 나갑니다.
+        self.resize_sizes: List[int] = sorted(set(sizes), reverse=True)
+        self.resize_size = self.resize_sizes[0] if self.resize_sizes else None
+        self.output_formats: List[str] = [format.upper() for format in output_formats or []]
+        for format in self.output_formats:
+            if format not in self.FORMAT_EXTENSIONS:
+                raise ValueError(f"지원하지 않는 출력 형식: {format}")
         self.padding_color = padding_color
         self.save_as_png = save_as_png
+        self.save_as_webp = save_as_webp
+        self.encoder_profile = encoder_profile
+        # 이 픽셀 수를 넘는 원본은 전체 해상도로 디코드하지 않고 축소 디코드 경로로 처리합니다. (0 이면 사용 안 함)
+        self.max_pixels = max_pixels if max_pixels is not None else self.REDUCED_DECODE_PIXELS
+        # 큰 이미지는 Pillow 의 전역 검사 대신 위 기준으로 판단합니다.
+        use_explicit_pixel_checks()
+        self.stats = stats if stats is not None else StageTimer()
+        # 변환 없이 원본을 그대로 내보낼 때 사용할 복사 방식 (reflink/hardlink/symlink/kernel/copy)
+        self.copier = FileCopier(copy_strategy, self.stats)
+        # capture() 중인 스레드의 출력 목록
+        self._local = threading.local()
         self.logger = logging.getLogger(__name__)
 
-    def resize_image(self, image_path: Path, output_path: Path, size: int = 512) -> None:
+    @contextmanager
+    def capture(self):
         """
-        이미지를 지정된 크기로 리사이즈합니다. 비율을 유지하며 패딩을 추가합니다.
+        with 블록 안에서 현재 스레드가 저장하는 출력을 파일로 쓰지 않고 (출력 경로, 바이트) 목록으로 모읍니다.
+        tar 샤드처럼 파일 대신 다른 곳에 결과를 쓰는 출력에 사용합니다.
+        """
+        outputs: List[Tuple[Path, bytes]] = []
+        self._local.outputs = outputs
+        try:
+            yield outputs
+        finally:
+            self._local.outputs = None
+
+    @contextmanager
+    def capture_pixels(self):
+        """
+        with 블록 안에서 현재 스레드가 저장하는 리사이즈 결과의 (크기, 최종 이미지) 목록을 모읍니다.
+        파일 저장은 그대로 하며, 텐서 캐시처럼 디코드된 픽셀이 필요한 출력에 사용합니다.
+        이 동안에는 픽셀이 필요하므로 원본 바이트 통과 복사를 하지 않습니다.
+        """
+        pixels: List[Tuple[int, Image.Image]] = []
+        self._local.pixels = pixels
+        try:
+            yield pixels
+        finally:
+            self._local.pixels = None
+
+    def _write_output(self, output_path: Path, data) -> None:
+        outputs = getattr(self._local, 'outputs', None)
+        if outputs is not None:
+            outputs.append((output_path, bytes(data)))
+            return
+        with self.stats.stage('write'):
+            with open(output_path, 'wb') as f:
+                f.write(data)
+
+    def _copy_output(self, src_path: Path, output_path: Path) -> None:
+        outputs = getattr(self._local, 'outputs', None)
+        if outputs is not None:
+            with self.stats.stage('read'):
+                outputs.append((output_path, src_path.read_bytes()))
+            return
+        with self.stats.stage('copy'):
+            if isinstance(src_path, Path):
+                self.copier.copy(src_path, output_path)
+            else:
+                # 아카이브 멤버는 링크/커널 복사를 쓸 수 없으므로 스트림으로 복사합니다.
+                with src_path.open('rb') as fsrc, open(output_path, 'wb') as fdst:
+                    shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+                self.stats.add('copy[stream]')
+
+    def _save(self, img: Image.Image, output_path: Path, format: Optional[str] = None) -> Path:
+        """
+        이미지를 인코더 프로필 옵션으로 메모리에서 인코딩한 뒤 파일로 씁니다.
+        인코딩 시간과 출력 크기는 형식/프로필별로 따로 기록합니다.
+        """
+        if format is None:
+            format = Image.registered_extensions().get(output_path.suffix.lower(), 'JPEG')
+        params = self.ENCODER_PROFILES[self.encoder_profile].get(format, {})
+        label = f"{format.lower()}/{self.encoder_profile}"
+        buffer = io.BytesIO()
+        with self.stats.stage(f'encode[{label}]'):
+            img.save(buffer, format, **params)
+        data = buffer.getbuffer()
+        self._write_output(output_path, data)
+        self.stats.add('bytes_out', data.nbytes)
+        self.stats.add(f'bytes_out[{label}]', data.nbytes)
+        return output_path
+
+    def _output_format(self) -> Optional[str]:
+        """
+        저장 옵션에 따른 출력 형식을 반환합니다. None 이면 원본 확장자의 형식을 사용합니다.
+        """
+        if len(self.output_formats) == 1:
+            return self.output_formats[0]
+        if self.save_as_webp:
+            return 'WEBP'
+        if self.save_as_png or self.padding_color == 'transparent':
+            return 'PNG'
+        return None
+
+    def variants(self) -> List[Tuple[Optional[int], Optional[str], str]]:
+        """
+        한 번의 디코드로 만들 출력 목록을 반환합니다.
+
+        크기와 형식이 하나씩이면 출력 폴더에 바로 저장하고(하위 폴더 ''),
+        여러 개면 크기별 폴더({size}) 또는 크기/형식별 폴더({size}_{format})에 나눠 저장합니다.
+
+        Returns:
+            List[Tuple[Optional[int], Optional[str], str]]: (크기, 형식, 하위 폴더) 목록. 큰 크기부터 정렬됩니다.
+        """
+        sizes = self.resize_sizes or [None]
+        formats = self.output_formats or [self._output_format()]
+        if len(sizes) == 1 and len(formats) == 1:
+            return [(sizes[0], formats[0], '')]
+
+        variants = []
+        for size in sizes:
+            for format in formats:
+                parts = [str(size)] if size else []
+                if len(formats) > 1 or not size:
+                    parts.append((format or 'original').lower())
+                variants.append((size, format, '_'.join(parts)))
+        return variants
+
+    def _padding_rgb(self) -> Tuple[int, int, int]:
+        # transparent 로 알파를 저장할 수 없는 형식(JPEG)에는 검정 배경을 사용합니다.
+        return {'white': (255, 255, 255),
+                'black': (0, 0, 0)}.get(self.padding_color, (0, 0, 0))
+
+    def _composite_on_canvas(self, img: Image.Image, size: int, keep_alpha: bool) -> Image.Image:
+        """
+        리사이즈된 이미지를 size x size 캔버스 중앙에 놓습니다.
+        알파가 있으면 캔버스의 패딩 색상 위에 합성하고, keep_alpha 이면 투명 캔버스에 알파를 유지합니다.
+        """
+        paste_x = (size - img.width) // 2
+        paste_y = (size - img.height) // 2
+
+        if keep_alpha:
+            canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+            canvas.paste(img, (paste_x, paste_y))
+            return canvas
+
+        canvas = Image.new('RGB', (size, size), self._padding_rgb())
+        if img.mode in ('RGBA', 'LA'):
+            canvas.paste(img, (paste_x, paste_y), img)
+        else:
+            canvas.paste(img.convert('RGB'), (paste_x, paste_y))
+        return canvas
+
+    def _flatten(self, img: Image.Image) -> Image.Image:
+        """
+        리사이즈 없이 알파를 패딩 색상 위에 합성해 RGB 로 만듭니다.
+        """
+        if img.mode not in ('RGBA', 'LA'):
+            return img.convert('RGB')
+        background = Image.new('RGB', img.size, self._padding_rgb())
+        background.paste(img, (0, 0), img)
+        return background
+
+    @staticmethod
+    def _fit(width: int, height: int, size: int) -> Tuple[int, int]:
+        # 긴 변을 size 에 맞추고 비율을 유지한 크기
+        aspect_ratio = width / height
+        if aspect_ratio > 1:
+            return size, int(size / aspect_ratio)
+        return int(size * aspect_ratio), size
+
+    def _resolve_format(self, format: Optional[str], output_path: Path) -> Tuple[str, Path]:
+        """
+        출력 형식을 정하고 확장자가 형식과 다르면 바꾼 출력 경로를 반환합니다.
+        형식이 None 이면 출력 경로의 확장자를 따릅니다.
+        """
+        if format is None:
+            return Image.registered_extensions().get(output_path.suffix.lower(), 'JPEG'), output_path
+        if Image.registered_extensions().get(output_path.suffix.lower()) != format:
+            output_path = output_path.with_suffix(self.FORMAT_EXTENSIONS[format])
+        return format, output_path
+
+    def _pass_through_path(self, probe: ImageProbe, size: Optional[int], format: Optional[str],
+                           output_path: Path) -> Optional[Path]:
+        """
+        원본이 이미 결과와 같은 이미지(목표 크기의 정사각형, 같은 모드와 형식)인지 헤더 정보로 확인합니다.
+        그렇다면 디코드/재인코딩 없이 바이트를 복사할 출력 경로를, 아니면 None 을 반환합니다.
+        """
+        if not size or not probe.ok or probe.animated:
+            return None
+        if probe.width != size or probe.height != size:
+            return None
+        format, output_path = self._resolve_format(format, output_path)
+        if probe.format != format:
+            return None
+        keep_alpha = self.padding_color == 'transparent' and format != 'JPEG'
+        if probe.mode != ('RGBA' if keep_alpha else 'RGB'):
+            return None
+        return output_path
+
+    def _save_variant(self, img: Image.Image, size: Optional[int], format: Optional[str], output_path: Path) -> Path:
+        """
+        리사이즈된 이미지(또는 원본)를 패딩/합성한 뒤 지정 형식으로 저장합니다.
+        """
+        format, output_path = self._resolve_format(format, output_path)
+        keep_alpha = self.padding_color == 'transparent' and format != 'JPEG'
+
+        with self.stats.stage('composite'):
+            if size:
+                out = self._composite_on_canvas(img, size, keep_alpha)
+            elif keep_alpha or (img.mode in ('RGBA', 'LA') and format != 'JPEG'):
+                out = img
+            else:
+                out = self._flatten(img)
+        pixels = getattr(self._local, 'pixels', None)
+        if pixels is not None and size:
+            pixels.append((size, out))
+        return self._save(out, output_path, format)
+
+    def _fan_out(self, img: Image.Image, targets: List[Tuple[Optional[int], Optional[str], Path]]) -> List[Path]:
+        # 모드 정리: 알파가 있는 이미지는 그대로 두고 합성은 목표 크기에서 합니다.
+        with self.stats.stage('convert'):
+            if img.mode == 'P' and 'transparency' in img.info:
+                img = img.convert('RGBA')
+            elif img.mode not in ('RGB', 'RGBA', 'LA'):
+                img = img.convert('RGB')
+
+        width, height = img.size
+        resized: Dict[int, Image.Image] = {}
+        current = img
+        results: List[Optional[Path]] = [None] * len(targets)
+        # 큰 크기부터 처리해 각 크기를 바로 위 크기의 결과에서 줄입니다. (리사이즈 없는 출력이 가장 먼저)
+        order = sorted(range(len(targets)), key=lambda i: -(targets[i][0] or float('inf')))
+        for index in order:
+            size, format, output_path = targets[index]
+            if size and size not in resized:
+                # 리사이즈 (Pillow 는 RGBA/LA 를 RGBa/La 로 premultiply 해서 리샘플링하므로 가장자리 색이 번지지 않습니다)
+                with self.stats.stage('resize'):
+                    current = current.resize(self._fit(width, height, size), Image.Resampling.LANCZOS)
+                resized[size] = current
+            results[index] = self._save_variant(resized[size] if size else img, size, format, output_path)
+        return results
+
+    def process_variants(self, src_path: Path,
+                         targets: List[Tuple[Optional[int], Optional[str], Path]],
+                         probe: Optional[ImageProbe] = None, reduced: bool = False) -> List[Path]:
         """
+        원본을 한 번만 디코드해 여러 크기/형식의 결과를 저장합니다.
+        원본이 이미 결과와 같은 출력은 디코드 없이 바이트를 그대로 복사합니다.
+
+        Args:
+            src_path (Path): 원본 이미지 경로
+            targets (List[Tuple[Optional[int], Optional[str], Path]]): (크기, 형식, 출력 경로) 목록.
+                크기가 None 이면 리사이즈 없이 저장하고, 형식이 None 이면 출력 경로의 확장자를 따릅니다.
+            probe (Optional[ImageProbe]): 미리 읽어 둔 헤더 정보 (없으면 여기서 읽음)
+            reduced (bool): 전체 해상도 디코드 대신 축소 디코드 경로를 사용할지 여부
+
+        Returns:
+            List[Path]: targets 순서대로 저장된 경로 (형식에 따라 확장자가 바뀔 수 있음)
+        """
+        if probe is None:
+            with self.stats.stage('probe'):
+                probe = probe_image(src_path)
+
+        results: List[Optional[Path]] = [None] * len(targets)
+        remaining = []
+        for index, (size, format, output_path) in enumerate(targets):
+            pass_through = None
+            if getattr(self._local, 'pixels', None) is None:
+                pass_through = self._pass_through_path(probe, size, format, output_path)
+            if pass_through is None:
+                remaining.append(index)
+                continue
+            self._copy_output(src_path, pass_through)
+            if self.stats.enabled:
+                self.stats.add('pass_through')
+                self.stats.add('bytes_in', probe.file_size)
+                self.stats.add('bytes_out', probe.file_size)
+            results[index] = pass_through
+
+        if self.max_pixels and probe.ok and probe.pixels > self.max_pixels:
+            reduced = True
+
+        if remaining:
+            decoded = self._decode_and_fan_out(src_path, [targets[index] for index in remaining], reduced)
+            for index, path in zip(remaining, decoded):
+                results[index] = path
+        return results
+
+    def _decode_and_fan_out(self, src_path: Path, targets: List[Tuple[Optional[int], Optional[str], Path]],
+                            reduced: bool = False) -> List[Path]:
+        # 리사이즈 없는 출력이 있으면 전체 해상도가 필요하므로 축소 디코드를 하지 않습니다.
+        if any(size is None for size, _, _ in targets):
+            reduced = False
         try:
-            with Image.open(image_path) as img:
-                # 알파 채널 처리
-                if img.mode in ('RGBA', 'LA') and self.padding_color != 'transparent':
-                    background = Image.new('RGB', img.size, self.padding_color)
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-                elif img.mode != 'RGB' and self.padding_color != 'transparent':
-                    img = img.convert('RGB')
-
-                # 비율 계산
-                width, height = img.size
-                aspect_ratio = width / height
-
-                if aspect_ratio > 1:
-                    new_width = size
-                    new_height = int(size / aspect_ratio)
-                else:
-                    new_height = size
-                    new_width = int(size * aspect_ratio)
-
-                # 리사이즈
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-                # 패딩 처리
-                if self.padding_color == 'transparent':
-                    new_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-                else:
-                    padding_color = {'white': (255, 255, 255), 
-                                   'black': (0, 0, 0)}.get(self.padding_color, (0, 0, 0))
-                    new_img = Image.new('RGB', (size, size), padding_color)
-
-                # 중앙에 배치
-                paste_x = (size - new_width) // 2
-                paste_y = (size - new_height) // 2
-                
-                if self.padding_color == 'transparent':
-                    new_img.paste(img, (paste_x, paste_y), img if img.mode == 'RGBA' else None)
-                else:
-                    new_img.paste(img, (paste_x, paste_y))
-
-                # 저장
-                if self.padding_color == 'transparent' or self.save_as_png:
-                    new_img.save(output_path.with_suffix('.png'), 'PNG')
-                else:
-                    new_img.save(output_path, quality=95, optimize=True)
-
-        except Image.DecompressionBombError:
-            self.logger.warning(f"큰 이미지 처리 중: {image_path}")
-            with Image.open(image_path) as img:
-                img.thumbnail((size, size), Image.Resampling.LANCZOS)
-                if self.padding_color == 'transparent':
-                    new_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-                else:
-                    padding_color = {'white': (255, 255, 255), 
-                                   'black': (0, 0, 0)}.get(self.padding_color, (0, 0, 0))
-                    new_img = Image.new('RGB', (size, size), padding_color)
-                
-                width, height = img.size
-                paste_x = (size - width) // 2
-                paste_y = (size - height) // 2
-                new_img.paste(img, (paste_x, paste_y))
-                
-                if self.padding_color == 'transparent' or self.save_as_png:
-                    new_img.save(output_path.with_suffix('.png'), 'PNG')
-                else:
-                    new_img.save(output_path, quality=95, optimize=True)
+            with src_path.open('rb') as f, Image.open(f) as img:
+                with self.stats.stage('decode'):
+                    if reduced:
+                        self.logger.info(f"큰 이미지 축소 디코드: {src_path}")
+                        self.stats.add('reduced')
+                        img = decode_reduced(img, max(size for size, _, _ in targets))
+                    else:
+                        img.load()
+                if self.stats.enabled:
+                    self.stats.add('bytes_in', src_path.stat().st_size)
+                    self.stats.add('pixels', img.width * img.height)
+                return self._fan_out(img, targets)
 
         except Exception as e:
             self.logger.error(f"이미지 처리 중 오류 발생: {str(e)}")
             raise
 
+    def resize_image(self, image_path: Path, output_path: Path, size: int = 512,
+                     probe: Optional[ImageProbe] = None, reduced: bool = False) -> Path:
+        """
+        이미지를 지정된 크기로 리사이즈합니다. 비율을 유지하며 패딩을 추가합니다.
+
+        Returns:
+            Path: 저장된 이미지 경로
+        """
+        return self.process_variants(image_path, [(size, self._output_format(), output_path)], probe, reduced)[0]
+
     @staticmethod
     def find_all_images(input_path: Path) -> List[Path]:
         """
         입력 경로의 모든 하위 폴더에서 이미지 파일을 찾습니다.
+        입력 경로가 zip/tar 아카이브이면 풀지 않고 아카이브 안의 이미지 멤버를 반환합니다.
 
         Args:
-            input_path (Path): 검색할 루트 경로
+            input_path (Path): 검색할 루트 경로 또는 아카이브 파일
 
         Returns:
-            List[Path]: 발견된 모든 이미지 파일의 경로 리스트
+            List[Path]: 발견된 모든 이미지 파일의 경로 리스트 (아카이브이면 ArchiveMember 리스트)
         """
+        if is_archive(input_path):
+            return ArchiveSource(input_path).find_images(ImageProcessor.SUPPORTED_EXTENSIONS)
+
         image_files = set()  # 중복 제거를 위해 set 사용
         for ext in ImageProcessor.SUPPORTED_EXTENSIONS:
             # 대소문자 구분 없이 한 번만 검색
@@ -115,28 +435,47 @@ class ImageProcessor:
         # 정렬된 리스트로 반환
         return sorted(list(image_files))
 
-    def process_image(self, src_path: Path, dest_path: Path) -> Path:
+    def process_image(self, src_path: Path, dest_path: Path, probe: Optional[ImageProbe] = None,
+                      reduced: bool = False) -> Path:
         """
         이미지를 처리하고 저장합니다.
+
+        Args:
+            src_path (Path): 원본 이미지 경로
+            dest_path (Path): 출력 경로
+            probe (Optional[ImageProbe]): 미리 읽어 둔 헤더 정보
+            reduced (bool): 축소 디코드 경로 사용 여부 (리사이즈할 때만 적용)
         """
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
         if self.resize_size:
-            if self.save_as_png:
-                # PNG로 저장할 경우 바로 PNG 확장자로 저장
-                dest_path = dest_path.with_suffix('.png')
-            self.resize_image(src_path, dest_path, self.resize_size)
+            dest_path = self.resize_image(src_path, dest_path, self.resize_size, probe, reduced)
+        elif self.output_formats:
+            dest_path = self.process_variants(src_path, [(None, self.output_formats[0], dest_path)],
+                                              probe, reduced)[0]
         else:
-            if self.save_as_png:
-                # 리사이즈 없이 PNG로 변환만 할 경우
-                dest_path = dest_path.with_suffix('.png')
-                with Image.open(src_path) as img:
+            if self.save_as_png or self.save_as_webp:
+                # 리사이즈 없이 PNG/WebP로 변환만 할 경우
+                format = 'WEBP' if self.save_as_webp else 'PNG'
+                dest_path = dest_path.with_suffix(f".{format.lower()}")
+                with src_path.open('rb') as f, Image.open(f) as img:
+                    with self.stats.stage('decode'):
+                        img.load()
+                    if self.stats.enabled:
+                        self.stats.add('bytes_in', src_path.stat().st_size)
+                        self.stats.add('pixels', img.width * img.height)
                     if img.mode == 'RGBA' or self.padding_color == 'transparent':
-                        img.save(dest_path, 'PNG')
+                        self._save(img, dest_path, format)
                     else:
-                        img.convert('RGB').save(dest_path, 'PNG')
+                        with self.stats.stage('composite'):
+                            img = img.convert('RGB')
+                        self._save(img, dest_path, format)
             else:
                 # 그대로 복사
-                copy2(src_path, dest_path)
+                self._copy_output(src_path, dest_path)
+                if self.stats.enabled:
+                    size = src_path.stat().st_size
+                    self.stats.add('bytes_in', size)
+                    self.stats.add('bytes_out', size)
             
         return dest_path 
\ No newline at end of file
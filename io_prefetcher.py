@@ -0,0 +1,182 @@
+# io_prefetcher.py
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import io
+import logging
+import queue
+import threading
+import time
+
+from stage_timer import StageTimer
+
+# 기본 읽기 예산 (읽어 두었지만 아직 처리가 끝나지 않은 파일 바이트의 합)
+DEFAULT_PREFETCH_MB = 256
+
+
+class PrefetchedFile:
+    """
+    메모리에 미리 읽어 둔 입력 파일입니다. 처리 코드가 쓰는 Path 의 일부(name, stem, suffix, open('rb'),
+    read_bytes(), stat())를 흉내 내므로, 디코드 작업자는 파일 대신 이 버퍼에서 이미지를 엽니다.
+    처리가 끝나면 release() 로 읽기 예산을 돌려줘야 합니다.
+    """
+
+    def __init__(self, source, data: bytes, stat, prefetcher: 'Prefetcher', cost: int):
+        self.source = source
+        self.data = data
+        self._stat = stat
+        self._prefetcher = prefetcher
+        self._cost = cost
+
+    @property
+    def name(self) -> str:
+        return self.source.name
+
+    @property
+    def stem(self) -> str:
+        return self.source.stem
+
+    @property
+    def suffix(self) -> str:
+        return self.source.suffix
+
+    def open(self, mode: str = 'rb') -> BinaryIO:
+        if mode != 'rb':
+            raise ValueError(f"미리 읽은 파일은 'rb' 로만 열 수 있습니다: {mode}")
+        return io.BytesIO(self.data)
+
+    def read_bytes(self) -> bytes:
+        return self.data
+
+    def stat(self):
+        return self._stat
+
+    def release(self) -> None:
+        if self._prefetcher is not None:
+            self._prefetcher._release(self._cost)
+            self._prefetcher = None
+            self.data = b''
+
+    def __str__(self) -> str:
+        return str(self.source)
+
+
+class Prefetcher:
+    """
+    CPU 작업자와 별도인 작은 I/O 스레드 풀로, 앞으로 처리할 파일들을 순서대로 메모리에 미리 읽습니다.
+
+    - 읽어 두었지만 아직 release() 되지 않은 바이트의 합이 예산을 넘지 않도록 다음 읽기를 미룹니다.
+      예산보다 큰 파일은 앞선 버퍼가 모두 반환된 뒤 혼자 읽습니다.
+    - 반복하면 입력 순서대로 (경로, PrefetchedFile) 을 돌려줍니다. 읽기에 실패한 파일은 버퍼 대신 None 을
+      돌려주므로, 처리 쪽에서 원래 경로로 다시 열어 평소처럼 오류를 보고합니다.
+    - 네트워크 드라이브처럼 지연이 큰 입력에서 읽기와 디코드를 겹치고, 두 쪽의 동시 작업 수를 따로 조절할 수 있습니다.
+    """
+
+    def __init__(self, paths: List, io_workers: int = 4, budget_bytes: Optional[int] = None,
+                 sizes: Optional[Dict] = None, stats: Optional[StageTimer] = None):
+        self.paths = list(paths)
+        self.io_workers = max(1, io_workers)
+        self.budget_bytes = budget_bytes or DEFAULT_PREFETCH_MB * 1024 * 1024
+        self.sizes = sizes or {}
+        self.stats = stats if stats is not None else StageTimer()
+        self.logger = logging.getLogger(__name__)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._peak = 0
+        self._closed = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._feeder: Optional[threading.Thread] = None
+        # 제출 순서대로 쌓이는 (경로, 읽기 Future). None 은 끝 표시
+        self._pending: 'queue.Queue[Optional[Tuple[object, Future]]]' = queue.Queue()
+
+    @property
+    def peak(self) -> int:
+        return self._peak
+
+    def __enter__(self) -> 'Prefetcher':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[object, Optional[PrefetchedFile]]]:
+        self._executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='prefetch')
+        self._feeder = threading.Thread(target=self._feed, name='prefetch-feeder', daemon=True)
+        self._feeder.start()
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            path, future = item
+            if not future.done():
+                # CPU 쪽이 읽기를 기다리는 시간 (길면 --io-workers 나 읽기 예산을 늘릴 여지가 있음)
+                start = time.perf_counter()
+                future.exception()
+                if self.stats.enabled:
+                    self.stats.add('prefetch_stall_ms', int((time.perf_counter() - start) * 1000))
+            yield path, future.result()
+
+    def _size(self, path) -> int:
+        size = self.sizes.get(path)
+        if not size:
+            try:
+                size = path.stat().st_size
+            except OSError:
+                size = 0
+        return size
+
+    def _feed(self) -> None:
+        try:
+            for path in self.paths:
+                cost = min(self._size(path), self.budget_bytes)
+                if not self._acquire(cost):
+                    return
+                try:
+                    future = self._executor.submit(self._read, path, cost)
+                except RuntimeError:
+                    # close() 로 풀이 이미 종료됨
+                    return
+                self._pending.put((path, future))
+        finally:
+            self._pending.put(None)
+
+    def _acquire(self, cost: int) -> bool:
+        with self._condition:
+            if self._in_flight + cost > self.budget_bytes:
+                self.stats.add('prefetch_waits')
+            while not self._closed and self._in_flight > 0 and self._in_flight + cost > self.budget_bytes:
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._in_flight += cost
+            self._peak = max(self._peak, self._in_flight)
+            return True
+
+    def _release(self, cost: int) -> None:
+        with self._condition:
+            self._in_flight -= cost
+            self._condition.notify_all()
+
+    def _read(self, path, cost: int) -> Optional[PrefetchedFile]:
+        try:
+            with self.stats.stage('prefetch'):
+                stat = path.stat()
+                with path.open('rb') as f:
+                    data = f.read()
+            if self.stats.enabled:
+                self.stats.add('prefetch_bytes', len(data))
+            return PrefetchedFile(path, data, stat, self, cost)
+        except Exception as e:
+            self.logger.debug(f"미리 읽기 실패, 처리 때 다시 읽습니다: {path} - {e}")
+            self._release(cost)
+            return None
+
+    def close(self) -> None:
+        """
+        남은 미리 읽기를 멈춥니다. 이미 돌려준 버퍼는 그대로 쓸 수 있습니다.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
@@ -5,6 +5,9 @@ from pathlib import Path
 import logging
 from process_manager import ProcessManager, ProcessingMode
 from image_duplicate_checker import ImageDuplicateChecker
+from run_profiler import RunProfiler
+from copy_strategy import COPY_STRATEGIES
+from rename_planner import undo_renames
 
 def setup_logging(debug_mode: bool):
     level = logging.DEBUG if debug_mode else logging.INFO
@@ -19,27 +22,85 @@ def setup_logging(debug_mode: bool):
 
 def main():
     parser = argparse.ArgumentParser(description='LoRA 학습용 이미지 전처리 도구')
-    parser.add_argument('input_path', type=str, help='입력 이미지 폴더 경로')
+    parser.add_argument('input_path', type=str, help='입력 이미지 폴더 경로 (zip/tar 아카이브 파일도 풀지 않고 바로 읽음)')
     parser.add_argument('output_path', type=str, help='출력 폴더 경로')
     parser.add_argument('--mode', type=str, 
-                       choices=['copy_only', 'copy_and_text', 'text_only', 'check_duplicates'],
+                       choices=['copy_only', 'copy_and_text', 'text_only', 'check_duplicates', 'rename_only',
+                                'import_captions', 'export_captions'],
                        default='copy_and_text', help='처리 모드 선택')
+    parser.add_argument('--captions', type=str, choices=['txt', 'manifest'], default='txt',
+                       help='캡션 저장 방식: txt=이미지별 .txt 파일, manifest=출력 폴더의 captions.jsonl 하나 '
+                            '(export_captions 모드로 .txt 를 만들 수 있음, 기본값: txt)')
+    parser.add_argument('--output-layout', type=str, choices=['folder', 'tar'], default='folder',
+                       help='출력 형태: folder=폴더에 파일로, tar=크기 제한 tar 샤드와 오프셋 색인으로 (기본값: folder)')
+    parser.add_argument('--shard-size-mb', type=int, default=1024,
+                       help='tar 샤드 하나의 최대 크기 MB (기본값: 1024)')
+    parser.add_argument('--tensor-cache', action='store_true',
+                       help='가장 큰 리사이즈 결과의 픽셀을 출력 폴더의 tensor_cache/ 에 memmap uint8 배열로도 저장 '
+                            '(--resize 필요, 여러 번 실행하면 이어 씀)')
+    parser.add_argument('--undo-rename', action='store_true',
+                       help='출력 폴더에서 마지막 rename_only 실행의 이름 변경을 되돌림')
     parser.add_argument('--workers', type=int, default=4, help='작업자 스레드 수 (기본값: 4)')
+    parser.add_argument('--schedule', type=str, choices=['largest', 'path'], default='largest',
+                       help='작업 순서: largest=예상 비용이 큰 이미지부터, path=경로 순서 (기본값: largest)')
     parser.add_argument('--debug', action='store_true', help='디버그 모드 활성화')
+    parser.add_argument('--stats', action='store_true',
+                       help='단계별 처리 통계를 수집해 출력 폴더에 process_stats.json으로 저장')
+    parser.add_argument('--profile', action='store_true',
+                       help='작업자 스레드를 포함한 전체 실행을 프로파일링해 출력 폴더의 profile/ 에 저장')
+    
+    parser.add_argument('--copy-strategy', type=str, choices=COPY_STRATEGIES, default='auto',
+                       help='변환 없이 복사할 때의 방식 (기본값: auto = reflink, 커널 복사, 일반 복사 순으로 시도). '
+                            'hardlink/symlink 는 추가 공간을 쓰지 않지만 출력이 원본과 연결됩니다')
+    parser.add_argument('--io-workers', type=int, default=0,
+                       help='입력 파일을 미리 읽는 I/O 스레드 수 (기본값: 0, 처리 작업자가 직접 읽음). '
+                            '네트워크 드라이브 입력에서 읽기와 디코드를 겹칠 때 사용')
+    parser.add_argument('--prefetch-mb', type=int, default=256,
+                       help='미리 읽어 둘 수 있는 입력 바이트 예산 MB (기본값: 256)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='디코드/리사이즈와 인코딩을 공유 메모리로 픽셀을 넘기는 별도 프로세스 단계로 실행 (--resize 필요)')
+    parser.add_argument('--decode-procs', type=int, default=2,
+                       help='파이프라인 모드의 디코드/리사이즈 프로세스 수 (기본값: 2)')
+    parser.add_argument('--encode-procs', type=int, default=2,
+                       help='파이프라인 모드의 인코드 프로세스 수 (기본값: 2, PNG 처럼 인코딩이 무거우면 늘림)')
+    parser.add_argument('--memory-budget-mb', type=int, default=None,
+                       help='동시에 디코드 중인 이미지의 추정 메모리 예산 MB (기본값: 물리 메모리의 절반)')
+    parser.add_argument('--max-megapixels', type=float, default=None,
+                       help='이 크기(메가픽셀)를 넘는 원본은 축소 디코드 경로로 처리 (기본값: 89.5, 0 이면 사용 안 함)')
     
     # 리사이즈 관련 인자
-    parser.add_argument('--resize', type=int, choices=[512, 1024], 
-                       help='이미지 리사이즈 크기 (512 또는 1024)')
+    parser.add_argument('--resize', type=int, nargs='+', metavar='SIZE',
+                       help='이미지 리사이즈 크기. 여러 개를 주면 한 번의 디코드로 크기별 폴더에 저장 (예: --resize 1024 512)')
+    parser.add_argument('--formats', type=str, nargs='+', choices=['jpeg', 'png', 'webp'],
+                       help='출력 형식. 여러 개를 주면 형식별 폴더에 함께 저장 (기본값: 원본 형식 또는 --save-as-png/webp)')
     parser.add_argument('--padding-color', type=str, choices=['white', 'black', 'transparent'],
                        default='black', help='패딩 색상 (기본값: black)')
     parser.add_argument('--save-as-png', action='store_true', 
                        help='리사이즈된 이미지를 PNG로 저장')
+    parser.add_argument('--save-as-webp', action='store_true',
+                       help='이미지를 무손실 WebP로 저장 (--save-as-png 보다 우선)')
+    parser.add_argument('--encoder-profile', type=str, choices=['fast', 'balanced', 'smallest'],
+                       default='balanced', help='인코딩 속도/크기 프로필 (기본값: balanced)')
     
     args = parser.parse_args()
+    if args.resize and any(size < 1 for size in args.resize):
+        parser.error('리사이즈 크기는 1 이상의 정수여야 합니다.')
+    if args.tensor_cache and not args.resize:
+        parser.error('--tensor-cache 는 --resize 와 함께 사용해야 합니다.')
+    if args.io_workers < 0 or args.prefetch_mb < 1:
+        parser.error('--io-workers 는 0 이상, --prefetch-mb 는 1 이상이어야 합니다.')
+    if args.pipeline and not args.resize:
+        parser.error('--pipeline 은 --resize 와 함께 사용해야 합니다.')
+    if args.decode_procs < 1 or args.encode_procs < 1:
+        parser.error('--decode-procs 와 --encode-procs 는 1 이상이어야 합니다.')
     
     setup_logging(args.debug)
     
     try:
+        if args.undo_rename:
+            print(f"{undo_renames(Path(args.output_path))}개 파일 이름을 되돌렸습니다.")
+            return
+
         processor = ProcessManager(
             input_path=Path(args.input_path),
             output_path=Path(args.output_path),
@@ -47,7 +108,25 @@ def main():
             max_workers=args.workers,
             resize_size=args.resize,
             padding_color=args.padding_color,
-            save_as_png=args.save_as_png
+            save_as_png=args.save_as_png,
+            save_as_webp=args.save_as_webp,
+            encoder_profile=args.encoder_profile,
+            output_formats=args.formats,
+            schedule=args.schedule,
+            memory_budget_mb=args.memory_budget_mb,
+            max_megapixels=args.max_megapixels,
+            copy_strategy=args.copy_strategy,
+            caption_format=args.captions,
+            output_layout=args.output_layout,
+            shard_size_mb=args.shard_size_mb,
+            tensor_cache=args.tensor_cache,
+            io_workers=args.io_workers,
+            prefetch_mb=args.prefetch_mb,
+            pipeline=args.pipeline,
+            decode_procs=args.decode_procs,
+            encode_procs=args.encode_procs,
+            collect_stats=args.stats,
+            profiler=RunProfiler(Path(args.output_path) / 'profile') if args.profile else None
         )
         processor.process_files()
         print("\n작업 완료!")
@@ -0,0 +1,111 @@
+# memory_governor.py
+
+from contextlib import contextmanager
+from typing import Optional
+import logging
+import os
+import threading
+import time
+
+from PIL import Image
+
+from image_probe import ImageProbe
+from stage_timer import StageTimer
+
+# 모드별 디코드된 픽셀 하나의 바이트 수 (Pillow 내부 표현 기준, 3채널도 4바이트로 저장됨)
+BYTES_PER_PIXEL = {
+    '1': 1, 'L': 1, 'P': 1, 'LA': 4, 'La': 4, 'PA': 4,
+    'RGB': 4, 'RGBA': 4, 'RGBa': 4, 'RGBX': 4, 'CMYK': 4, 'YCbCr': 4, 'LAB': 4, 'HSV': 4,
+    'I': 4, 'F': 4, 'I;16': 2, 'I;16B': 2, 'I;16L': 2,
+}
+
+# 디코드 버퍼 외에 모드 변환(P -> RGBA 등)과 리사이즈 중간 버퍼가 동시에 살아 있는 배수
+WORKING_COPIES = 2
+
+
+def use_explicit_pixel_checks() -> None:
+    """
+    Pillow 의 전역 DecompressionBomb 검사를 끄고 MemoryGovernor 의 헤더 기반 검사로 대신합니다.
+    Pillow 의 MAX_IMAGE_PIXELS 는 모든 스레드에 공통인 값이라 동시에 디코드 중인 양을 제한하지 못합니다.
+    """
+    Image.MAX_IMAGE_PIXELS = None
+
+
+def default_budget_bytes() -> int:
+    """
+    기본 메모리 예산으로 물리 메모리의 절반을 반환합니다. 알 수 없으면 4GB 를 사용합니다.
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):
+        return 4 * 1024 ** 3
+
+
+def estimate_decode_bytes(probe: Optional[ImageProbe]) -> int:
+    """
+    헤더 정보로 이미지 하나를 디코드하고 처리하는 동안 필요한 메모리를 추정합니다.
+    """
+    if probe is None or not probe.ok:
+        return 0
+    return probe.pixels * BYTES_PER_PIXEL.get(probe.mode, 4) * WORKING_COPIES
+
+
+class MemoryGovernor:
+    """
+    동시에 디코드 중인 이미지의 추정 메모리 합이 예산을 넘지 않도록 작업 시작을 조절합니다.
+
+    - 예산 안에 들어가는 작업은 바로 시작합니다.
+    - 예산이 부족하면 앞선 작업이 끝날 때까지 기다립니다.
+    - 혼자서 예산을 넘는 작업은 진행 중인 작업이 모두 끝난 뒤 단독으로 실행하며,
+      is_oversized() 로 확인해 축소 디코드 경로로 보낼 수 있습니다.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, stats: Optional[StageTimer] = None):
+        self.budget_bytes = budget_bytes or default_budget_bytes()
+        self.stats = stats if stats is not None else StageTimer()
+        self.logger = logging.getLogger(__name__)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._peak = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def peak(self) -> int:
+        return self._peak
+
+    def is_oversized(self, cost: int) -> bool:
+        return cost > self.budget_bytes
+
+    @contextmanager
+    def reserve(self, cost: int):
+        """
+        cost 바이트를 예약한 상태로 with 블록을 실행합니다. 예산이 날 때까지 기다립니다.
+
+        Args:
+            cost (int): 추정 메모리 사용량 (바이트)
+        """
+        if cost <= 0:
+            yield
+            return
+
+        # 예산보다 큰 작업은 예산 전체를 차지해 단독으로 실행되게 합니다.
+        cost = min(cost, self.budget_bytes)
+        with self._condition:
+            if self._in_flight + cost > self.budget_bytes:
+                self.stats.add('governor_waits')
+                start = time.perf_counter()
+                while self._in_flight > 0 and self._in_flight + cost > self.budget_bytes:
+                    self._condition.wait()
+                if self.stats.enabled:
+                    self.stats.add('governor_wait_ms', int((time.perf_counter() - start) * 1000))
+            self._in_flight += cost
+            self._peak = max(self._peak, self._in_flight)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= cost
+                self._condition.notify_all()
@@ -1,10 +1,67 @@
 import os
+import sys
+import importlib.util
 import folder_paths
 from PIL import Image
 from pathlib import Path
 from .utils.image_processor import ImageProcessor
 import datetime
 
+_ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def _load_root_module(name, dependencies=None):
+    """
+    저장소 루트의 공용 모듈을 파일 경로로 불러옵니다.
+    sys.path 에 루트를 넣지 않으므로 다른 커스텀 노드나 패키지의 같은 이름 모듈과 섞이지 않습니다.
+
+    Args:
+        name (str): 루트의 모듈 이름 (파일 이름에서 .py 를 뺀 것)
+        dependencies (dict): 그 모듈이 최상위 이름으로 import 하는 루트 모듈 {이름: 모듈}.
+            모듈을 실행하는 동안만 sys.modules 에 그 이름으로 두고, 끝나면 원래대로 되돌립니다.
+
+    Returns:
+        module: 불러온 모듈 (sys.modules 에는 이 패키지 아래의 고유한 이름으로 등록)
+    """
+    module_name = f"{__name__}._root_{name}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, _ROOT_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    dependencies = dependencies or {}
+    saved = {dep: sys.modules.get(dep) for dep in dependencies}
+    sys.modules.update(dependencies)
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[module_name]
+        raise
+    finally:
+        for dep, original in saved.items():
+            if original is None:
+                sys.modules.pop(dep, None)
+            else:
+                sys.modules[dep] = original
+    return module
+
+
+# 저장소 루트의 공용 모듈(진행 상황, 이름 변경, 텍스트 생성)을 노드에서도 사용
+_progress_tracker = _load_root_module('progress_tracker')
+_file_renamer = _load_root_module('file_renamer')
+_caption_manifest = _load_root_module('caption_manifest')
+_generate_txt = _load_root_module('generateTxt_Function', {'caption_manifest': _caption_manifest,
+                                                           'file_renamer': _file_renamer})
+
+ProgressTracker, print_progress = _progress_tracker.ProgressTracker, _progress_tracker.print_progress
+FileRenamer, NumberIndex = _file_renamer.FileRenamer, _file_renamer.NumberIndex
+TextFileGenerator = _generate_txt.TextFileGenerator
+
+try:
+    from comfy.utils import ProgressBar
+except ImportError:
+    ProgressBar = None
+
 class LoraPreprocessorLoader:
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
@@ -34,6 +91,8 @@ class LoraPreprocessorLoader:
                 "resize_size": (["512", "1024"], {"default": "512"}),
                 "padding_color": (["white", "black", "transparent"], {"default": "black"}),
                 "save_as_png": ("BOOLEAN", {"default": True}),
+                "save_as_webp": ("BOOLEAN", {"default": False}),
+                "encoder_profile": (["fast", "balanced", "smallest"], {"default": "balanced"}),
             }
         }
     
@@ -44,7 +103,8 @@ class LoraPreprocessorLoader:
 
     def preprocess(self, input_folder, mode="copy_and_text", 
                   resize_enabled=False, resize_size="512", 
-                  padding_color="black", save_as_png=True):
+                  padding_color="black", save_as_png=True,
+                  save_as_webp=False, encoder_profile="balanced"):
         
         # 입력 폴더 경로 설정
         input_path = os.path.join(self.input_base_dir, input_folder)
@@ -58,27 +118,48 @@ class LoraPreprocessorLoader:
         processor = ImageProcessor(
             resize_size=int(resize_size) if resize_enabled else None,
             padding_color=padding_color,
-            save_as_png=save_as_png
+            save_as_png=save_as_png,
+            save_as_webp=save_as_webp,
+            encoder_profile=encoder_profile
         )
 
         # 입력 디렉토리의 모든 이미지 찾기
         image_files = [f for f in Path(input_path).glob("**/*") 
                       if f.suffix.lower() in processor.SUPPORTED_EXTENSIONS]
+
+        # CLI/GUI 와 같은 진행 상황 피드를 콘솔과 ComfyUI 진행 막대에 연결
+        progress_tracker = ProgressTracker()
+        progress_tracker.subscribe(print_progress)
+        if ProgressBar is not None:
+            pbar = ProgressBar(len(image_files))
+            progress_tracker.subscribe(lambda info: pbar.update_absolute(info.current, info.total))
+        progress_tracker.start_stage('process', len(image_files))
         
+        numbers = NumberIndex.from_directory(Path(output_path))
+        renamed_paths = []
         processed_count = 0
-        for idx, image_path in enumerate(image_files, 1):
+        for image_path in image_files:
             try:
                 temp_path = Path(output_path) / image_path.name
                 processed_path = processor.process_image(image_path, temp_path)
-                new_image_path = FileRenamer.rename_file(processed_path, idx)
-
-                if mode in ["copy_and_text", "text_only"]:
-                    TextFileGenerator.create_text_file(new_image_path)
+                new_image_path = FileRenamer.rename_to_next_number(processed_path, numbers)
+                renamed_paths.append(new_image_path)
                 
                 processed_count += 1
+                progress_tracker.update(1, f"처리 완료: {image_path.name}",
+                                        bytes_done=new_image_path.stat().st_size)
 
             except Exception as e:
                 print(f"파일 처리 중 오류 발생: {image_path} - {str(e)}")
+                progress_tracker.fail(1, f"오류: {image_path.name}")
+
+        progress_tracker.finish_stage()
+
+        # 텍스트 파일은 처리가 끝난 뒤 한꺼번에 생성
+        if mode in ["copy_and_text", "text_only"]:
+            progress_tracker.start_stage('caption', len(renamed_paths))
+            TextFileGenerator.create_text_files(renamed_paths, progress_tracker)
+            progress_tracker.finish_stage()
 
         results = {
             "processed_count": processed_count,
@@ -3,27 +3,53 @@ from pathlib import Path
 import shutil
 
 class ImageProcessor:
-    SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif'}
+    SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
 
-    def __init__(self, resize_size=None, padding_color='black', save_as_png=False):
+    # 인코더 프로필별 저장 옵션 (저장소 루트 image_processor.py 와 동일)
+    ENCODER_PROFILES = {
+        'fast': {
+            'PNG': {'compress_level': 1},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0'},
+            'WEBP': {'lossless': True, 'method': 0, 'quality': 0},
+        },
+        'balanced': {
+            'PNG': {'compress_level': 6},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0'},
+            'WEBP': {'lossless': True, 'method': 4, 'quality': 50},
+        },
+        'smallest': {
+            'PNG': {'compress_level': 9, 'optimize': True},
+            'JPEG': {'quality': 95, 'subsampling': '4:2:0', 'optimize': True, 'progressive': True},
+            'WEBP': {'lossless': True, 'method': 6, 'quality': 100},
+        },
+    }
+
+    def __init__(self, resize_size=None, padding_color='black', save_as_png=False,
+                 encoder_profile='balanced', save_as_webp=False):
         self.resize_size = resize_size
         self.padding_color = padding_color
         self.save_as_png = save_as_png
+        self.save_as_webp = save_as_webp
+        self.encoder_profile = encoder_profile
+
+    def _save(self, img, output_path, format):
+        img.save(output_path, format, **self.ENCODER_PROFILES[self.encoder_profile].get(format, {}))
 
     def process_image(self, src_path, dest_path):
         dest_path = Path(dest_path)
         dest_path.parent.mkdir(parents=True, exist_ok=True)
         
         if self.resize_size:
-            self.resize_image(src_path, dest_path, self.resize_size)
+            dest_path = self.resize_image(src_path, dest_path, self.resize_size)
         else:
-            if self.save_as_png:
-                dest_path = dest_path.with_suffix('.png')
+            if self.save_as_png or self.save_as_webp:
+                format = 'WEBP' if self.save_as_webp else 'PNG'
+                dest_path = dest_path.with_suffix(f'.{format.lower()}')
                 with Image.open(src_path) as img:
                     if img.mode == 'RGBA' or self.padding_color == 'transparent':
-                        img.save(dest_path, 'PNG')
+                        self._save(img, dest_path, format)
                     else:
-                        img.convert('RGB').save(dest_path, 'PNG')
+                        self._save(img.convert('RGB'), dest_path, format)
             else:
                 shutil.copy2(src_path, dest_path)
                 
@@ -37,16 +63,15 @@ class ImageProcessor:
             image_path (Path): 입력 이미지 경로
             output_path (Path): 출력 이미지 경로
             size (int): 목표 크기 (가로/세로)
+
+        Returns:
+            Path: 저장된 이미지 경로
         """
         with Image.open(image_path) as img:
-            # RGBA 이미지 처리
-            if img.mode == 'RGBA':
-                if self.padding_color != 'transparent':
-                    # 배경색으로 알파 채널 병합
-                    background = Image.new('RGB', img.size, self.padding_color)
-                    background.paste(img, mask=img.split()[3])
-                    img = background
-            elif img.mode != 'RGB':
+            # 알파가 있는 이미지는 그대로 두고 합성은 목표 크기에서 합니다.
+            if img.mode == 'P' and 'transparency' in img.info:
+                img = img.convert('RGBA')
+            elif img.mode not in ('RGB', 'RGBA', 'LA'):
                 img = img.convert('RGB')
 
             # 원본 이미지 비율 계산
@@ -60,33 +85,36 @@ class ImageProcessor:
                 new_height = size
                 new_width = int(size * aspect_ratio)
 
-            # 이미지 리사이즈
+            # 이미지 리사이즈 (RGBA/LA 는 Pillow 가 premultiply 해서 리샘플링)
             resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
-            # 패딩을 위한 새 이미지 생성
-            if self.padding_color == 'transparent' and self.save_as_png:
-                padded_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-            else:
-                padded_img = Image.new('RGB', (size, size), self.padding_color)
-
-            # 리사이즈된 이미지를 중앙에 배치
+            # 리사이즈된 이미지를 목표 크기 캔버스 중앙에 배치하며 알파 합성
             paste_x = (size - new_width) // 2
             paste_y = (size - new_height) // 2
 
-            if self.padding_color == 'transparent' and self.save_as_png:
-                padded_img.paste(resized_img, (paste_x, paste_y), 
-                               resized_img if resized_img.mode == 'RGBA' else None)
-            else:
+            keep_alpha = self.padding_color == 'transparent' and (self.save_as_png or self.save_as_webp)
+            if keep_alpha:
+                padded_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
                 padded_img.paste(resized_img, (paste_x, paste_y))
+            else:
+                # PNG 가 아니면 투명을 저장할 수 없으므로 검정 배경을 사용합니다.
+                background = self.padding_color if self.padding_color != 'transparent' else 'black'
+                padded_img = Image.new('RGB', (size, size), background)
+                if resized_img.mode in ('RGBA', 'LA'):
+                    padded_img.paste(resized_img, (paste_x, paste_y), resized_img)
+                else:
+                    padded_img.paste(resized_img.convert('RGB'), (paste_x, paste_y))
 
-            # 출력 경로 확장자 처리
-            if self.save_as_png:
-                output_path = output_path.with_suffix('.png')
+            # 출력 형식과 확장자 처리
+            if self.save_as_webp:
+                format = 'WEBP'
+            elif self.save_as_png:
+                format = 'PNG'
+            else:
+                format = 'JPEG'
+            if format != 'JPEG':
+                output_path = Path(output_path).with_suffix(f'.{format.lower()}')
 
             # 이미지 저장
-            if self.padding_color == 'transparent' and self.save_as_png:
-                padded_img.save(output_path, 'PNG')
-            else:
-                padded_img.convert('RGB').save(output_path, 
-                                             'PNG' if self.save_as_png else 'JPEG',
-                                             quality=95) 
\ No newline at end of file
+            self._save(padded_img if keep_alpha else padded_img.convert('RGB'), output_path, format)
+            return output_path 
\ No newline at end of file
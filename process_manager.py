@@ -1,18 +1,29 @@
 # process_manager.py
 
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Iterator, Optional, List, Sequence, Tuple, Union
 import logging
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import time
 from enum import Enum
-import threading
 
 from image_processor import ImageProcessor
-from file_renamer import FileRenamer
+from archive_source import ArchiveMember
+from io_prefetcher import Prefetcher, PrefetchedFile
+from shm_pipeline import ShmPipeline
+from file_renamer import FileRenamer, NumberIndex
+from rename_planner import execute_plan, journal_path, plan_renames
+from shard_writer import ShardWriter
+from tensor_cache import TensorCacheWriter
 from generateTxt_Function import TextFileGenerator
-from progress_tracker import ProgressTracker
+from caption_manifest import CaptionManifest
+from progress_tracker import ProgressTracker, print_progress
 from image_duplicate_checker import ImageDuplicateChecker
+from image_probe import ImageProbe, estimate_cost, probe_images
+from memory_governor import MemoryGovernor, estimate_decode_bytes
+from stage_timer import StageTimer
+from run_profiler import RunProfiler
 
 class ProcessingMode(Enum):
     COPY_ONLY = "copy_only"
@@ -20,11 +31,13 @@ class ProcessingMode(Enum):
     TEXT_ONLY = "text_only"
     CHECK_AND_REMOVE_DUPLICATES = "check_duplicates"
     RENAME_ONLY = "rename_only"
+    IMPORT_CAPTIONS = "import_captions"
+    EXPORT_CAPTIONS = "export_captions"
 
 class ProcessManager:
     def __init__(self, input_path: Path, output_path: Path, 
                  mode: ProcessingMode, max_workers: int = 4,
-                 resize_size: Optional[int] = None,
+                 resize_size: Optional[Union[int, Sequence[int]]] = None,
                  padding_color: str = 'black',
                  save_as_png: bool = False,
                  use_numbering: bool = True,
@@ -34,14 +47,70 @@ class ProcessManager:
                  suffix: str = "",
                  use_replace: bool = False,
                  replace_from: str = "",
-                 replace_to: str = ""):
+                 replace_to: str = "",
+                 collect_stats: bool = False,
+                 profiler: Optional[RunProfiler] = None,
+                 encoder_profile: str = 'balanced',
+                 save_as_webp: bool = False,
+                 output_formats: Optional[Sequence[str]] = None,
+                 schedule: str = 'largest',
+                 memory_budget_mb: Optional[int] = None,
+                 max_megapixels: Optional[float] = None,
+                 copy_strategy: str = 'auto',
+                 caption_format: str = 'txt',
+                 output_layout: str = 'folder',
+                 shard_size_mb: int = 1024,
+                 tensor_cache: bool = False,
+                 io_workers: int = 0,
+                 prefetch_mb: int = 256,
+                 pipeline: bool = False,
+                 decode_procs: int = 2,
+                 encode_procs: int = 2):
         self.input_path = input_path
         self.output_path = output_path
         self.mode = mode
         self.max_workers = max_workers
-        self.progress_tracker = None
+        self.schedule = schedule
+        # 입력 미리 읽기: CPU 작업자와 별도인 I/O 스레드 수 (0 이면 작업자가 직접 읽음)와 읽기 예산
+        self.io_workers = io_workers
+        self.prefetch_mb = prefetch_mb
+        # 디코드/리사이즈와 인코딩을 공유 메모리로 연결된 별도 프로세스 단계로 실행할지 여부와 단계별 프로세스 수
+        self.pipeline = pipeline
+        self.decode_procs = decode_procs
+        self.encode_procs = encode_procs
+        # 캡션 저장 방식: txt = 이미지별 .txt 파일, manifest = 출력 폴더의 captions.jsonl 하나
+        self.caption_format = caption_format
+        # 이름 변경 중 함께 갱신할 캡션 매니페스트 (출력 폴더에 있을 때만 읽음)
+        self.manifest: Optional[CaptionManifest] = None
+        # 출력 형태: folder = 출력 폴더에 파일로, tar = 크기 제한이 있는 tar 샤드로 (WebDataset)
+        self.output_layout = output_layout
+        self.shard_size_mb = shard_size_mb
+        self.shard_writer: Optional[ShardWriter] = None
+        # 가장 큰 리사이즈 결과의 픽셀을 출력 폴더의 tensor_cache/ 에 memmap 배열로도 저장할지 여부
+        self.use_tensor_cache = tensor_cache
+        self.tensor_cache: Optional[TensorCacheWriter] = None
+        # 처리 뒤 이름 변경 결과 (처리 중 경로 -> 최종 경로), 텐서 캐시 색인의 이름을 맞추는 데 사용
+        self._renamed: Dict[Path, Path] = {}
+        # 모든 모드가 같은 진행 상황 피드를 사용합니다. GUI 등은 process_files() 전에 구독합니다.
+        self.progress_tracker = ProgressTracker()
+        self.progress_tracker.subscribe(print_progress)
         self.logger = logging.getLogger(__name__)
-        self.image_processor = ImageProcessor(resize_size, padding_color, save_as_png)
+        self.stats = StageTimer(enabled=collect_stats)
+        self.profiler = profiler
+        # 파이프라인 프로세스도 같은 설정의 ImageProcessor 를 만들 수 있도록 옵션을 따로 둡니다.
+        self.processor_options = dict(resize_size=resize_size, padding_color=padding_color,
+                                      save_as_png=save_as_png, encoder_profile=encoder_profile,
+                                      save_as_webp=save_as_webp, output_formats=output_formats,
+                                      max_pixels=(int(max_megapixels * 1_000_000)
+                                                  if max_megapixels is not None else None),
+                                      copy_strategy=copy_strategy)
+        self.image_processor = ImageProcessor(stats=self.stats, **self.processor_options)
+        # 동시에 디코드 중인 이미지의 추정 메모리를 예산 안으로 제한합니다.
+        self.governor = MemoryGovernor(memory_budget_mb * 1024 * 1024 if memory_budget_mb else None, self.stats)
+        # (크기, 형식, 하위 폴더) 목록. 하나뿐이면 출력 폴더에 바로 저장합니다.
+        self.variants = self.image_processor.variants()
+        # 입력 파일별 헤더 정보 (디코드가 필요한 작업에서만 수집, 스케줄링/통과 복사 판단에 사용)
+        self.probes: Dict[Path, ImageProbe] = {}
         self.use_numbering = use_numbering
         self.use_prefix = use_prefix
         self.use_suffix = use_suffix
@@ -58,158 +127,497 @@ class ProcessManager:
         if not self.output_path.exists():
             self.output_path.mkdir(parents=True)
 
+        if self.profiler:
+            self.profiler.start()
+            self.profiler.track_stages(self.progress_tracker)
+            try:
+                self.profiler.wrap(self._run_mode)()
+            finally:
+                self.profiler.stop()
+        else:
+            self._run_mode()
+
+        if self.stats.enabled:
+            self._write_stats_report()
+
+    def _run_mode(self) -> None:
+        """
+        선택된 모드의 처리를 실행합니다.
+        """
         if self.mode == ProcessingMode.TEXT_ONLY:
             self._process_text_only()
         elif self.mode == ProcessingMode.CHECK_AND_REMOVE_DUPLICATES:
             self._remove_duplicates()
         elif self.mode == ProcessingMode.RENAME_ONLY:
             self._rename_existing_files()
+        elif self.mode == ProcessingMode.IMPORT_CAPTIONS:
+            self._import_captions()
+        elif self.mode == ProcessingMode.EXPORT_CAPTIONS:
+            self._export_captions()
         else:
             self._process_images()
 
+        self.progress_tracker.finish_stage()
+
+    def _write_stats_report(self) -> None:
+        """
+        단계별 처리 통계를 출력 폴더에 JSON으로 저장하고 요약 표를 출력합니다.
+        """
+        report = self.stats.report()
+        report['mode'] = self.mode.value
+        report['workers_configured'] = self.max_workers
+        report['encoder_profile'] = self.image_processor.encoder_profile
+        report['copy_strategy'] = self.image_processor.copier.strategy
+        report['schedule'] = self.schedule
+        report['memory_budget_mb'] = self.governor.budget_bytes / 1024 / 1024
+        report['memory_peak_in_flight_mb'] = self.governor.peak / 1024 / 1024
+        stats_path = self.stats.save_json(self.output_path / 'process_stats.json', report)
+        StageTimer.print_summary(report)
+        print(f"\n통계 저장 위치: {stats_path}")
+
     def _process_text_only(self) -> None:
         """
         텍스트 파일만 생성하는 모드를 처리합니다.
         """
-        image_files = [f for f in self.output_path.glob("*") 
-                      if f.suffix.lower() in ImageProcessor.SUPPORTED_EXTENSIONS]
-        self.progress_tracker = ProgressTracker(len(image_files))
-        TextFileGenerator.create_text_files_from_output(self.output_path, self.progress_tracker)
+        image_files = TextFileGenerator.find_images(self.output_path)
+        self.progress_tracker.start_stage('caption', len(image_files))
+        with self.stats.stage('caption'):
+            self._create_captions(image_files)
+        self.progress_tracker.finish_stage()
+
+    def _create_captions(self, image_files: List[Path]) -> None:
+        """
+        설정된 캡션 저장 방식으로 이미지들의 빈 캡션을 만듭니다.
+        """
+        if self.caption_format == 'manifest':
+            TextFileGenerator.add_to_manifest(image_files, self.output_path, self.progress_tracker)
+        else:
+            TextFileGenerator.create_text_files(image_files, self.progress_tracker)
+
+    def _import_captions(self) -> None:
+        """
+        출력 폴더의 .txt 캡션을 캡션 매니페스트로 모읍니다.
+        """
+        image_count = len(TextFileGenerator.find_images(self.output_path, recursive=True))
+        self.progress_tracker.start_stage('caption', image_count)
+        with self.stats.stage('caption'):
+            imported = TextFileGenerator.import_captions(self.output_path, self.progress_tracker)
+        self.progress_tracker.finish_stage()
+        print(f"\n{imported}개 캡션을 {self.output_path / 'captions.jsonl'} 로 가져왔습니다.")
+
+    def _export_captions(self) -> None:
+        """
+        캡션 매니페스트를 이미지별 .txt 파일로 내보냅니다.
+        """
+        self.progress_tracker.start_stage('caption', len(CaptionManifest.load(self.output_path)))
+        with self.stats.stage('caption'):
+            exported = TextFileGenerator.export_captions(self.output_path, self.progress_tracker)
+        self.progress_tracker.finish_stage()
+        print(f"\n{exported}개 .txt 파일을 내보냈습니다.")
 
     def _process_images(self) -> None:
         """
         이미지 처리 모드를 실행합니다.
         """
-        image_files = self.image_processor.find_all_images(self.input_path)
-        self.progress_tracker = ProgressTracker(len(image_files))
+        if self.pipeline:
+            self._check_pipeline()
+        with self.stats.stage('scan'):
+            image_files = self.image_processor.find_all_images(self.input_path)
+        if any(size or format for size, format, _ in self.variants):
+            with self.stats.stage('probe'):
+                self.probes = probe_images(image_files, max_workers=self.max_workers)
+        sample_names: Dict[Path, str] = {}
+        if self.output_layout == 'tar':
+            self.shard_writer = ShardWriter(self.output_path, self.shard_size_mb * 1024 * 1024)
+            sample_names = self._plan_sample_names(image_files)
+        elif len(self.variants) > 1:
+            for _, _, folder in self.variants:
+                (self.output_path / folder).mkdir(parents=True, exist_ok=True)
+            print("출력 폴더: " + ", ".join(folder for _, _, folder in self.variants))
+        if self.use_tensor_cache:
+            if not self.image_processor.resize_size:
+                raise ValueError("텐서 캐시는 리사이즈 크기를 지정해야 사용할 수 있습니다.")
+            channels = 4 if self.image_processor.padding_color == 'transparent' else 3
+            self.tensor_cache = TensorCacheWriter(self.output_path / 'tensor_cache',
+                                                  self.image_processor.resize_size, channels)
+        self.progress_tracker.start_stage('process', len(image_files))
         processed_files = []
-        
-        # 진행 상황 모니터링 시작
-        monitor_thread = threading.Thread(target=self._monitor_progress)
-        monitor_thread.start()
+
+        if self.pipeline:
+            processed_files = self._run_pipeline(self._schedule(image_files))
+            self._rename_processed_files(processed_files)
+            return
         
         # 1단계: 멀티스레드로 이미지 복사/처리
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = []
-            for image_path in image_files:
-                future = executor.submit(self._copy_single_file, image_path)
-                futures.append(future)
+        copy_task = self.profiler.wrap(self._copy_single_file) if self.profiler else self._copy_single_file
+        failed = True
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = []
+                for image_path, buffer in self._inputs(self._schedule(image_files)):
+                    future = executor.submit(copy_task, image_path, sample_names.get(image_path), buffer)
+                    futures.append(future)
             
-            # 모든 복사 작업 완료 대기
-            for future in futures:
-                try:
-                    processed_path = future.result()
-                    if processed_path:
-                        processed_files.append(processed_path)
-                except Exception as e:
-                    self.logger.error(f"파일 처리 중 오류 발생", exc_info=True)
-                    raise
+                # 모든 복사 작업 완료 대기
+                for future in futures:
+                    try:
+                        processed_paths = future.result()
+                        if processed_paths:
+                            processed_files.append(processed_paths)
+                    except Exception as e:
+                        self.logger.error(f"파일 처리 중 오류 발생", exc_info=True)
+                        raise
+            failed = False
+        finally:
+            # 중간에 실패해도 이미 쓴 샘플까지는 읽을 수 있도록 샤드를 닫습니다.
+            if self.shard_writer is not None:
+                self.shard_writer.close()
+            # 텐서 캐시도 이미 추가한 행의 색인과 형태를 기록해, 다음 실행이 색인 없는 행 뒤에 이어 쓰지 않게 합니다.
+            if failed and self.tensor_cache is not None:
+                self._close_tensor_cache()
+            # 아카이브 입력이면 작업자 스레드들이 연 아카이브 핸들을 닫습니다.
+            if image_files and isinstance(image_files[0], ArchiveMember):
+                image_files[0].archive.close()
 
-        # 모니터링 스레드 완료 대기
-        monitor_thread.join()
-        
-        # 2단계: 단일 스레드로 순차적 이름 변경
-        self._rename_processed_files(processed_files)
+        try:
+            if self.shard_writer is not None:
+                print(f"\n{self.shard_writer.samples}개 샘플을 샤드 {len(self.shard_writer.shards)}개에 저장했습니다: "
+                      + ", ".join(self.shard_writer.shards))
+            else:
+                # 2단계: 단일 스레드로 순차적 이름 변경
+                self._rename_processed_files(processed_files)
+        finally:
+            if self.tensor_cache is not None:
+                self._close_tensor_cache()
+
+    def _close_tensor_cache(self) -> None:
+        """
+        텐서 캐시 색인의 이름을 최종 샘플 이름(파일 stem)으로 맞추고, 캡션 매니페스트가 있으면 캡션도 기록합니다.
+        """
+        names = {self._sample_key(old): new.stem for old, new in self._renamed.items()}
+        captions = None
+        if CaptionManifest.exists(self.output_path):
+            manifest = CaptionManifest.load(self.output_path)
+            captions = {Path(name).stem: caption for name, caption in manifest.captions.items() if '/' not in name}
+        self.tensor_cache.close(names, captions)
+        print(f"텐서 캐시: {self.output_path / 'tensor_cache'} "
+              f"({self.tensor_cache.rows} x {self.tensor_cache.size} x {self.tensor_cache.size} "
+              f"x {self.tensor_cache.channels})")
+
+    def _sample_key(self, path: Path) -> str:
+        return path.relative_to(self.output_path).as_posix()
+
+    def _option_name(self, stem: str) -> str:
+        """
+        사용자 지정 옵션(치환/접두사/접미사)을 적용한 이름을 반환합니다.
+        """
+        if self.use_replace:
+            stem = stem.replace(self.replace_from, self.replace_to)
+        return f"{self.prefix}{stem}{self.suffix}"
+
+    def _plan_sample_names(self, image_files: List[Path]) -> Dict[Path, str]:
+        """
+        tar 샤드에 쓴 뒤에는 이름을 바꿀 수 없으므로, 폴더 출력의 이름 변경과 같은 규칙(이름순 번호 또는 옵션)으로
+        샘플 이름을 미리 정합니다. 번호는 이전 실행의 샤드에 있는 번호를 건너뜁니다.
+        """
+        ordered = sorted(image_files, key=lambda path: path.name)
+        if not self.use_numbering:
+            return {path: self._option_name(path.stem) for path in ordered}
+        numbers = NumberIndex(int(key) for key in self.shard_writer.existing_keys if key.isdigit())
+        return {path: str(numbers.allocate()) for path in ordered}
+
+    def _sample_members(self, sample_name: str, outputs: List[Tuple[Path, bytes]]) -> List[Tuple[str, bytes]]:
+        """
+        한 원본의 출력들을 tar 멤버로 바꿉니다. 크기/형식별 출력은 '이름.폴더.확장자' 로 같은 샘플 키를 공유합니다.
+        """
+        members = []
+        for path, data in outputs:
+            folder = path.parent.relative_to(self.output_path).as_posix()
+            extension = path.suffix.lower()
+            members.append((f"{sample_name}{extension}" if folder == '.' else f"{sample_name}.{folder}{extension}",
+                            data))
+        if self.mode == ProcessingMode.COPY_AND_TEXT:
+            members.append((f"{sample_name}.txt", b''))
+        return members
+
+    def _schedule(self, image_files: List[Path]) -> List[Path]:
+        """
+        작업 제출 순서를 정합니다.
+
+        'largest' 는 예상 비용(헤더의 픽셀 수, 없으면 파일 크기)이 큰 파일부터 제출합니다.
+        작업자들은 하나의 공유 큐에서 다음 작업을 가져가므로, 큰 작업이 먼저 시작되고
+        작은 작업들이 빈 작업자를 채워 마지막에 한 작업자만 남는 꼬리 지연이 줄어듭니다.
+        'path' 는 경로 순서를 그대로 사용합니다. 이름 변경은 이후 이름순으로 하므로 번호는 같습니다.
+        """
+        if self.schedule != 'largest' or len(image_files) <= self.max_workers:
+            return image_files
+
+        with self.stats.stage('schedule'):
+            def cost(image_path: Path) -> int:
+                probe = self.probes.get(image_path)
+                if probe is None:
+                    probe = ImageProbe(path=image_path, error='not probed')
+                    try:
+                        probe.file_size = image_path.stat().st_size
+                    except OSError:
+                        pass
+                return estimate_cost(probe)
+
+            return sorted(image_files, key=cost, reverse=True)
+
+    def _check_pipeline(self) -> None:
+        """
+        파이프라인 모드와 함께 쓸 수 없는 설정을 확인합니다.
+        슬롯 크기를 정하려면 리사이즈 크기가 필요하고, 출력은 폴더에 파일로만 씁니다.
+        """
+        if not self.image_processor.resize_size:
+            raise ValueError("파이프라인 모드는 리사이즈 크기를 지정해야 사용할 수 있습니다.")
+        if self.output_layout != 'folder' or self.use_tensor_cache or self.io_workers > 0:
+            raise ValueError("파이프라인 모드는 tar 샤드 출력, 텐서 캐시, 미리 읽기와 함께 사용할 수 없습니다.")
+        if not self.input_path.is_dir():
+            raise ValueError("파이프라인 모드는 폴더 입력만 지원합니다. (아카이브 입력은 스레드 모드 사용)")
 
-    def _copy_single_file(self, image_path: Path) -> Optional[Path]:
+    def _run_pipeline(self, image_files: List[Path]) -> List[List[Path]]:
         """
-        단일 파일을 복사/처리합니다.
+        디코드/리사이즈 프로세스와 인코드 프로세스를 공유 메모리 링 버퍼로 연결해 처리합니다.
+        실패한 파일이 있으면 나머지를 모두 처리한 뒤 예외를 발생시킵니다.
         """
+        jobs = []
+        for image_path in image_files:
+            probe = self.probes.get(image_path)
+            targets = [(size, format, self.output_path / folder / image_path.name)
+                       for size, format, folder in self.variants]
+            jobs.append((image_path, targets, probe, self.governor.is_oversized(estimate_decode_bytes(probe))))
+
+        failures = []
+
+        def on_done(index: int, paths: Optional[List[Path]], error: Optional[str]) -> None:
+            image_path = image_files[index]
+            if error is not None:
+                failures.append(image_path)
+                self.progress_tracker.fail(1, f"오류: {image_path.name}")
+                self.logger.error(f"파일 처리 중 오류 발생: {image_path} - {error}")
+                return
+            self.progress_tracker.update(1, f"처리 완료: {image_path.name}",
+                                         bytes_done=sum(path.stat().st_size for path in paths))
+
+        pipeline = ShmPipeline(self.processor_options, self.image_processor.resize_size,
+                               self.decode_procs, self.encode_procs,
+                               profile_dir=self.profiler.output_dir if self.profiler else None)
+        print(f"파이프라인: 디코드 {pipeline.decode_procs}개, 인코드 {pipeline.encode_procs}개 프로세스, "
+              f"슬롯 {pipeline.slots}개 x {pipeline.slot_bytes // 1024} KB")
+        with self.stats.stage('pipeline'):
+            results = pipeline.run(jobs, on_done)
+        if failures:
+            raise RuntimeError(f"{len(failures)}개 파일 처리 실패 (첫 번째: {failures[0]})")
+        return [paths for paths in results if paths]
+
+    def _inputs(self, image_files: List[Path]) -> Iterator[Tuple[Path, Optional[PrefetchedFile]]]:
+        """
+        처리할 순서대로 (경로, 미리 읽은 버퍼)를 돌려줍니다. I/O 스레드를 쓰지 않으면 버퍼는 항상 None 입니다.
+        미리 읽기를 쓰면 읽기 예산이 찰 때 여기서 멈추므로, CPU 작업 큐에도 그만큼만 쌓입니다.
+        """
+        if self.io_workers <= 0:
+            for image_path in image_files:
+                yield image_path, None
+            return
+        sizes = {path: probe.file_size for path, probe in self.probes.items()}
+        with Prefetcher(image_files, self.io_workers, self.prefetch_mb * 1024 * 1024, sizes, self.stats) as prefetcher:
+            yield from prefetcher
+        if self.stats.enabled:
+            self.stats.add('prefetch_peak_bytes', prefetcher.peak)
+
+    def _copy_single_file(self, image_path: Path, sample_name: Optional[str] = None,
+                          buffer: Optional[PrefetchedFile] = None) -> Optional[List[Path]]:
+        """
+        단일 파일을 복사/처리합니다. 여러 크기/형식을 요청하면 한 번의 디코드로 모든 출력을 만듭니다.
+
+        Args:
+            image_path (Path): 원본 이미지 경로
+            sample_name (Optional[str]): tar 샤드 출력일 때의 샘플 이름 (파일 대신 샤드에 씀)
+            buffer (Optional[PrefetchedFile]): I/O 스레드가 미리 읽어 둔 내용 (있으면 파일 대신 여기서 읽음)
+
+        Returns:
+            Optional[List[Path]]: 출력 경로 목록 (variants 순서). tar 샤드 출력이면 None
+        """
+        source = buffer if buffer is not None else image_path
         try:
-            temp_path = self.output_path / image_path.name
-            processed_path = self.image_processor.process_image(image_path, temp_path)
-            self.progress_tracker.update(1, f"처리 완료: {image_path.name}")
-            return processed_path
+            start = time.perf_counter()
+            probe = self.probes.get(image_path)
+            cost = estimate_decode_bytes(probe)
+            # 혼자서 예산을 넘는 이미지는 단독으로, 축소 디코드 경로로 처리합니다.
+            reduced = self.governor.is_oversized(cost)
+            capture = self.image_processor.capture() if sample_name is not None else nullcontext()
+            capture_pixels = self.image_processor.capture_pixels() if self.tensor_cache is not None else nullcontext()
+            with self.governor.reserve(cost), capture as outputs, capture_pixels as pixels:
+                if len(self.variants) == 1:
+                    processed_paths = [self.image_processor.process_image(
+                        source, self.output_path / image_path.name, probe, reduced)]
+                else:
+                    targets = [(size, format, self.output_path / folder / image_path.name)
+                               for size, format, folder in self.variants]
+                    processed_paths = self.image_processor.process_variants(source, targets, probe, reduced)
+            if self.tensor_cache is not None:
+                image = next((out for size, out in pixels if size == self.tensor_cache.size), None)
+                if image is not None:
+                    with self.stats.stage('tensor_cache'):
+                        self.tensor_cache.append(image, sample_name or self._sample_key(processed_paths[0]))
+            if sample_name is not None:
+                with self.stats.stage('shard'):
+                    bytes_done = self.shard_writer.write_sample(self._sample_members(sample_name, outputs))
+                processed_paths = None
+            else:
+                bytes_done = sum(path.stat().st_size for path in processed_paths)
+            self.stats.record_file(str(image_path), time.perf_counter() - start)
+            self.progress_tracker.update(1, f"처리 완료: {image_path.name}", bytes_done=bytes_done)
+            return processed_paths
         except Exception as e:
+            self.progress_tracker.fail(1, f"오류: {image_path.name}")
             self.logger.error(f"파일 처리 중 오류 발생: {image_path}", exc_info=True)
             raise
+        finally:
+            if buffer is not None:
+                buffer.release()
 
-    def _rename_processed_files(self, processed_files: List[Path]) -> None:
+    def _rename_processed_files(self, processed_files: List[List[Path]]) -> None:
         """
         처리된 파일들의 이름을 순차적으로 변경합니다.
+        같은 원본에서 나온 출력들(크기/형식별 폴더)은 모두 같은 이름을 받습니다.
         """
         # 파일들을 정렬하여 순차적으로 처리
-        sorted_files = sorted(processed_files, key=lambda x: x.name)
+        sorted_files = sorted(processed_files, key=lambda group: group[0].name)
         print(f"\n총 {len(sorted_files)}개 파일 처리 시작")
+        self.progress_tracker.start_stage('rename', len(sorted_files))
+        if CaptionManifest.exists(self.output_path):
+            self.manifest = CaptionManifest.load(self.output_path)
         
         if self.use_numbering:
-            self._rename_with_numbers(sorted_files)
+            final_paths = self._rename_with_numbers(sorted_files)
         else:
-            self._rename_with_options(sorted_files)
+            final_paths = self._rename_with_options(sorted_files)
+        if self.manifest is not None:
+            self.manifest.save()
 
-    def _rename_with_numbers(self, files: List[Path]) -> None:
+        # 3단계: 이름이 정해진 뒤 캡션을 한꺼번에 생성
+        if self.mode == ProcessingMode.COPY_AND_TEXT:
+            self.progress_tracker.start_stage('caption', len(final_paths))
+            with self.stats.stage('caption'):
+                self._create_captions(final_paths)
+            self.progress_tracker.finish_stage()
+
+    def _rename_group(self, group: List[Path], new_name: str,
+                      sources: Optional[List[Path]] = None) -> List[Path]:
+        """
+        같은 원본에서 나온 출력 파일들의 이름을 함께 바꿉니다.
+
+        Args:
+            group (List[Path]): 현재 출력 경로들
+            new_name (str): 새 이름 (확장자 제외)
+            sources (Optional[List[Path]]): group 이 임시 이름으로 옮겨진 경우 처리 직후의 원래 경로들
+                (캡션 매니페스트와 텐서 캐시 색인은 원래 경로 기준)
+
+        Returns:
+            List[Path]: 출력별 새 경로
+        """
+        new_paths = []
+        for path, source in zip(group, sources or group):
+            with self.stats.stage('rename'):
+                new_path = FileRenamer.rename_with_name(path, new_name)
+            print(f"이름 변경: {source.relative_to(self.output_path)} -> {new_path.name}")
+            if self.manifest is not None:
+                self.manifest.rename(self.manifest.key(source), self.manifest.key(new_path))
+            self._renamed[source] = new_path
+            new_paths.append(new_path)
+        return new_paths
+
+    def _rename_with_numbers(self, files: List[List[Path]]) -> List[Path]:
         """
         파일들의 이름을 순차적인 번호로 변경합니다.
         
         Args:
-            files (List[Path]): 이름을 변경할 파일 목록
+            files (List[List[Path]]): 이름을 변경할 파일 목록 (원본별 출력 묶음)
+
+        Returns:
+            List[Path]: 이름 변경에 성공한 출력들의 새 경로
         """
-        for idx, path in enumerate(files, 1):
+        final_paths = []
+        # 이전 실행부터 출력 폴더(크기/형식별 폴더 포함)에 있던 번호만 건너뛰고, 색인은 한 번만 만듭니다.
+        # 이번 실행의 출력은 아직 이름이 정해지지 않았으므로 번호를 차지하지 않습니다.
+        numbers = NumberIndex.from_directories({path.parent for group in files for path in group},
+                                               exclude=[path for group in files for path in group])
+        targets = [str(numbers.allocate()) for _ in files]
+
+        # 새 이름이 아직 이름을 바꾸지 않은 다른 출력의 현재 이름이면, 그 출력을 먼저 임시 이름으로 옮겨 둡니다.
+        # (이미 번호가 맞는 출력은 그대로 두므로 1.png, 2.png, 3.png 같은 입력은 이름이 바뀌지 않습니다.)
+        taken = set(targets)
+        current = list(files)
+        for index, (group, target) in enumerate(zip(files, targets)):
+            if group[0].stem != target and group[0].stem in taken:
+                try:
+                    with self.stats.stage('rename'):
+                        current[index] = [FileRenamer.rename_with_name(path, f".{path.stem}.renaming")
+                                          for path in group]
+                except Exception as e:
+                    self.logger.error(f"파일 이름 변경 중 오류 발생: {str(e)}")
+
+        for group, moved, target in zip(files, current, targets):
+            path = group[0]
             try:
-                new_name = str(idx)
-                new_path = FileRenamer.rename_with_name(path, new_name)
-                print(f"이름 변경: {path.name} -> {new_path.name}")
-                
-                if self.mode == ProcessingMode.COPY_AND_TEXT:
-                    TextFileGenerator.create_text_file(new_path)
+                if path.stem == target:
+                    print(f"건너뛰기: {path.name} (변경사항 없음)")
+                    self._renamed.update((output, output) for output in group)
+                    final_paths.extend(group)
+                    self.progress_tracker.update(1, f"건너뛰기: {path.name}")
+                    continue
+                new_paths = self._rename_group(moved, target, sources=group)
+                final_paths.extend(new_paths)
+                self.progress_tracker.update(1, f"이름 변경 완료: {new_paths[0].name}")
                 
             except Exception as e:
                 self.logger.error(f"파일 이름 변경 중 오류 발생: {str(e)}")
+                self.progress_tracker.fail(1, f"오류: {path.name}")
                 continue
+        return final_paths
 
-    def _rename_with_options(self, files: List[Path]) -> None:
+    def _rename_with_options(self, files: List[List[Path]]) -> List[Path]:
         """
         파일들의 이름을 사용자 지정 옵션(접두사/접미사/치환)에 따라 변경합니다.
         
         Args:
-            files (List[Path]): 이름을 변경할 파일 목록
+            files (List[List[Path]]): 이름을 변경할 파일 목록 (원본별 출력 묶음)
+
+        Returns:
+            List[Path]: 이름이 바뀌었거나 바꿀 필요가 없었던 출력들의 경로
         """
-        for path in files:
+        final_paths = []
+        for group in files:
+            path = group[0]
             try:
                 original_name = path.stem
-                new_name = original_name
-                
-                if self.use_replace:
-                    new_name = new_name.replace(self.replace_from, self.replace_to)
-                
-                if self.use_prefix:
-                    new_name = f"{self.prefix}{new_name}"
-                
-                if self.use_suffix:
-                    new_name = f"{new_name}{self.suffix}"
+                new_name = self._option_name(original_name)
                 
                 if new_name == original_name:
                     print(f"건너뛰기: {path.name} (변경사항 없음)")
+                    self._renamed.update((output, output) for output in group)
+                    final_paths.extend(group)
+                    self.progress_tracker.update(1, f"건너뛰기: {path.name}")
                     continue
                 
-                new_path = FileRenamer.rename_with_name(path, new_name)
-                print(f"이름 변경: {path.name} -> {new_path.name}")
-                
-                if self.mode == ProcessingMode.COPY_AND_TEXT:
-                    TextFileGenerator.create_text_file(new_path)
+                new_paths = self._rename_group(group, new_name)
+                final_paths.extend(new_paths)
+                self.progress_tracker.update(1, f"이름 변경 완료: {new_paths[0].name}")
                 
             except Exception as e:
                 self.logger.error(f"파일 이름 변경 중 오류 발생: {str(e)}")
+                self.progress_tracker.fail(1, f"오류: {path.name}")
                 continue
-
-    def _monitor_progress(self) -> None:
-        """
-        진행 상황을 모니터링합니다.
-        """
-        while True:
-            progress = self.progress_tracker.get_progress()
-            print(f"\r진행률: {progress.percentage:.1f}% ({progress.current}/{progress.total}) - {progress.status}", end="")
-            
-            if progress.current >= progress.total:
-                break
-            time.sleep(0.1)
+        return final_paths
 
     def _remove_duplicates(self) -> None:
         """
         중복 이미지를 검사하고 제거합니다.
         """
         checker = ImageDuplicateChecker()
-        self.progress_tracker = ProgressTracker(100)  # 임시 총량으로 초기화
         
         print("\n중복 이미지 검사 및 제거를 시작합니다...")
         removed_count, removed_files = checker.remove_duplicates(self.output_path, self.progress_tracker)
@@ -226,46 +634,46 @@ class ProcessManager:
     def _rename_existing_files(self) -> None:
         """
         출력 폴더의 기존 파일들의 이름을 변경합니다.
+        한 번의 디렉토리 나열로 전체 계획을 세우고, 이름이 이미 맞는 파일은 건드리지 않습니다.
+        같은 이름의 .txt 파일도 함께 바뀝니다.
         """
-        image_files = [f for f in self.output_path.glob("*") 
-                      if f.suffix.lower() in ImageProcessor.SUPPORTED_EXTENSIONS]
-        
-        if not image_files:
-            print("이름을 변경할 이미지 파일이 없습니다.")
+        def new_stem(index: int, stem: str) -> str:
+            return str(index) if self.use_numbering else self._option_name(stem)
+
+        with self.stats.stage('rename_plan'):
+            plan = plan_renames(self.output_path, ImageProcessor.SUPPORTED_EXTENSIONS, new_stem)
+        images = plan.images
+        total = len(images) + len(plan.conflicts)
+
+        if not total:
+            if plan.unchanged:
+                print(f"모든 파일({plan.unchanged}개)의 이름이 이미 맞습니다.")
+            else:
+                print("이름을 변경할 이미지 파일이 없습니다.")
             return
-        
-        self.progress_tracker = ProgressTracker(len(image_files))
-        sorted_files = sorted(image_files, key=lambda x: x.name)
-        
-        print(f"\n총 {len(sorted_files)}개 파일 이름 변경 시작")
-        
-        for idx, path in enumerate(sorted_files, 1):
-            try:
-                original_name = path.stem
-                new_name = original_name
-                
-                if self.use_numbering:
-                    new_name = str(idx)
-                else:
-                    if self.use_replace:
-                        new_name = new_name.replace(self.replace_from, self.replace_to)
-                    
-                    if self.use_prefix:
-                        new_name = f"{self.prefix}{new_name}"
-                    
-                    if self.use_suffix:
-                        new_name = f"{new_name}{self.suffix}"
-                
-                if new_name == original_name:
-                    print(f"건너뛰기: {path.name} (변경사항 없음)")
-                    self.progress_tracker.update(1, f"건너뛰기: {path.name}")
-                    continue
-                
-                new_path = FileRenamer.rename_with_name(path, new_name)
-                print(f"이름 변경: {path.name} -> {new_path.name}")
-                self.progress_tracker.update(1, f"이름 변경 완료: {new_path.name}")
-                
-            except Exception as e:
-                print(f"오류 발생: {path.name} - {str(e)}")
-                self.progress_tracker.update(1, f"오류: {path.name}")
-                continue 
\ No newline at end of file
+
+        print(f"\n총 {total}개 파일 이름 변경 시작 (변경 없음 {plan.unchanged}개 건너뜀)")
+        self.progress_tracker.start_stage('rename', total)
+        for name, reason in plan.conflicts:
+            print(f"오류 발생: {name} - {reason}")
+            self.progress_tracker.fail(1, f"오류: {name}")
+
+        image_names = {src for src, _ in images}
+        manifest = CaptionManifest.load(self.output_path) if CaptionManifest.exists(self.output_path) else None
+
+        def on_renamed(src: str, dst: str) -> None:
+            if src in image_names:
+                print(f"이름 변경: {src} -> {dst}")
+                if manifest is not None:
+                    manifest.rename(src, dst)
+                self.progress_tracker.update(1, f"이름 변경 완료: {dst}")
+
+        try:
+            with self.stats.stage('rename'):
+                execute_plan(plan, on_renamed)
+        finally:
+            if manifest is not None:
+                manifest.save()
+            self.progress_tracker.finish_stage()
+        print(f"\n이름 변경 기록: {journal_path(self.output_path)} (--undo-rename 으로 되돌릴 수 있음)")
+ 
\ No newline at end of file
@@ -1,8 +1,9 @@
 # progress_tracker.py
 
-from dataclasses import dataclass
-from threading import Lock
-from typing import Optional
+from dataclasses import dataclass, field
+from threading import Lock, local
+from typing import Callable, List, Optional
+import time
 
 @dataclass
 class ProgressInfo:
@@ -10,39 +11,167 @@ class ProgressInfo:
     current: int = 0
     percentage: float = 0.0
     status: str = ""
+    stage: str = ""
+    failed: int = 0
+    bytes_done: int = 0
+    elapsed: float = 0.0
+    items_per_sec: float = 0.0
+    mb_per_sec: float = 0.0
+    eta: Optional[float] = None
+    finished: bool = False
+    stages: List[str] = field(default_factory=list)
+
+class _Counter:
+    """
+    스레드 하나가 소유하는 카운터 칸입니다. 소유 스레드만 값을 바꾸므로 잠금이 필요 없습니다.
+    """
+    __slots__ = ('current', 'failed', 'bytes_done')
+
+    def __init__(self):
+        self.current = 0
+        self.failed = 0
+        self.bytes_done = 0
+
+class _Stage:
+    def __init__(self, name: str, total: int):
+        self.name = name
+        self.total = total
+        self.started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.cells: List[_Counter] = []
+        self.local = local()
 
 class ProgressTracker:
-    def __init__(self, total_items: int):
+    """
+    이름이 있는 여러 단계의 진행 상황을 추적하고 구독자에게 알립니다.
+
+    작업자 스레드는 각자의 카운터 칸만 증가시키므로 update() 가 서로 경합하지 않습니다.
+    구독자 콜백은 최소 간격(min_interval)마다, 그리고 단계 시작/완료 시 항상 호출됩니다.
+    """
+
+    def __init__(self, total_items: int = 0, stage: str = ""):
         self._lock = Lock()
-        self._total = total_items
-        self._current = 0
+        self._notify_lock = Lock()
+        self._subscribers: List[Callable[[ProgressInfo], None]] = []
+        self._min_interval = 0.1
+        self._last_notify = 0.0
         self._status = ""
+        self._stage_names: List[str] = []
+        self._stage = self._new_stage(stage, total_items)
+
+    def _new_stage(self, name: str, total: int) -> _Stage:
+        stage = _Stage(name, total)
+        if name:
+            self._stage_names.append(name)
+        return stage
 
     @property
     def total(self) -> int:
-        return self._total
-    
+        return self._stage.total
+
     @total.setter
     def total(self, value: int):
         with self._lock:
-            self._total = value
+            self._stage.total = value
 
     @property
     def current(self) -> int:
-        return self._current
+        return sum(cell.current for cell in self._stage.cells)
+
+    def subscribe(self, callback: Callable[[ProgressInfo], None], min_interval: Optional[float] = None) -> None:
+        """
+        진행 상황이 바뀔 때 호출될 콜백을 등록합니다.
 
-    def update(self, increment: int = 1, status: Optional[str] = None) -> None:
+        Args:
+            callback (Callable[[ProgressInfo], None]): 진행 정보를 받을 함수 (작업자 스레드에서 호출됨)
+            min_interval (Optional[float]): 알림 최소 간격(초)
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            if min_interval is not None:
+                self._min_interval = min_interval
+
+    def start_stage(self, name: str, total: int) -> None:
+        """
+        새 단계를 시작합니다. 진행 중인 단계는 완료 처리됩니다.
+
+        Args:
+            name (str): 단계 이름
+            total (int): 단계의 전체 작업 수
+        """
+        self.finish_stage()
+        with self._lock:
+            self._stage = self._new_stage(name, total)
+        self._notify(force=True)
+
+    def finish_stage(self) -> None:
+        """
+        현재 단계를 완료 처리하고 구독자에게 알립니다.
+        """
+        stage = self._stage
+        if stage.finished_at is not None or (not stage.name and stage.total == 0):
+            return
+        stage.finished_at = time.perf_counter()
+        self._notify(force=True)
+
+    def _cell(self) -> _Counter:
+        stage = self._stage
+        cell = getattr(stage.local, 'cell', None)
+        if cell is None:
+            cell = _Counter()
+            with self._lock:
+                stage.cells.append(cell)
+            stage.local.cell = cell
+        return cell
+
+    def update(self, increment: int = 1, status: Optional[str] = None, bytes_done: int = 0) -> None:
         """
         진행 상황을 업데이트합니다.
 
         Args:
             increment (int): 증가시킬 값
             status (Optional[str]): 현재 상태 메시지
+            bytes_done (int): 이번에 처리한 바이트 수 (MB/s 계산용)
         """
-        with self._lock:
-            self._current += increment
-            if status:
-                self._status = status
+        cell = self._cell()
+        cell.current += increment
+        cell.bytes_done += bytes_done
+        if status:
+            self._status = status
+        self._notify()
+
+    def fail(self, increment: int = 1, status: Optional[str] = None) -> None:
+        """
+        실패한 작업을 완료된 것으로 집계합니다. 실패가 있어도 단계가 끝까지 진행됩니다.
+
+        Args:
+            increment (int): 실패한 작업 수
+            status (Optional[str]): 현재 상태 메시지
+        """
+        cell = self._cell()
+        cell.current += increment
+        cell.failed += increment
+        if status:
+            self._status = status
+        self._notify()
+
+    def _notify(self, force: bool = False) -> None:
+        if not self._subscribers:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_notify < self._min_interval:
+            # 단계의 마지막 작업은 간격과 관계없이 알립니다.
+            if self.current < self._stage.total:
+                return
+        if not self._notify_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_notify = now
+            info = self.get_progress()
+            for callback in list(self._subscribers):
+                callback(info)
+        finally:
+            self._notify_lock.release()
 
     def get_progress(self) -> ProgressInfo:
         """
@@ -51,11 +180,52 @@ class ProgressTracker:
         Returns:
             ProgressInfo: 진행 상황 정보
         """
+        stage = self._stage
         with self._lock:
-            percentage = (self._current / self._total * 100) if self._total > 0 else 0
-            return ProgressInfo(
-                total=self._total,
-                current=self._current,
-                percentage=percentage,
-                status=self._status
-            ) 
\ No newline at end of file
+            cells = list(stage.cells)
+            stages = list(self._stage_names)
+        current = sum(cell.current for cell in cells)
+        failed = sum(cell.failed for cell in cells)
+        bytes_done = sum(cell.bytes_done for cell in cells)
+
+        end = stage.finished_at if stage.finished_at is not None else time.perf_counter()
+        elapsed = end - stage.started
+        items_per_sec = current / elapsed if elapsed > 0 else 0.0
+        remaining = max(stage.total - current, 0)
+        eta = remaining / items_per_sec if items_per_sec > 0 else None
+        percentage = (current / stage.total * 100) if stage.total > 0 else 0
+
+        return ProgressInfo(
+            total=stage.total,
+            current=current,
+            percentage=percentage,
+            status=self._status,
+            stage=stage.name,
+            failed=failed,
+            bytes_done=bytes_done,
+            elapsed=elapsed,
+            items_per_sec=items_per_sec,
+            mb_per_sec=bytes_done / elapsed / 1024 / 1024 if elapsed > 0 else 0.0,
+            eta=0.0 if remaining == 0 else eta,
+            finished=stage.finished_at is not None,
+            stages=stages
+        )
+
+def format_progress(info: ProgressInfo) -> str:
+    """
+    진행 정보를 한 줄 문자열로 만듭니다.
+    """
+    stage = f"[{info.stage}] " if info.stage else ""
+    rate = f"{info.items_per_sec:.1f}개/s"
+    if info.bytes_done:
+        rate += f", {info.mb_per_sec:.1f} MB/s"
+    eta = f"{int(info.eta // 60):02d}:{int(info.eta % 60):02d}" if info.eta is not None else "--:--"
+    failed = f", 실패 {info.failed}" if info.failed else ""
+    return (f"{stage}진행률: {info.percentage:.1f}% ({info.current}/{info.total}{failed}) "
+            f"{rate} 남은 시간 {eta} - {info.status}")
+
+def print_progress(info: ProgressInfo) -> None:
+    """
+    콘솔 한 줄에 진행 상황을 갱신해 출력하는 구독자입니다.
+    """
+    print(f"\r{format_progress(info)}", end="\n" if info.finished else "", flush=True)
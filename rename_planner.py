@@ -0,0 +1,193 @@
+# rename_planner.py
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+
+# 이름 변경 기록 파일 (마지막 실행을 되돌릴 때 사용)
+JOURNAL_NAME = '.rename_journal.jsonl'
+
+# 이미지와 함께 이름을 바꾸는 부속 파일 확장자
+SIDECAR_EXTENSIONS = ('.txt',)
+
+_DIGITS = re.compile(r'(\d+)')
+
+
+def natural_key(name: str) -> List:
+    """
+    숫자 부분을 정수로 비교하는 정렬 키입니다. ('2.png' 가 '10.png' 보다 앞에 옴)
+    """
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS.split(name)]
+
+
+@dataclass
+class RenamePlan:
+    directory: Path
+    # 실제로 바뀌는 (원래 이름, 새 이름) 목록. 부속 파일 포함
+    moves: List[Tuple[str, str]] = field(default_factory=list)
+    # 이름이 이미 맞아서 건드리지 않는 이미지 수
+    unchanged: int = 0
+    # 다른 파일과 이름이 겹쳐 바꿀 수 없는 이미지 (이름, 사유)
+    conflicts: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def images(self) -> List[Tuple[str, str]]:
+        return [(src, dst) for src, dst in self.moves if not src.lower().endswith(SIDECAR_EXTENSIONS)]
+
+
+def plan_renames(directory: Path, extensions: Iterable[str],
+                 new_stem: Callable[[int, str], str]) -> RenamePlan:
+    """
+    디렉토리를 한 번만 나열해 전체 이름 변경 계획을 만듭니다.
+
+    Args:
+        directory (Path): 대상 디렉토리
+        extensions (Iterable[str]): 이미지 확장자 (소문자, 점 포함)
+        new_stem (Callable[[int, str], str]): (1부터 시작하는 순번, 원래 stem) -> 새 stem
+
+    Returns:
+        RenamePlan: 이름이 바뀌는 파일만 담은 계획
+    """
+    extensions = {ext.lower() for ext in extensions}
+    with os.scandir(directory) as entries:
+        names = {entry.name for entry in entries if entry.is_file()}
+
+    images = sorted((name for name in names if os.path.splitext(name)[1].lower() in extensions), key=natural_key)
+    plan = RenamePlan(directory=directory)
+    groups: List[List[Tuple[str, str]]] = []
+    for index, name in enumerate(images, 1):
+        stem, ext = os.path.splitext(name)
+        target_stem = new_stem(index, stem)
+        if target_stem == stem:
+            plan.unchanged += 1
+            continue
+        group = [(name, f"{target_stem}{ext}")]
+        for sidecar_ext in SIDECAR_EXTENSIONS:
+            if f"{stem}{sidecar_ext}" in names:
+                group.append((f"{stem}{sidecar_ext}", f"{target_stem}{sidecar_ext}"))
+        groups.append(group)
+
+    # 부속 파일은 이미지마다 따로 있으므로, 같은 stem 의 이미지가 둘이면 부속 파일은 먼저 나온 쪽을 따릅니다.
+    taken = set()
+    for group in groups:
+        group[1:] = [pair for pair in group[1:] if pair[0] not in taken]
+        taken.update(src for src, _ in group)
+
+    # 같은 대상으로 가는 파일이 여럿이거나 대상 이름의 파일이 그대로 남아 있으면 그 이미지(와 부속 파일)는 바꾸지 않습니다.
+    # 바꾸지 않기로 한 파일이 다시 다른 이동을 막을 수 있으므로 더 이상 바뀌지 않을 때까지 반복합니다.
+    while True:
+        moving = {src for group in groups for src, _ in group}
+        claimed: Dict[str, str] = {}
+        remaining = []
+        for group in groups:
+            reason = None
+            for src, dst in group:
+                if dst in claimed:
+                    reason = f"{claimed[dst]} 와 같은 이름 {dst}"
+                elif dst in names and dst not in moving:
+                    reason = f"이미 존재하는 파일 {dst}"
+                if reason:
+                    break
+            if reason:
+                plan.conflicts.append((group[0][0], reason))
+                continue
+            claimed.update((dst, src) for src, dst in group)
+            remaining.append(group)
+        if len(remaining) == len(groups):
+            break
+        groups = remaining
+
+    plan.moves = [pair for group in groups for pair in group]
+    return plan
+
+
+def journal_path(directory: Path) -> Path:
+    return directory / JOURNAL_NAME
+
+
+def execute_plan(plan: RenamePlan, on_renamed: Optional[Callable[[str, str], None]] = None) -> int:
+    """
+    계획한 이름 변경을 실행합니다. 대상 이름을 다른 원본이 아직 쓰고 있으면 그 원본이 먼저 옮겨지도록
+    순서를 정하고, 서로 이름을 맞바꾸는 순환만 임시 이름을 거쳐 끊습니다.
+    실행한 모든 rename 은 저널에 기록되어 undo_renames() 로 되돌릴 수 있습니다.
+
+    Args:
+        plan (RenamePlan): plan_renames() 결과
+        on_renamed (Optional[Callable[[str, str], None]]): 최종 이름으로 바뀔 때마다 (원래 이름, 새 이름) 으로 호출
+
+    Returns:
+        int: 최종 이름으로 바뀐 파일 수
+    """
+    directory = plan.directory
+    pending = dict(plan.moves)
+    # 대상 이름 -> 그 이름을 아직 차지하고 있어서 기다리는 이동의 원본
+    waiting = {dst: src for src, dst in pending.items() if dst in pending}
+    ready = [src for src, dst in pending.items() if dst not in pending]
+    renamed = 0
+
+    with open(journal_path(directory), 'w', encoding='utf-8') as journal:
+        def move(src: str, dst: str) -> None:
+            os.rename(directory / src, directory / dst)
+            journal.write(json.dumps({'from': src, 'to': dst}, ensure_ascii=False) + '\n')
+            journal.flush()
+
+        def finish(current: str, original: str) -> None:
+            nonlocal renamed
+            dst = pending.pop(original)
+            move(current, dst)
+            renamed += 1
+            if on_renamed:
+                on_renamed(original, dst)
+            # original 이름이 비었으니 그 이름을 기다리던 이동을 진행할 수 있습니다.
+            blocked = waiting.pop(original, None)
+            if blocked is not None:
+                ready.append(blocked)
+
+        while pending:
+            while ready:
+                src = ready.pop()
+                finish(src, src)
+            if not pending:
+                break
+            # 남은 이동은 모두 순환입니다. 하나를 임시 이름으로 옮겨 순환을 끊습니다.
+            src = next(iter(pending))
+            temp = f".{src}.renaming"
+            move(src, temp)
+            blocked = waiting.pop(src, None)
+            if blocked is not None:
+                ready.append(blocked)
+            while ready:
+                other = ready.pop()
+                if other == src:
+                    continue
+                finish(other, other)
+            finish(temp, src)
+
+    return renamed
+
+
+def undo_renames(directory: Path) -> int:
+    """
+    마지막 execute_plan() 실행의 저널을 거꾸로 적용해 이름을 되돌립니다.
+
+    Returns:
+        int: 되돌린 rename 수
+    """
+    path = journal_path(directory)
+    if not path.exists():
+        return 0
+    with open(path, encoding='utf-8') as journal:
+        steps = [json.loads(line) for line in journal if line.strip()]
+    undone = 0
+    for step in reversed(steps):
+        try:
+            os.rename(directory / step['to'], directory / step['from'])
+            undone += 1
+        except OSError as e:
+            logging.getLogger(__name__).error(f"되돌리기 실패: {step['to']} -> {step['from']} - {e}")
+    path.unlink()
+    return undone
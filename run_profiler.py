@@ -0,0 +1,211 @@
+# run_profiler.py
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from progress_tracker import ProgressInfo, ProgressTracker
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{code.co_name}:{code.co_firstlineno}"
+
+
+def profile_in_process(fn: Callable, profile_dir: Path, *args, **kwargs):
+    """
+    프로세스 풀 워커에서 함수를 cProfile 로 실행하고 결과를 profile_dir 에 저장합니다.
+    부모 프로세스의 RunProfiler.stop() 이 이 파일들을 합칩니다.
+    """
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(fn, *args, **kwargs)
+    finally:
+        workers_dir = Path(profile_dir) / 'workers'
+        workers_dir.mkdir(parents=True, exist_ok=True)
+        name = f"process-{os.getpid()}-{time.time_ns()}.pstats"
+        profile.dump_stats(str(workers_dir / name))
+
+
+class RunProfiler:
+    """
+    실행 전체를 프로파일링합니다.
+
+    - 스레드 풀 작업은 wrap() 으로 감싸 작업자 스레드별 cProfile 을 수집합니다.
+    - 프로세스 풀 작업은 profile_in_process() 로 저장된 결과를 합칩니다.
+    - 샘플링 스레드가 모든 스레드의 호출 스택을 주기적으로 기록해 flamegraph 용 collapsed 스택을 만듭니다.
+    - ProgressTracker 단계마다 tracemalloc 최대 메모리를 기록합니다.
+
+    결과는 output_dir 의 profile.pstats, profile.folded, memory.json 으로 저장됩니다.
+    """
+
+    def __init__(self, output_dir: Path, sample_interval: float = 0.005, trace_memory: bool = True):
+        self.output_dir = Path(output_dir)
+        self.sample_interval = sample_interval
+        self.trace_memory = trace_memory
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._profiles = []
+        self._profiles_lock = threading.Lock()
+        self._samples: Counter = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._memory: Dict[str, Dict[str, float]] = {}
+        self._current_stage: Optional[str] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        """
+        샘플링과 메모리 추적을 시작합니다.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # 같은 폴더에 남은 이전 실행의 워커 결과가 이번 profile.pstats 에 합쳐지지 않도록 지웁니다.
+        for worker_file in (self.output_dir / 'workers').glob('*.pstats'):
+            worker_file.unlink()
+        self._started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+
+    def _thread_profile(self) -> cProfile.Profile:
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = cProfile.Profile()
+            with self._profiles_lock:
+                self._profiles.append(profile)
+            self._local.profile = profile
+        return profile
+
+    def wrap(self, fn: Callable) -> Callable:
+        """
+        호출하는 스레드의 cProfile 로 fn 을 실행하는 함수를 반환합니다.
+        """
+        @functools.wraps(fn)
+        def profiled(*args, **kwargs):
+            profile = self._thread_profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ 에서는 이미 활성화된 프로파일러가 모든 스레드를 수집합니다.
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+        return profiled
+
+    def track_stages(self, progress_tracker: ProgressTracker) -> None:
+        """
+        ProgressTracker 의 단계 시작/완료 알림에 맞춰 단계별 최대 메모리를 기록합니다.
+        """
+        progress_tracker.subscribe(self._on_progress)
+
+    def _on_progress(self, info: ProgressInfo) -> None:
+        if not info.stage or not tracemalloc.is_tracing():
+            return
+        if info.stage != self._current_stage and not info.finished:
+            self._current_stage = info.stage
+            tracemalloc.reset_peak()
+        elif info.finished and info.stage == self._current_stage:
+            current, peak = tracemalloc.get_traced_memory()
+            self._memory[info.stage] = {
+                'peak_mb': peak / 1024 / 1024,
+                'current_mb': current / 1024 / 1024,
+                'seconds': info.elapsed,
+            }
+            self._current_stage = None
+
+    def _sample_loop(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.sample_interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                thread_name = names.get(thread_id, str(thread_id))
+                # 같은 풀의 스레드는 하나로 묶습니다. (ThreadPoolExecutor-0_3 -> ThreadPoolExecutor-0)
+                thread_name = thread_name.rsplit('_', 1)[0] if thread_name.startswith('ThreadPoolExecutor') else thread_name
+                self._samples[';'.join([thread_name] + stack[::-1])] += 1
+
+    def stop(self, top_n: int = 25) -> Dict[str, Path]:
+        """
+        수집을 끝내고 합친 결과를 저장합니다.
+
+        Returns:
+            Dict[str, Path]: 저장된 결과 파일 경로
+        """
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join()
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            self._memory['run'] = {
+                'peak_mb': peak / 1024 / 1024,
+                'current_mb': current / 1024 / 1024,
+                'seconds': time.perf_counter() - self._started,
+            }
+            tracemalloc.stop()
+
+        outputs = {}
+
+        stats = None
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        workers_dir = self.output_dir / 'workers'
+        if workers_dir.exists():
+            for worker_file in sorted(workers_dir.glob('*.pstats')):
+                if stats is None:
+                    stats = pstats.Stats(str(worker_file))
+                else:
+                    stats.add(str(worker_file))
+        if stats is not None:
+            outputs['pstats'] = self.output_dir / 'profile.pstats'
+            stats.dump_stats(str(outputs['pstats']))
+            summary = io.StringIO()
+            stats.stream = summary
+            stats.sort_stats('cumulative').print_stats(top_n)
+            outputs['summary'] = self.output_dir / 'profile_summary.txt'
+            outputs['summary'].write_text(summary.getvalue(), encoding='utf-8')
+
+        outputs['folded'] = self.output_dir / 'profile.folded'
+        with open(outputs['folded'], 'w', encoding='utf-8') as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        outputs['memory'] = self.output_dir / 'memory.json'
+        with open(outputs['memory'], 'w', encoding='utf-8') as f:
+            json.dump(self._memory, f, ensure_ascii=False, indent=2)
+
+        print("\n=== 프로파일링 결과 ===")
+        for stage, memory in self._memory.items():
+            print(f"{stage:<12} 최대 메모리 {memory['peak_mb']:>8.1f} MB ({memory['seconds']:.2f}s)")
+        for name, path in outputs.items():
+            print(f"{name}: {path}")
+        return outputs
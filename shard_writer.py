@@ -0,0 +1,135 @@
+# shard_writer.py
+
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import io
+import json
+import re
+import tarfile
+import threading
+import time
+
+# 샤드 파일 이름 형식과 색인 파일 이름
+SHARD_PATTERN = 'shard-{:05d}.tar'
+INDEX_NAME = 'shards.index.jsonl'
+
+_SHARD_NUMBER = re.compile(r'shard-(\d+)\.tar$')
+
+
+class ShardWriter:
+    """
+    처리 결과를 크기 제한이 있는 tar 샤드에 바로 씁니다. (WebDataset 형식)
+
+    - 한 샘플(같은 이름의 이미지, 크기/형식별 출력, 캡션 .txt)은 항상 같은 샤드에 연속으로 들어갑니다.
+    - 멤버마다 (샤드, 이름, 데이터 오프셋, 크기)를 색인 파일에 기록하므로, 로더는 압축을 풀지 않고
+      오프셋으로 바로 읽거나 샤드를 순서대로 스트리밍할 수 있습니다.
+    - 기존 샤드가 있는 폴더에 다시 쓰면 다음 번호의 샤드부터 이어서 쓰고 색인에 추가합니다.
+    """
+
+    def __init__(self, output_path: Path, max_shard_bytes: int = 1024 ** 3):
+        self.output_path = output_path
+        self.max_shard_bytes = max_shard_bytes
+        self.index_path = output_path / INDEX_NAME
+        self._lock = threading.Lock()
+        self._tar: Optional[tarfile.TarFile] = None
+        self._shard_name = ''
+        self._shard_bytes = 0
+        self._next_shard = 0
+        self._index = None
+        self.samples = 0
+        self.shards: List[str] = []
+
+        # 이전 실행의 샤드와 샘플 이름 (이름이 겹치지 않도록 이어서 번호를 매기는 데 사용)
+        self.existing_keys: Set[str] = set()
+        for shard in output_path.glob('shard-*.tar'):
+            match = _SHARD_NUMBER.search(shard.name)
+            if match:
+                self._next_shard = max(self._next_shard, int(match.group(1)) + 1)
+        if self.index_path.exists():
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self.existing_keys.add(sample_key(json.loads(line)['name']))
+
+    def _open_next_shard(self) -> None:
+        self._close_shard()
+        self._shard_name = SHARD_PATTERN.format(self._next_shard)
+        self._next_shard += 1
+        self._tar = tarfile.open(self.output_path / self._shard_name, 'w', format=tarfile.USTAR_FORMAT)
+        self._shard_bytes = 0
+        self.shards.append(self._shard_name)
+
+    def _close_shard(self) -> None:
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+
+    def write_sample(self, members: List[Tuple[str, bytes]]) -> int:
+        """
+        한 샘플의 멤버들을 현재 샤드에 연속으로 추가합니다. 샤드가 가득 차면 새 샤드를 엽니다.
+
+        Args:
+            members (List[Tuple[str, bytes]]): (tar 안의 이름, 내용) 목록
+
+        Returns:
+            int: 쓴 바이트 수
+        """
+        # tar 헤더(512바이트)와 512바이트 단위 패딩을 포함한 크기
+        size = sum(512 + (len(data) + 511) // 512 * 512 for _, data in members)
+        with self._lock:
+            if self._index is None:
+                self._index = open(self.index_path, 'a', encoding='utf-8')
+            if self._tar is None or (self._shard_bytes and self._shard_bytes + size > self.max_shard_bytes):
+                self._open_next_shard()
+            now = time.time()
+            for name, data in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = now
+                self._tar.addfile(info, io.BytesIO(data))
+                # addfile 뒤의 tar 위치는 512바이트 단위로 채운 데이터의 끝입니다.
+                offset = self._tar.offset - (len(data) + 511) // 512 * 512
+                self._index.write(json.dumps({'shard': self._shard_name, 'name': name,
+                                              'offset': offset, 'size': info.size},
+                                             ensure_ascii=False) + '\n')
+            self._shard_bytes += size
+            self.samples += 1
+        return sum(len(data) for _, data in members)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_shard()
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+def sample_key(member_name: str) -> str:
+    """
+    WebDataset 규칙에 따라 멤버 이름에서 샘플 키(첫 번째 '.' 앞부분)를 반환합니다.
+    """
+    directory, _, base = member_name.rpartition('/')
+    key = base.split('.', 1)[0]
+    return f"{directory}/{key}" if directory else key
+
+
+def read_index(output_path: Path) -> Dict[str, Dict]:
+    """
+    색인 파일을 읽어 멤버 이름별 (샤드, 오프셋, 크기)를 반환합니다.
+    """
+    entries = {}
+    with open(output_path / INDEX_NAME, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry['name']] = entry
+    return entries
+
+
+def read_member(output_path: Path, entry: Dict) -> bytes:
+    """
+    색인 항목 하나의 내용을 tar 를 풀지 않고 오프셋으로 바로 읽습니다.
+    """
+    with open(output_path / entry['shard'], 'rb') as f:
+        f.seek(entry['offset'])
+        return f.read(entry['size'])
@@ -0,0 +1,223 @@
+# shm_pipeline.py
+
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import multiprocessing as mp
+import queue
+
+from PIL import Image
+
+from image_probe import ImageProbe
+from image_processor import ImageProcessor
+from run_profiler import profile_in_process
+
+# (크기, 형식, 출력 경로) - ImageProcessor.process_variants 의 targets 와 같은 형식
+Target = Tuple[Optional[int], Optional[str], Path]
+
+# 결과 큐 메시지 종류
+_DECODED = 'decoded'
+_DECODE_FAILED = 'decode_failed'
+_ENCODED = 'encoded'
+_ENCODE_FAILED = 'encode_failed'
+
+
+class _SlotWriter:
+    """
+    디코드 프로세스에서 ImageProcessor._save_variant 를 대신합니다.
+    인코딩하지 않고 리사이즈된 픽셀을 공유 메모리 슬롯에 쓴 뒤, 작은 설명자만 인코드 큐에 넣습니다.
+    """
+
+    def __init__(self, processor: ImageProcessor, buffer: memoryview, slot_bytes: int,
+                 free_slots, encode_queue):
+        self.processor = processor
+        self.buffer = buffer
+        self.slot_bytes = slot_bytes
+        self.free_slots = free_slots
+        self.encode_queue = encode_queue
+        self.task_id = 0
+        self.handed_off = 0
+
+    def __call__(self, img: Image.Image, size: Optional[int], format: Optional[str], output_path: Path) -> Path:
+        data = img.tobytes()
+        if len(data) > self.slot_bytes:
+            raise ValueError(f"슬롯보다 큰 이미지입니다: {img.mode} {img.size}")
+        # 빈 슬롯이 없으면 인코드 쪽이 하나를 돌려줄 때까지 기다립니다. (링 버퍼가 디코드 속도를 제한)
+        slot = self.free_slots.get()
+        offset = slot * self.slot_bytes
+        self.buffer[offset:offset + len(data)] = data
+        self.encode_queue.put((self.task_id, slot, len(data), img.mode, img.size, size, format, output_path))
+        self.handed_off += 1
+        # 확장자는 형식에 맞춰 정해지므로 인코드 전에 최종 경로를 알 수 있습니다.
+        return self.processor._resolve_format(format, output_path)[1]
+
+
+def _decode_worker(options: Dict, shm_name: str, slot_bytes: int,
+                   tasks, free_slots, encode_queue, results) -> None:
+    """
+    디코드/리사이즈 프로세스: 원본을 디코드하고 크기별로 줄인 픽셀을 슬롯에 넘깁니다.
+    원본을 그대로 내보내는 출력(통과 복사)은 여기서 바로 복사합니다.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        processor = ImageProcessor(**options)
+        writer = _SlotWriter(processor, shm.buf, slot_bytes, free_slots, encode_queue)
+        processor._save_variant = writer
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, src_path, targets, probe, reduced = task
+            writer.task_id = task_id
+            writer.handed_off = 0
+            try:
+                paths = processor.process_variants(src_path, targets, probe, reduced)
+                results.put((_DECODED, task_id, paths, writer.handed_off))
+            except Exception as e:
+                results.put((_DECODE_FAILED, task_id, f"{type(e).__name__}: {e}", writer.handed_off))
+        del writer
+    finally:
+        shm.close()
+
+
+def _encode_worker(options: Dict, shm_name: str, slot_bytes: int,
+                   encode_queue, free_slots, results) -> None:
+    """
+    인코드 프로세스: 슬롯의 픽셀로 패딩/합성, 인코딩, 저장을 하고 슬롯을 돌려줍니다.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        processor = ImageProcessor(**options)
+        while True:
+            item = encode_queue.get()
+            if item is None:
+                break
+            task_id, slot, length, mode, image_size, size, format, output_path = item
+            try:
+                offset = slot * slot_bytes
+                try:
+                    img = Image.frombytes(mode, image_size, shm.buf[offset:offset + length])
+                finally:
+                    # 픽셀을 Pillow 이미지로 옮겼으므로 합성/인코딩 전에 슬롯을 바로 돌려줍니다.
+                    free_slots.put(slot)
+                processor._save_variant(img, size, format, output_path)
+                results.put((_ENCODED, task_id, None, 1))
+            except Exception as e:
+                results.put((_ENCODE_FAILED, task_id, f"{type(e).__name__}: {e}", 1))
+    finally:
+        shm.close()
+
+
+def _run_stage(worker: Callable, profile_dir: Optional[Path], *args) -> None:
+    """
+    단계 프로세스의 진입점입니다. 프로파일링 중이면 프로세스 전체를 cProfile 로 실행해
+    profile_dir/workers 에 저장하고, 부모의 RunProfiler.stop() 이 이를 합칩니다.
+    """
+    if profile_dir is None:
+        worker(*args)
+    else:
+        profile_in_process(worker, profile_dir, *args)
+
+
+class ShmPipeline:
+    """
+    디코드/리사이즈와 인코딩을 서로 다른 프로세스 단계로 나눠 실행합니다.
+
+    - 단계 사이의 픽셀은 multiprocessing.shared_memory 블록 하나를 고정 크기 슬롯으로 나눈 링 버퍼로 넘기고,
+      큐에는 (작업 번호, 슬롯, 모드, 크기, 출력 경로) 같은 작은 설명자만 넣습니다. 픽셀을 pickle 하지 않습니다.
+    - 슬롯은 목표 크기의 정사각형 RGBA 한 장이 들어가는 크기이며, 빈 슬롯 큐가 단계 사이의 흐름을 조절합니다.
+    - PNG 처럼 인코딩이 무거운 출력은 --encode-procs 를 디코드 쪽보다 크게 잡아 인코딩에 더 많은 코어를 줄 수 있습니다.
+    - 디코드/인코드 모두 ImageProcessor 의 같은 코드를 쓰므로 결과는 스레드 모드와 같습니다.
+    """
+
+    def __init__(self, processor_options: Dict, max_size: int,
+                 decode_procs: int = 2, encode_procs: int = 2, slots: Optional[int] = None,
+                 profile_dir: Optional[Path] = None):
+        self.processor_options = processor_options
+        # 설정하면 각 단계 프로세스를 프로파일링해 이 폴더의 workers/ 에 저장합니다.
+        self.profile_dir = profile_dir
+        self.decode_procs = max(1, decode_procs)
+        self.encode_procs = max(1, encode_procs)
+        self.slot_bytes = max_size * max_size * 4
+        self.slots = slots or 2 * (self.decode_procs + self.encode_procs)
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, jobs: List[Tuple[Path, List[Target], Optional[ImageProbe], bool]],
+            on_done: Optional[Callable[[int, Optional[List[Path]], Optional[str]], None]] = None
+            ) -> List[Optional[List[Path]]]:
+        """
+        작업들을 파이프라인으로 처리합니다.
+
+        Args:
+            jobs: (원본 경로, targets, 헤더 정보, 축소 디코드 여부) 목록
+            on_done: 작업 하나가 끝날 때마다 (작업 번호, 출력 경로 목록 또는 None, 오류 메시지) 로 호출
+
+        Returns:
+            List[Optional[List[Path]]]: 작업 순서대로 출력 경로 목록. 실패한 작업은 None
+        """
+        results: List[Optional[List[Path]]] = [None] * len(jobs)
+        if not jobs:
+            return results
+
+        context = mp.get_context()
+        shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+        tasks, free_slots, encode_queue, messages = (context.Queue() for _ in range(4))
+        for slot in range(self.slots):
+            free_slots.put(slot)
+        decoders = [context.Process(target=_run_stage, name=f'decode-{i}', daemon=True,
+                                    args=(_decode_worker, self.profile_dir, self.processor_options, shm.name,
+                                          self.slot_bytes, tasks, free_slots, encode_queue, messages))
+                    for i in range(self.decode_procs)]
+        encoders = [context.Process(target=_run_stage, name=f'encode-{i}', daemon=True,
+                                    args=(_encode_worker, self.profile_dir, self.processor_options, shm.name,
+                                          self.slot_bytes, encode_queue, free_slots, messages))
+                    for i in range(self.encode_procs)]
+        try:
+            for process in decoders + encoders:
+                process.start()
+            for task_id, (src_path, targets, probe, reduced) in enumerate(jobs):
+                tasks.put((task_id, src_path, targets, probe, reduced))
+            for _ in decoders:
+                tasks.put(None)
+
+            # 작업 번호별 [출력 경로 목록, 인코드로 넘긴 출력 수, 인코딩이 끝난 출력 수, 오류]
+            # 인코드 결과가 디코드 완료 알림보다 먼저 올 수 있으므로 둘 다 모인 뒤에 작업을 끝냅니다.
+            state: Dict[int, List] = {}
+            remaining = len(jobs)
+            while remaining:
+                try:
+                    kind, task_id, payload, count = messages.get(timeout=1)
+                except queue.Empty:
+                    # 정상 종료는 디코드 프로세스가 작업을 다 가져간 뒤뿐이므로, 0 이 아닌 종료 코드는 비정상 종료입니다.
+                    if any(process.exitcode not in (None, 0) for process in decoders + encoders):
+                        raise RuntimeError("파이프라인 프로세스가 비정상 종료되었습니다.")
+                    continue
+                entry = state.setdefault(task_id, [None, None, 0, None])
+                if kind in (_DECODED, _DECODE_FAILED):
+                    entry[0], entry[1] = (payload, count) if kind == _DECODED else ([], count)
+                    if kind == _DECODE_FAILED:
+                        entry[3] = entry[3] or payload
+                else:
+                    entry[2] += count
+                    if kind == _ENCODE_FAILED:
+                        entry[3] = entry[3] or payload
+                paths, handed_off, encoded, error = entry
+                if paths is None or encoded < handed_off:
+                    continue
+                remaining -= 1
+                del state[task_id]
+                if error is None:
+                    results[task_id] = paths
+                if on_done:
+                    on_done(task_id, results[task_id], error)
+        finally:
+            for _ in encoders:
+                encode_queue.put(None)
+            for process in decoders + encoders:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            shm.close()
+            shm.unlink()
+        return results
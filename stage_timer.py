@@ -0,0 +1,208 @@
+# stage_timer.py
+
+import heapq
+import json
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 비활성 상태에서 stage() 가 반환하는 재사용 가능한 컨텍스트
+_NULL_STAGE = nullcontext()
+
+
+class _WorkerStats:
+    """
+    작업자 스레드 하나의 단계별 시간과 카운터입니다. 해당 스레드만 기록하므로 잠금이 없습니다.
+    """
+    def __init__(self, name: str, slowest_n: int):
+        self.name = name
+        self.slowest_n = slowest_n
+        self.stage_totals: Dict[str, float] = {}
+        self.stage_counts: Dict[str, int] = {}
+        self.stage_max: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.files = 0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add_stage(self, name: str, elapsed: float) -> None:
+        self.stage_totals[name] = self.stage_totals.get(name, 0.0) + elapsed
+        self.stage_counts[name] = self.stage_counts.get(name, 0) + 1
+        if elapsed > self.stage_max.get(name, 0.0):
+            self.stage_max[name] = elapsed
+
+    def add_file(self, file_name: str, elapsed: float) -> None:
+        self.files += 1
+        if len(self.slowest) < self.slowest_n:
+            heapq.heappush(self.slowest, (elapsed, file_name))
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (elapsed, file_name))
+
+
+class _Stage:
+    __slots__ = ('_worker', '_name', '_start')
+
+    def __init__(self, worker: _WorkerStats, name: str):
+        self._worker = worker
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._worker.add_stage(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class StageTimer:
+    """
+    작업자별 단계 시간(디코드, 알파 합성, 리사이즈, 인코딩, 쓰기 등)과 카운터를 수집하고
+    작업 종료 시 합산 보고서를 만듭니다. 비활성 상태에서는 모든 호출이 즉시 반환됩니다.
+    """
+
+    def __init__(self, enabled: bool = False, slowest_n: int = 10):
+        self.enabled = enabled
+        self.slowest_n = slowest_n
+        self._local = threading.local()
+        self._workers: List[_WorkerStats] = []
+        self._register_lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def _worker(self) -> _WorkerStats:
+        worker = getattr(self._local, 'worker', None)
+        if worker is None:
+            worker = _WorkerStats(threading.current_thread().name, self.slowest_n)
+            with self._register_lock:
+                self._workers.append(worker)
+            self._local.worker = worker
+        return worker
+
+    def stage(self, name: str):
+        """
+        with 블록의 소요 시간을 현재 작업자의 단계 시간에 더합니다.
+
+        Args:
+            name (str): 단계 이름
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self._worker(), name)
+
+    def add(self, counter: str, value: int = 1) -> None:
+        """
+        현재 작업자의 카운터(픽셀 수, 입출력 바이트 등)를 증가시킵니다.
+        """
+        if not self.enabled:
+            return
+        counters = self._worker().counters
+        counters[counter] = counters.get(counter, 0) + value
+
+    def record_file(self, file_name: str, elapsed: float) -> None:
+        """
+        파일 하나의 전체 처리 시간을 기록합니다. 가장 느린 N개 파일 목록에 사용됩니다.
+        """
+        if not self.enabled:
+            return
+        self._worker().add_file(file_name, elapsed)
+
+    @staticmethod
+    def _stage_summary(totals: Dict[str, float], counts: Dict[str, int],
+                       maxima: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                'count': counts[name],
+                'total': total,
+                'mean': total / counts[name] if counts[name] else 0.0,
+                'max': maxima.get(name, 0.0),
+            }
+            for name, total in sorted(totals.items(), key=lambda item: -item[1])
+        }
+
+    def report(self) -> Dict:
+        """
+        모든 작업자의 기록을 합산한 보고서를 반환합니다.
+
+        Returns:
+            Dict: 경과 시간, 단계별 합계, 카운터, 작업자별 내역, 가장 느린 파일 목록
+        """
+        with self._register_lock:
+            workers = list(self._workers)
+
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        maxima: Dict[str, float] = {}
+        counters: Dict[str, int] = {}
+        slowest: List[Tuple[float, str]] = []
+        per_worker = {}
+
+        for worker in workers:
+            for name, total in worker.stage_totals.items():
+                totals[name] = totals.get(name, 0.0) + total
+                counts[name] = counts.get(name, 0) + worker.stage_counts[name]
+                maxima[name] = max(maxima.get(name, 0.0), worker.stage_max[name])
+            for name, value in worker.counters.items():
+                counters[name] = counters.get(name, 0) + value
+            slowest.extend(worker.slowest)
+            per_worker[worker.name] = {
+                'files': worker.files,
+                'busy': sum(worker.stage_totals.values()),
+                'stages': self._stage_summary(worker.stage_totals, worker.stage_counts, worker.stage_max),
+            }
+
+        return {
+            'wall_seconds': time.perf_counter() - self._started,
+            'files': sum(worker.files for worker in workers),
+            'stages': self._stage_summary(totals, counts, maxima),
+            'counters': counters,
+            'workers': per_worker,
+            'slowest': [{'file': name, 'seconds': elapsed}
+                        for elapsed, name in heapq.nlargest(self.slowest_n, slowest)],
+        }
+
+    def save_json(self, file_path: Path, report: Optional[Dict] = None) -> Path:
+        """
+        보고서를 JSON 파일로 저장합니다.
+        """
+        report = report if report is not None else self.report()
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return file_path
+
+    @staticmethod
+    def print_summary(report: Dict) -> None:
+        """
+        보고서를 표 형태로 출력합니다.
+        """
+        wall = report['wall_seconds']
+        print(f"\n=== 단계별 처리 통계 (경과 {wall:.2f}s, 파일 {report['files']}개) ===")
+        print(f"{'단계':<24}{'횟수':>8}{'합계(s)':>12}{'평균(ms)':>12}{'최대(ms)':>12}")
+        for name, stage in report['stages'].items():
+            print(f"{name:<24}{stage['count']:>8}{stage['total']:>12.2f}"
+                  f"{stage['mean'] * 1000:>12.1f}{stage['max'] * 1000:>12.1f}")
+
+        counters = report['counters']
+        encoders = [(name[len('encode['):-1], stage) for name, stage in report['stages'].items()
+                    if name.startswith('encode[')]
+        if encoders:
+            print(f"\n{'인코더(형식/프로필)':<20}{'개수':>8}{'평균(ms)':>12}{'평균 크기(KB)':>16}")
+            for label, stage in sorted(encoders):
+                size = counters.get(f'bytes_out[{label}]', 0) / stage['count'] / 1024 if stage['count'] else 0.0
+                print(f"{label:<20}{stage['count']:>8}{stage['mean'] * 1000:>12.1f}{size:>16.1f}")
+
+        if counters:
+            print()
+            for name, value in sorted(counters.items()):
+                if name.startswith('bytes'):
+                    print(f"{name:<24}{value / 1024 / 1024:>12.1f} MB")
+                elif name == 'pixels':
+                    print(f"{name:<24}{value / 1_000_000:>12.1f} MP")
+                else:
+                    print(f"{name:<24}{value:>12}")
+
+        if report['slowest']:
+            print("\n가장 오래 걸린 파일:")
+            for item in report['slowest']:
+                print(f"  {item['seconds'] * 1000:>10.1f} ms  {item['file']}")
@@ -0,0 +1,134 @@
+# tensor_cache.py
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # 쓰기에는 필요 없고, 읽기(open_tensor_cache)에만 필요합니다.
+    np = None
+
+DATA_NAME = 'tensors.u8'
+META_NAME = 'tensors.json'
+INDEX_NAME = 'tensors.index.jsonl'
+
+
+class TensorCacheWriter:
+    """
+    리사이즈/패딩을 마친 size x size 이미지의 픽셀을 하나의 uint8 배열 파일(N x S x S x C, 행 우선)에 이어 씁니다.
+    학습 쪽은 open_tensor_cache() 로 이 파일을 memmap 해서 디코드 없이 바로 읽을 수 있습니다.
+
+    - 픽셀은 PIL 의 tobytes() 그대로 쓰므로 쓰는 쪽에는 numpy 가 필요 없습니다.
+    - 같은 폴더에 다시 열면 기존 행 뒤에 이어 쓰고, 색인(tensors.index.jsonl)에 새 행을 추가합니다.
+    - 다시 열 때는 tensors.json 에 기록된 행 수까지만 남기고, 그 뒤의 데이터와 색인 줄(중단된 실행이 남긴 행)은
+      버립니다. 행 번호가 곧 배열 위치이므로 색인 없는 행이 남으면 이후 행이 모두 어긋나기 때문입니다.
+    """
+
+    def __init__(self, directory: Path, size: int, channels: int = 3):
+        if channels not in (3, 4):
+            raise ValueError(f"지원하지 않는 채널 수: {channels}")
+        self.directory = directory
+        self.size = size
+        self.channels = channels
+        self.mode = 'RGB' if channels == 3 else 'RGBA'
+        self.row_bytes = size * size * channels
+        directory.mkdir(parents=True, exist_ok=True)
+
+        meta_path = directory / META_NAME
+        self.rows = 0
+        if meta_path.exists():
+            with open(meta_path, encoding='utf-8') as f:
+                shape = json.load(f)['shape']
+            if shape[1:] != [size, size, channels]:
+                raise ValueError(f"기존 텐서 캐시의 형태 {shape[1:]} 와 요청한 형태 "
+                                 f"{[size, size, channels]} 가 다릅니다: {directory}")
+            self.rows = shape[0]
+
+        # 마지막으로 기록된 형태 뒤의 행은 색인이 없거나 불완전하므로 버립니다.
+        data_path = directory / DATA_NAME
+        if data_path.exists() and data_path.stat().st_size > self.rows * self.row_bytes:
+            os.truncate(data_path, self.rows * self.row_bytes)
+        self._trim_index()
+        self._data = open(data_path, 'ab')
+        self._entries: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _trim_index(self) -> None:
+        index_path = self.directory / INDEX_NAME
+        if not index_path.exists():
+            return
+        with open(index_path, encoding='utf-8') as f:
+            lines = [line for line in f if line.strip()]
+        kept = [line for line in lines if json.loads(line)['row'] < self.rows]
+        if len(kept) != len(lines):
+            temp_path = self.directory / (INDEX_NAME + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+            os.replace(temp_path, index_path)
+
+    def append(self, img: Image.Image, name: str) -> Optional[int]:
+        """
+        이미지 하나를 새 행으로 추가합니다. 크기가 맞지 않는 이미지는 건너뜁니다.
+
+        Returns:
+            Optional[int]: 추가한 행 번호
+        """
+        if img.size != (self.size, self.size):
+            return None
+        if img.mode != self.mode:
+            img = img.convert(self.mode)
+        data = img.tobytes()
+        with self._lock:
+            self._data.write(data)
+            row = self.rows
+            self.rows += 1
+            self._entries.append({'row': row, 'name': name, 'caption': ''})
+        return row
+
+    def close(self, names: Optional[Dict[str, str]] = None, captions: Optional[Dict[str, str]] = None) -> None:
+        """
+        데이터를 마무리하고 이번에 추가한 행의 색인과 전체 형태를 기록합니다. 두 번째 호출부터는 아무것도 하지 않습니다.
+
+        Args:
+            names (Optional[Dict[str, str]]): append 때의 이름 -> 최종 이름 (처리 뒤 이름을 바꾼 경우)
+            captions (Optional[Dict[str, str]]): 최종 이름 -> 캡션
+        """
+        with self._lock:
+            if self._data.closed:
+                return
+            self._data.close()
+            with open(self.directory / INDEX_NAME, 'a', encoding='utf-8') as f:
+                for entry in self._entries:
+                    if names:
+                        entry['name'] = names.get(entry['name'], entry['name'])
+                    if captions:
+                        entry['caption'] = captions.get(entry['name'], '')
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._entries = []
+            temp_path = self.directory / (META_NAME + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'dtype': 'uint8', 'shape': [self.rows, self.size, self.size, self.channels],
+                           'data': DATA_NAME, 'index': INDEX_NAME}, f, indent=2)
+            os.replace(temp_path, self.directory / META_NAME)
+
+
+def open_tensor_cache(directory: Path) -> Tuple['np.memmap', List[Dict]]:
+    """
+    텐서 캐시를 읽기 전용 memmap 으로 엽니다. 배열은 복사 없이 파일을 그대로 가리킵니다.
+
+    Returns:
+        Tuple[np.memmap, List[Dict]]: (N x S x S x C uint8 배열, 행별 {row, name, caption} 목록)
+    """
+    if np is None:
+        raise ImportError("텐서 캐시를 읽으려면 numpy 가 필요합니다. (pip install numpy)")
+    with open(directory / META_NAME, encoding='utf-8') as f:
+        meta = json.load(f)
+    array = np.memmap(directory / meta['data'], dtype=np.uint8, mode='r', shape=tuple(meta['shape']))
+    with open(directory / meta['index'], encoding='utf-8') as f:
+        index = [json.loads(line) for line in f if line.strip()]
+    return array, index